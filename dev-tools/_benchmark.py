@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import logging
+import math
+from pathlib import Path
+import tempfile
+import time
+from typing import Any, Final, Iterable, Iterator, Sequence
+
+import _exporter_factory
+import _exporter_release
+import _exporters
+import _jvm_profiles
+import _logging_tools
+from _cached_downloader import CachedDownloader
+from _prepared_environments import PreparedEnvironmentCache
+
+
+_PERCENTILES: Final = (50, 95, 99)
+# Makes median absolute deviation comparable with standard deviation of normal distribution
+_MAD_SCALE: Final = 1.4826
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BenchmarkCase:
+    exporter_config: _exporter_factory.ExporterConfig
+    syntax_plugin_path: Path
+    workspace_path: Path
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BenchmarkSettings:
+    iterations: int
+    cold_iterations: int
+    warmup_iterations: int
+    options: _exporter_factory.ExporterOptions = _exporter_factory.ExporterOptions()
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class LatencyStats:
+    count: int
+    mean: float
+    min: float
+    max: float
+    p50: float
+    p95: float
+    p99: float
+    mad: float
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[float]) -> LatencyStats | None:
+        if not samples:
+            return None
+
+        sorted_samples = sorted(samples)
+        p50, p95, p99 = (_percentile(sorted_samples, percent) for percent in _PERCENTILES)
+
+        return LatencyStats(
+            count=len(sorted_samples),
+            mean=sum(sorted_samples) / len(sorted_samples),
+            min=sorted_samples[0],
+            max=sorted_samples[-1],
+            p50=p50,
+            p95=p95,
+            p99=p99,
+            mad=_percentile(sorted(abs(sample - p50) for sample in sorted_samples), 50),
+        )
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any] | None) -> LatencyStats | None:
+        if data is None:
+            return None
+
+        return LatencyStats(**{field.name: data[field.name] for field in dataclasses.fields(cls)})
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    exporter_type: str
+    release: str
+    plugin_variant: str
+    jweaver: str | None
+    workspace: str
+    jvm_profile: str
+    export_failed: bool
+    cold: LatencyStats | None
+    warm: LatencyStats | None
+    throughput: float | None
+    peak_memory_mb: float | None
+
+    @property
+    def key(self) -> str:
+        return "/".join(
+            (self.exporter_type, self.release, self.plugin_variant, self.jweaver or "-", self.jvm_profile, self.workspace)
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> BenchmarkResult:
+        return BenchmarkResult(
+            exporter_type=data["exporter_type"],
+            release=data["release"],
+            plugin_variant=data["plugin_variant"],
+            jweaver=data.get("jweaver"),
+            workspace=data["workspace"],
+            jvm_profile=data.get("jvm_profile", _jvm_profiles.DEFAULT_PROFILE.name),
+            export_failed=data.get("export_failed", False),
+            cold=LatencyStats.from_json(data.get("cold")),
+            warm=LatencyStats.from_json(data.get("warm")),
+            throughput=data.get("throughput"),
+            peak_memory_mb=data.get("peak_memory_mb"),
+        )
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RegressionThresholds:
+    # Latency regresses when its median grows by more than `latency` (relative) and by more
+    # than `noise_factor` scaled median absolute deviations
+    latency: float
+    memory: float
+    noise_factor: float
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BenchmarkRegression:
+    case: str
+    metric: str
+    baseline: float
+    current: float
+    limit: float
+
+    def __str__(self) -> str:
+        return f"{self.case}: {self.metric} {self.baseline:.3f} -> {self.current:.3f} (limit {self.limit:.3f})"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class WeavingOverhead:
+    exporter_type: str
+    release: str
+    jvm_profile: str
+    workspace: str
+    jweaver: str
+    standalone: BenchmarkResult
+    woven: BenchmarkResult
+
+    @property
+    def cold_latency(self) -> float | None:
+        return _get_median_difference(self.standalone.cold, self.woven.cold)
+
+    @property
+    def warm_latency(self) -> float | None:
+        return _get_median_difference(self.standalone.warm, self.woven.warm)
+
+    @property
+    def peak_memory_mb(self) -> float | None:
+        if self.standalone.peak_memory_mb is None or self.woven.peak_memory_mb is None:
+            return None
+
+        return self.woven.peak_memory_mb - self.standalone.peak_memory_mb
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PluginCandidate:
+    # `jweaver` is None for the standalone plugin
+    jweaver: str | None
+    latency: float
+    peak_memory_mb: float | None
+
+
+def _get_median_difference(baseline: LatencyStats | None, current: LatencyStats | None) -> float | None:
+    if baseline is None or current is None:
+        return None
+
+    return current.p50 - baseline.p50
+
+
+def _percentile(sorted_samples: Sequence[float], percent: float) -> float:
+    # Linear interpolation between the closest ranks
+    position = (len(sorted_samples) - 1) * percent / 100
+    lower_index, upper_index = math.floor(position), math.ceil(position)
+    fraction = position - lower_index
+
+    return sorted_samples[lower_index] + (sorted_samples[upper_index] - sorted_samples[lower_index]) * fraction
+
+
+def _compare_latency(
+    case: str,
+    metric: str,
+    baseline: LatencyStats | None,
+    current: LatencyStats | None,
+    thresholds: RegressionThresholds,
+) -> BenchmarkRegression | None:
+    if baseline is None or current is None:
+        return None
+
+    noise = thresholds.noise_factor * _MAD_SCALE * max(baseline.mad, current.mad)
+    limit = baseline.p50 + max(baseline.p50 * thresholds.latency, noise)
+
+    if current.p50 > limit:
+        return BenchmarkRegression(case, metric, baseline.p50, current.p50, limit)
+
+    return None
+
+
+def compare_with_baseline(
+    results: Iterable[BenchmarkResult],
+    baseline_results: Iterable[BenchmarkResult],
+    thresholds: RegressionThresholds,
+) -> list[BenchmarkRegression]:
+    baseline_by_key = {result.key: result for result in baseline_results}
+    regressions: list[BenchmarkRegression] = []
+
+    for result in results:
+        if (baseline := baseline_by_key.get(result.key)) is None:
+            continue
+
+        for metric, baseline_stats, current_stats in (
+            ("cold_latency_p50", baseline.cold, result.cold),
+            ("warm_latency_p50", baseline.warm, result.warm),
+        ):
+            if (regression := _compare_latency(result.key, metric, baseline_stats, current_stats, thresholds)) is not None:
+                regressions.append(regression)
+
+        if baseline.peak_memory_mb is not None and result.peak_memory_mb is not None:
+            limit = baseline.peak_memory_mb * (1 + thresholds.memory)
+
+            if result.peak_memory_mb > limit:
+                regressions.append(
+                    BenchmarkRegression(result.key, "peak_memory_mb", baseline.peak_memory_mb, result.peak_memory_mb, limit)
+                )
+
+    return regressions
+
+
+def find_weaving_overheads(results: Iterable[BenchmarkResult]) -> list[WeavingOverhead]:
+    results = list(results)
+    standalone_results = {
+        (result.exporter_type, result.release, result.jvm_profile, result.workspace): result
+        for result in results
+        if result.plugin_variant == "standalone"
+    }
+
+    overheads: list[WeavingOverhead] = []
+
+    for result in results:
+        if result.plugin_variant != "lite" or result.jweaver is None:
+            continue
+
+        if (standalone := standalone_results.get((result.exporter_type, result.release, result.jvm_profile, result.workspace))) is None:
+            continue
+
+        overheads.append(
+            WeavingOverhead(
+                exporter_type=result.exporter_type,
+                release=result.release,
+                jvm_profile=result.jvm_profile,
+                workspace=result.workspace,
+                jweaver=result.jweaver,
+                standalone=standalone,
+                woven=result,
+            )
+        )
+
+    return sorted(
+        overheads,
+        key=lambda overhead: (overhead.exporter_type, overhead.release, overhead.jvm_profile, overhead.workspace, overhead.jweaver),
+    )
+
+
+def find_cheapest_jweavers(overheads: Iterable[WeavingOverhead]) -> dict[tuple[str, str, str], PluginCandidate]:
+    # Variants are ranked by total cold and warm medians over all workspaces, variants
+    # which failed any export or lack latency of some workspace are not considered
+    exporter_workspaces: dict[tuple[str, str, str], set[str]] = {}
+    variant_results: dict[tuple[str, str, str], dict[str | None, dict[str, BenchmarkResult]]] = {}
+
+    for overhead in overheads:
+        exporter = (overhead.exporter_type, overhead.release, overhead.jvm_profile)
+        exporter_workspaces.setdefault(exporter, set()).add(overhead.workspace)
+        exporter_variants = variant_results.setdefault(exporter, {})
+        exporter_variants.setdefault(None, {})[overhead.workspace] = overhead.standalone
+        exporter_variants.setdefault(overhead.jweaver, {})[overhead.workspace] = overhead.woven
+
+    cheapest: dict[tuple[str, str, str], PluginCandidate] = {}
+
+    for exporter, exporter_variants in variant_results.items():
+        candidates = [
+            candidate
+            for jweaver, results in exporter_variants.items()
+            if (candidate := _get_plugin_candidate(jweaver, results.values(), exporter_workspaces[exporter])) is not None
+        ]
+
+        if candidates:
+            cheapest[exporter] = min(candidates, key=lambda candidate: candidate.latency)
+
+    return cheapest
+
+
+def _get_plugin_candidate(
+    jweaver: str | None,
+    results: Iterable[BenchmarkResult],
+    workspaces: set[str],
+) -> PluginCandidate | None:
+    latencies: list[float] = []
+    peak_memory: list[float | None] = []
+
+    for result in results:
+        if result.export_failed or result.cold is None or result.warm is None:
+            return None
+
+        latencies.append(result.cold.p50 + result.warm.p50)
+        peak_memory.append(result.peak_memory_mb)
+
+    if len(latencies) != len(workspaces):
+        return None
+
+    return PluginCandidate(
+        jweaver=jweaver,
+        latency=sum(latencies),
+        peak_memory_mb=None if None in peak_memory else max(peak_memory),
+    )
+
+
+def describe_exporter_config(exporter_config: _exporter_factory.ExporterConfig) -> dict[str, str | None]:
+    match exporter_config.exporter_release:
+        case _exporter_release.StructurizrCliRelease():
+            exporter_type = "structurizr_cli"
+        case _exporter_release.StructurizrLiteRelease():
+            exporter_type = "structurizr_lite"
+
+    match exporter_config:
+        case _exporter_factory.LiteVersionExporterConfig():
+            plugin_variant, jweaver = "lite", exporter_config.jweaver_release.version
+        case _exporter_factory.StandaloneVersionExporterConfig():
+            plugin_variant, jweaver = "standalone", None
+
+    return {
+        "exporter_type": exporter_type,
+        "release": exporter_config.exporter_release.version,
+        "plugin_variant": plugin_variant,
+        "jweaver": jweaver,
+    }
+
+
+def _get_peak_memory_mb(results: Iterable[_exporters.ExportResult]) -> float | None:
+    peaks_kb = [
+        result.resource_usage.peak_rss_kb
+        for result in results
+        if result.resource_usage is not None and result.resource_usage.peak_rss_kb is not None
+    ]
+
+    return max(peaks_kb) / 1024 if peaks_kb else None
+
+
+class ExporterBenchmark:
+    # Cold latency is creation of a fresh exporter plus its first export, warm latency is
+    # a further export with the same exporter. Process per export exporters pay JVM startup in both
+    _LOG_PREFIX: Final = "ExporterBenchmark"
+
+    def __init__(
+        self,
+        downloader: CachedDownloader,
+        environments: PreparedEnvironmentCache,
+        java_path: Path,
+        log: logging.Logger,
+        settings: BenchmarkSettings,
+    ) -> None:
+        self.__downloader = downloader
+        self.__environments = environments
+        self.__java_path = java_path
+        self.__exporter_log = log
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__settings = settings
+
+    def run(self, cases: Iterable[BenchmarkCase]) -> list[BenchmarkResult]:
+        return [self.run_case(case) for case in cases]
+
+    def run_case(self, case: BenchmarkCase) -> BenchmarkResult:
+        description = describe_exporter_config(case.exporter_config)
+
+        with _logging_tools.log_action(self.__log, f"Benchmark {case.exporter_config} on '{case.workspace_path.name}'"):
+            # The first exporter also fills download and environment caches, so it is not measured as cold
+            warm_samples, warm_results = self.__measure_warm(case)
+            cold_samples, cold_results = self.__measure_cold(case)
+
+        return BenchmarkResult(
+            exporter_type=description["exporter_type"],
+            release=description["release"],
+            plugin_variant=description["plugin_variant"],
+            jweaver=description["jweaver"],
+            workspace=case.workspace_path.name,
+            jvm_profile=_exporter_factory.get_jvm_profile(case.exporter_config, self.__settings.options).name,
+            export_failed=any(isinstance(result, _exporters.ExportFailure) for result in warm_results),
+            cold=LatencyStats.from_samples(cold_samples),
+            warm=LatencyStats.from_samples(warm_samples),
+            throughput=len(warm_samples) / sum(warm_samples) if warm_samples and sum(warm_samples) > 0 else None,
+            peak_memory_mb=_get_peak_memory_mb([*warm_results, *cold_results]),
+        )
+
+    def __measure_warm(self, case: BenchmarkCase) -> tuple[list[float], list[_exporters.ExportResult]]:
+        samples: list[float] = []
+        results: list[_exporters.ExportResult] = []
+
+        with self.__create_exporter(case) as exporter:
+            for _ in range(self.__settings.warmup_iterations):
+                exporter.export_to_json(case.workspace_path)
+
+            for _ in range(self.__settings.iterations):
+                start_time = time.perf_counter()
+                result = exporter.export_to_json(case.workspace_path)
+                samples.append(time.perf_counter() - start_time)
+
+                results.append(result)
+
+        return samples, results
+
+    def __measure_cold(self, case: BenchmarkCase) -> tuple[list[float], list[_exporters.ExportResult]]:
+        samples: list[float] = []
+        results: list[_exporters.ExportResult] = []
+
+        for _ in range(self.__settings.cold_iterations):
+            start_time = time.perf_counter()
+
+            with self.__create_exporter(case) as exporter:
+                results.append(exporter.export_to_json(case.workspace_path))
+                samples.append(time.perf_counter() - start_time)
+
+        return samples, results
+
+    @contextlib.contextmanager
+    def __create_exporter(self, case: BenchmarkCase) -> Iterator[_exporters.StructurizrWorkspaceExporter]:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            exporter_factory = _exporter_factory.get_exporter_factory(
+                self.__downloader,
+                self.__environments,
+                case.exporter_config,
+                Path(temp_dir),
+                self.__exporter_log,
+                self.__settings.options,
+            )
+
+            exporter = exporter_factory(
+                java_path=self.__java_path,
+                syntax_plugin_path=case.syntax_plugin_path,
+            )
+
+            try:
+                yield exporter
+            finally:
+                exporter.close()
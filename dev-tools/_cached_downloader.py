@@ -1,9 +1,11 @@
 import hashlib
 from pathlib import Path
 import logging
+import os
 from typing import Final
 import requests
 import shutil
+import tempfile
 
 import _logging_tools
 
@@ -17,9 +19,15 @@ class _CacheManager:
         cache_path = self.__cache_path / key
         return cache_path if cache_path.exists() else None
 
-    def save_cache_file(self, key: str, src: Path) -> None:
+    def save_cache_file(self, key: str, src: Path) -> Path:
         cache_path = self.__cache_path / key
-        shutil.copy(src, cache_path)
+
+        # Parallel test workers can share one cache, so file is published atomically
+        temp_cache_path = cache_path.with_name(f"{key}.{os.getpid()}.tmp")
+        shutil.copy(src, temp_cache_path)
+        os.replace(temp_cache_path, cache_path)
+
+        return cache_path
 
     @staticmethod
     def __validate_cache_path(cache_path: Path) -> Path:
@@ -46,15 +54,27 @@ class CachedDownloader:
         *,
         percent_threshold: float = 10.0,
     ) -> None:
+        cache_path = self.get_file(url, percent_threshold=percent_threshold)
+        shutil.copy(cache_path, output_path)
+
+    def get_file(
+        self,
+        url: str,
+        *,
+        percent_threshold: float = 10.0,
+    ) -> Path:
+        # Returned file is shared with other users of the cache and must not be modified
         self.__log.debug(f"Install content from url '{url}' ...")
 
         cache_key = self.__get_cache_key(url)
         if (cache_path := self.__cache_manager.get_cache_file(cache_key)) is not None:
             self.__log.debug("Use cached content")
-            shutil.copy(cache_path, output_path)
+            return cache_path
+
+        self.__log.debug("Not found cached value. Install from server ...")
 
-        else:
-            self.__log.debug("Not found cached value. Install from server ...")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = Path(temp_dir) / cache_key
 
             with requests.get(url, stream=True) as response:
                 with output_path.open("wb") as file:
@@ -81,9 +101,11 @@ class CachedDownloader:
                         self.__log.debug(f"Installed {percent:.2f}%")
                         last_logged_percent = percent
 
-            self.__cache_manager.save_cache_file(cache_key, output_path)
+            cache_path = self.__cache_manager.save_cache_file(cache_key, output_path)
             self.__log.debug("Cache saved")
 
+        return cache_path
+
     @staticmethod
     def __get_cache_key(url: str) -> str:
         return hashlib.sha256(url.encode("utf-8")).hexdigest()
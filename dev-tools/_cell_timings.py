@@ -0,0 +1,182 @@
+import dataclasses
+from datetime import datetime
+import logging
+import statistics
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Final, Iterable, Mapping
+
+import _jsonl_store
+import _logging_tools
+
+
+_DURATION_HISTORY_SIZE: Final = 5
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CellTiming:
+    run_id: str
+    cell_id: str
+    outcome: str
+    duration: float
+    phases: Mapping[str, float]
+    timestamp: float
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RunSummary:
+    run_id: str
+    started_at: float
+    cells_count: int
+    failed_count: int
+    duration: float
+    phases: Mapping[str, float]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CellRegression:
+    cell_id: str
+    baseline_duration: float
+    duration: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.duration / self.baseline_duration if self.baseline_duration else float("inf")
+
+
+def _serialize_timing(timing: CellTiming) -> dict[str, Any]:
+    return {
+        "run": timing.run_id,
+        "cell": timing.cell_id,
+        "outcome": timing.outcome,
+        "duration": timing.duration,
+        "phases": dict(timing.phases),
+        "timestamp": timing.timestamp,
+    }
+
+
+def _deserialize_timing(record: dict[str, Any]) -> CellTiming:
+    return CellTiming(
+        run_id=record.get("run", ""),
+        cell_id=record["cell"],
+        outcome=record.get("outcome", "passed"),
+        duration=float(record["duration"]),
+        phases={phase: float(duration) for phase, duration in record.get("phases", {}).items()},
+        timestamp=float(record.get("timestamp", 0.0)),
+    )
+
+
+class CellTimingsStore:
+    _LOG_PREFIX: Final = "CellTimingsStore"
+
+    def __init__(self, log: logging.Logger, store_path: Path) -> None:
+        self.__store = _jsonl_store.JsonLinesStore[CellTiming](
+            _logging_tools.with_prefix(log, self._LOG_PREFIX),
+            store_path,
+            serialize=_serialize_timing,
+            deserialize=_deserialize_timing,
+        )
+
+    def record(
+        self,
+        cell_id: str,
+        duration: float,
+        *,
+        run_id: str = "",
+        outcome: str = "passed",
+        phases: Mapping[str, float] | None = None,
+    ) -> None:
+        self.__store.append(
+            CellTiming(
+                run_id=run_id,
+                cell_id=cell_id,
+                outcome=outcome,
+                duration=duration,
+                phases=dict(phases or {}),
+                timestamp=time.time(),
+            )
+        )
+
+    def load(self) -> list[CellTiming]:
+        return self.__store.load()
+
+    def load_durations(self) -> dict[str, float]:
+        history: dict[str, list[float]] = {}
+
+        for timing in self.load():
+            history.setdefault(timing.cell_id, []).append(timing.duration)
+
+        return {
+            cell_id: statistics.median(durations[-_DURATION_HISTORY_SIZE:])
+            for cell_id, durations in history.items()
+        }
+
+
+def new_run_id() -> str:
+    # Random suffix keeps runs started within the same second apart
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def group_by_run(timings: Iterable[CellTiming]) -> dict[str, list[CellTiming]]:
+    runs: dict[str, list[CellTiming]] = {}
+
+    for timing in sorted(timings, key=lambda timing: timing.timestamp):
+        runs.setdefault(timing.run_id, []).append(timing)
+
+    return runs
+
+
+def summarize_run(run_id: str, timings: Iterable[CellTiming]) -> RunSummary:
+    timings = list(timings)
+    phases: dict[str, float] = {}
+
+    for timing in timings:
+        for phase, duration in timing.phases.items():
+            phases[phase] = phases.get(phase, 0.0) + duration
+
+    # Cells of parallel workers overlap, so the run lasts from the first start to the last end
+    started_at = min((timing.timestamp - timing.duration for timing in timings), default=0.0)
+    finished_at = max((timing.timestamp for timing in timings), default=0.0)
+
+    return RunSummary(
+        run_id=run_id,
+        started_at=started_at,
+        cells_count=len(timings),
+        failed_count=sum(timing.outcome != "passed" for timing in timings),
+        duration=finished_at - started_at,
+        phases=phases,
+    )
+
+
+def find_slowest_cells(timings: Iterable[CellTiming], limit: int) -> list[CellTiming]:
+    return sorted(timings, key=lambda timing: timing.duration, reverse=True)[:limit]
+
+
+def find_regressions(
+    runs: Mapping[str, list[CellTiming]],
+    *,
+    threshold: float,
+    min_difference: float,
+) -> list[CellRegression]:
+    if len(runs) < 2:
+        return []
+
+    *previous_runs, last_run = runs.values()
+    history: dict[str, list[float]] = {}
+
+    for run_timings in previous_runs[-_DURATION_HISTORY_SIZE:]:
+        for timing in run_timings:
+            history.setdefault(timing.cell_id, []).append(timing.duration)
+
+    regressions: list[CellRegression] = []
+
+    for timing in last_run:
+        if (durations := history.get(timing.cell_id)) is None:
+            continue
+
+        baseline = statistics.median(durations)
+        if timing.duration - baseline > max(min_difference, baseline * threshold):
+            regressions.append(CellRegression(timing.cell_id, baseline, timing.duration))
+
+    return sorted(regressions, key=lambda regression: regression.duration - regression.baseline_duration, reverse=True)
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+from typing import Final, Iterable
+
+import _exporter_factory
+import _file_hashes
+import _jsonl_store
+import _logging_tools
+import _workspace_diff
+
+
+_FINGERPRINT_VERSION: Final = 2
+_PLUGINS_DIR_NAME: Final = "plugins"
+_DIRECTIVE_PATTERN: Final = re.compile(
+    r'^\s*!(?P<directive>include|docs|adrs|script)\s+(?:"(?P<quoted_path>[^"]+)"|(?P<path>\S+))',
+    flags=re.MULTILINE,
+)
+_REMOTE_PATH_PATTERN: Final = re.compile(r"^[a-z][a-z0-9+.-]*://", flags=re.IGNORECASE)
+
+
+def _iterate_files(path: Path) -> Iterable[Path]:
+    if path.is_file():
+        yield path
+    elif path.is_dir():
+        yield from (item for item in path.rglob("*") if item.is_file())
+
+
+def trace_workspace_dependencies(workspace_path: Path) -> list[Path]:
+    dependencies: set[Path] = set()
+    pending = [Path(os.path.normpath(workspace_path.absolute()))]
+
+    while pending:
+        path = pending.pop()
+        if path in dependencies:
+            continue
+
+        dependencies.add(path)
+
+        for match in _DIRECTIVE_PATTERN.finditer(path.read_text(encoding="utf-8", errors="replace")):
+            referenced_path = match.group("quoted_path") or match.group("path")
+
+            if _REMOTE_PATH_PATTERN.match(referenced_path):
+                continue
+
+            # Paths are normalized, so files reached through '..' are traced once and include cycles end
+            for dependency_path in _iterate_files(Path(os.path.normpath(path.parent / referenced_path))):
+                if match.group("directive") == "include":
+                    pending.append(dependency_path)
+                else:
+                    dependencies.add(dependency_path)
+
+    dependencies.update(path.absolute() for path in (workspace_path.parent / _PLUGINS_DIR_NAME).glob("*.jar"))
+
+    return sorted(dependencies)
+
+
+class FingerprintCalculator:
+    def __init__(self, exporter_fingerprint: str) -> None:
+        self.__exporter_fingerprint = exporter_fingerprint
+
+    def get_cell_fingerprint(
+        self,
+        workspace_path: Path,
+        syntax_plugin_path: Path,
+        exporter_config: _exporter_factory.ExporterConfig,
+        expected_result_path: Path | None = None,
+        expected_error_message: str | None = None,
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{_FINGERPRINT_VERSION}\0{self.__exporter_fingerprint}\0".encode("utf-8"))
+        digest.update(f"{exporter_config!r}\0{expected_error_message!r}\0".encode("utf-8"))
+        digest.update(f"{_workspace_diff.WORKSPACE_NORMALIZATION_RULES!r}\0".encode("utf-8"))
+
+        workspace_dir = workspace_path.parent.absolute()
+        named_paths = [
+            *((self.__get_path_name(path, workspace_dir), path) for path in trace_workspace_dependencies(workspace_path)),
+            ("<syntax-plugin>", syntax_plugin_path),
+        ]
+
+        if expected_result_path is not None:
+            named_paths.append(("<expected-result>", expected_result_path))
+
+        for name, path in named_paths:
+            digest.update(f"{name}\0{_file_hashes.get_file_hash(path)}\0".encode("utf-8"))
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def __get_path_name(path: Path, workspace_dir: Path) -> str:
+        try:
+            return path.relative_to(workspace_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+
+class PassedCellsStore:
+    _LOG_PREFIX: Final = "PassedCellsStore"
+
+    def __init__(self, log: logging.Logger, store_path: Path) -> None:
+        self.__store = _jsonl_store.JsonLinesStore[tuple[str, str]](
+            _logging_tools.with_prefix(log, self._LOG_PREFIX),
+            store_path,
+            serialize=lambda item: {"cell": item[0], "fingerprint": item[1]},
+            deserialize=lambda record: (record["cell"], record["fingerprint"]),
+        )
+
+    def record(self, cell_id: str, fingerprint: str) -> None:
+        self.__store.append((cell_id, fingerprint))
+
+    def load(self) -> dict[str, str]:
+        return dict(self.__store.load())
+
+    def compact(self) -> None:
+        self.__store.rewrite(self.load().items())
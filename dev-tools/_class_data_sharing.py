@@ -0,0 +1,75 @@
+import contextlib
+import dataclasses
+import logging
+import os
+from pathlib import Path
+from typing import Final, Iterator
+import uuid
+
+import _logging_tools
+
+
+# JVMs without dynamic archives (before JDK 13) skip the options instead of failing to start
+_COMMON_JAVA_OPTIONS: Final = ("-XX:+IgnoreUnrecognizedVMOptions", "-Xshare:auto")
+_QUIET_LOG_OPTION: Final = "-Xlog:cds=warning"
+# JVM reports rejected archives (e.g. after classpath changes) and recording problems only
+# at info level, which is too noisy for every launch
+_VERBOSE_LOG_OPTION: Final = "-Xlog:cds=info"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ClassDataLaunch:
+    java_options: tuple[str, ...]
+    recording: bool
+
+
+_NO_CLASS_DATA_LAUNCH: Final = ClassDataLaunch(java_options=(), recording=False)
+
+
+class ClassDataArchive:
+    # Until the archive exists, every launch records its own one at exit and publishes it,
+    # so the JVM has to exit normally. JVM ignores an archive which doesn't match it
+    _LOG_PREFIX: Final = "ClassDataArchive"
+
+    def __init__(self, log: logging.Logger, archive_path: Path) -> None:
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__archive_path = archive_path
+
+    @contextlib.contextmanager
+    def launch(self, *, verbose: bool = False) -> Iterator[ClassDataLaunch]:
+        # The context has to span the JVM lifetime
+        if self.__archive_path.exists():
+            self.__log.debug(f"Use archive '{self.__archive_path}'")
+            yield ClassDataLaunch(
+                java_options=(
+                    *_COMMON_JAVA_OPTIONS,
+                    _VERBOSE_LOG_OPTION if verbose else _QUIET_LOG_OPTION,
+                    f"-XX:SharedArchiveFile={self.__archive_path.absolute()}",
+                ),
+                recording=False,
+            )
+            return
+
+        self.__archive_path.parent.mkdir(parents=True, exist_ok=True)
+        recording_path = self.__archive_path.with_name(f"{self.__archive_path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+        try:
+            yield ClassDataLaunch(
+                java_options=(*_COMMON_JAVA_OPTIONS, _VERBOSE_LOG_OPTION, f"-XX:ArchiveClassesAtExit={recording_path.absolute()}"),
+                recording=True,
+            )
+
+            if recording_path.exists() and recording_path.stat().st_size > 0:
+                os.replace(recording_path, self.__archive_path)
+                self.__log.debug(f"Recorded archive '{self.__archive_path}'")
+            else:
+                self.__log.debug(f"JVM has not recorded archive '{self.__archive_path}'")
+        finally:
+            recording_path.unlink(missing_ok=True)
+
+
+def launch(archive: ClassDataArchive | None, *, verbose: bool = False) -> contextlib.AbstractContextManager[ClassDataLaunch]:
+    if archive is None:
+        return contextlib.nullcontext(_NO_CLASS_DATA_LAUNCH)
+
+    return archive.launch(verbose=verbose)
@@ -0,0 +1,98 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Final
+
+import _exporter_factory
+import _exporters
+import _file_hashes
+import _logging_tools
+import _workspace_diff
+
+
+_KEY_VERSION: Final = 2
+
+
+def _serialize_result(result: _exporters.ExportResult) -> dict:
+    match result:
+        case _exporters.ExportFailure(error_message=error_message):
+            return {"failure": {"error_message": error_message}}
+        case _:
+            return {"workspace": result}
+
+
+def _deserialize_result(data: dict) -> _exporters.ExportResult:
+    if (failure := data.get("failure")) is not None:
+        return _exporters.ExportFailure(error_message=failure["error_message"])
+
+    return _exporters.ExportedWorkspace(data["workspace"])
+
+
+class ExportResultCache:
+    _LOG_PREFIX: Final = "ExportResultCache"
+
+    def __init__(self, log: logging.Logger, cache_path: Path, exporter_fingerprint: str) -> None:
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__cache_path = cache_path
+        self.__exporter_fingerprint = exporter_fingerprint
+
+        self.__cache_path.mkdir(parents=True, exist_ok=True)
+
+    def get_key(self, workspace_path: Path, syntax_plugin_path: Path, config: _exporter_factory.ExporterConfig) -> str:
+        key_data = {
+            "version": _KEY_VERSION,
+            "workspace_name": workspace_path.name,
+            "workspace_dir": self.__get_directory_hash(workspace_path.parent),
+            "syntax_plugin": _file_hashes.get_file_hash(syntax_plugin_path),
+            "exporter_type": type(config).__name__,
+            "exporter_release_type": type(config.exporter_release).__name__,
+            "exporter_config": dataclasses.asdict(config),
+            "normalization_rules": repr(_workspace_diff.WORKSPACE_NORMALIZATION_RULES),
+            "exporter_fingerprint": self.__exporter_fingerprint,
+        }
+
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> _exporters.ExportResult | None:
+        result_path = self.__get_result_path(key)
+
+        try:
+            data = json.loads(result_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.__log.debug(f"Cache miss '{key}'")
+            return None
+        except ValueError:
+            self.__log.debug(f"Corrupted cache entry '{key}', ignore it")
+            return None
+
+        self.__log.debug(f"Cache hit '{key}'")
+        return _deserialize_result(data)
+
+    def put(self, key: str, result: _exporters.ExportResult) -> None:
+        result_path = self.__get_result_path(key)
+        temp_result_path = result_path.with_name(f"{result_path.name}.{os.getpid()}.tmp")
+
+        temp_result_path.write_text(json.dumps(_serialize_result(result)), encoding="utf-8")
+        os.replace(temp_result_path, result_path)
+
+        self.__log.debug(f"Save result '{key}'")
+
+    def __get_result_path(self, key: str) -> Path:
+        return self.__cache_path / f"{key}.json"
+
+    def __get_directory_hash(self, directory_path: Path) -> str:
+        digest = hashlib.sha256()
+
+        for path in sorted(directory_path.rglob("*")):
+            if not path.is_file():
+                continue
+
+            digest.update(path.relative_to(directory_path).as_posix().encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(_file_hashes.get_file_hash(path).encode("ascii"))
+            digest.update(b"\0")
+
+        return digest.hexdigest()
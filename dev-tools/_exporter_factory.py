@@ -1,12 +1,18 @@
+import argparse
 import dataclasses
-import shutil
-import stat
-import sys
-from typing import Final, Protocol
-import zipfile
+import enum
+import hashlib
+from typing import Any, Callable, Final, Mapping, Protocol
 
+import _class_data_sharing
 import _exporters
+import _file_hashes
+import _flight_recording
+import _jvm_profiles
 from _cached_downloader import CachedDownloader
+from _prepared_environments import FileSyncMode
+from _prepared_environments import PreparedEnvironment
+from _prepared_environments import PreparedEnvironmentCache
 import _logging_tools
 import _exporter_release
 
@@ -14,10 +20,20 @@ from pathlib import Path
 import logging
 
 
-_STRUCTURIZR_CLI_ARCHIVE_NAME: Final = "structurizr-cli.zip"
 _STRUCTURIZR_CLI_DIR: Final = "structurizr-cli"
-_STRUCTURIZR_CLI_SHELL_FILE: Final = "structurizr.sh"
-_JWEAVER_NAME: Final = "aspectjweaver.jar"
+_STRUCTURIZR_LITE_DIR: Final = "structurizr-lite"
+_JDK_RELEASE_FILE: Final = "release"
+
+_DEV_TOOLS_DIR: Final = Path(__file__).parent
+# Code of the harness which runs exporters and normalizes their results
+_EXPORTER_SOURCE_PATTERNS: Final = (
+    "_exporters/**/*.py",
+    "_exporters/**/*.java",
+    "_class_data_sharing.py",
+    "_jvm_profiles.py",
+    "_prepared_environments.py",
+    "_workspace_diff.py",
+)
 
 
 class ExporterFactory(Protocol):
@@ -49,203 +65,460 @@ class StandaloneVersionExporterConfig(_ExporterConfigBase):
 type ExporterConfig = LiteVersionExporterConfig | StandaloneVersionExporterConfig
 
 
-def _prepare_structurizr_cli_environment(downloader: CachedDownloader, release: _exporter_release.StructurizrCliRelease, temp_dir_path: Path, log: logging.Logger) -> Path:
-    structurizr_archive_path = temp_dir_path / _STRUCTURIZR_CLI_ARCHIVE_NAME
-    structurizr_cli_dir = temp_dir_path / _STRUCTURIZR_CLI_DIR
+class CliExportBackend(enum.StrEnum):
+    PROCESS = "process"
+    DAEMON = "daemon"
 
-    with _logging_tools.log_action(log, "Install structurizr cli"):
-        downloader.install_file(
-            url=release.url,
-            output_path=structurizr_archive_path,
-        )
 
-    with _logging_tools.log_action(log, "Extract structurizr cli"):
-        with zipfile.ZipFile(structurizr_archive_path) as archive:
-            archive.extractall(structurizr_cli_dir)
+@dataclasses.dataclass(frozen=True, slots=True)
+class ExporterOptions:
+    cli_backend: CliExportBackend = CliExportBackend.PROCESS
+    lite_staging_mode: FileSyncMode = FileSyncMode.COPY
+    class_data_sharing: bool = True
+    cli_jvm_profile: _jvm_profiles.JvmProfile = _jvm_profiles.DEFAULT_PROFILE
+    lite_jvm_profile: _jvm_profiles.JvmProfile = _jvm_profiles.DEFAULT_PROFILE
+    flight_recordings_dir: Path | None = None
+    log_exporter_output: bool = False
+
+
+def add_exporter_options(add_option: Callable[..., Any]) -> None:
+    # `add_option` is `add_argument` of argparse parser or `addoption` of pytest parser
+    add_option(
+        "--cli-backend",
+        type=CliExportBackend,
+        choices=tuple(CliExportBackend),
+        default=CliExportBackend.PROCESS,
+        help="How Structurizr CLI exports are run: a process per export or a long-lived daemon",
+    )
+
+    add_option(
+        "--lite-staging-mode",
+        type=FileSyncMode,
+        choices=tuple(FileSyncMode),
+        default=FileSyncMode.COPY,
+        help="How workspace files are staged into Structurizr Lite context: copied, hardlinked or symlinked. "
+        "Links skip copying, but share file content with the workspace directory",
+    )
+
+    add_option(
+        "--class-data-sharing",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Record AppCDS archives of exporter JVMs once and reuse them to speed up JVM startup",
+    )
+
+    add_option(
+        "--cli-jvm-profile",
+        type=_jvm_profiles.get_profile,
+        default=_jvm_profiles.DEFAULT_PROFILE,
+        help=f"JVM profile of Structurizr CLI processes and daemons, one of: {', '.join(_jvm_profiles.JVM_PROFILES)}",
+    )
+
+    add_option(
+        "--lite-jvm-profile",
+        type=_jvm_profiles.get_profile,
+        default=_jvm_profiles.DEFAULT_PROFILE,
+        help=f"JVM profile of Structurizr Lite servers, one of: {', '.join(_jvm_profiles.JVM_PROFILES)}",
+    )
+
+    add_option(
+        "--flight-recordings-dir",
+        type=Path,
+        default=None,
+        help="Record every export of exporter JVMs with Java Flight Recorder into the directory, "
+        "along with summaries of hot methods, allocations and time spent in pattern plugin classes",
+    )
+
+    add_option(
+        "--log-exporter-output",
+        action="store_true",
+        default=False,
+        help="Log stdout and stderr of exporter JVMs live, only their tails are kept otherwise",
+    )
+
+
+def get_exporter_options(values: Mapping[str, Any]) -> ExporterOptions:
+    return ExporterOptions(
+        cli_backend=values["cli_backend"],
+        lite_staging_mode=values["lite_staging_mode"],
+        class_data_sharing=values["class_data_sharing"],
+        cli_jvm_profile=values["cli_jvm_profile"],
+        lite_jvm_profile=values["lite_jvm_profile"],
+        flight_recordings_dir=values["flight_recordings_dir"],
+        log_exporter_output=values["log_exporter_output"],
+    )
+
 
-    if sys.platform != "win32":
-        script_path = structurizr_cli_dir / _STRUCTURIZR_CLI_SHELL_FILE
-        current_permissions = script_path.stat().st_mode
-        script_path.chmod(current_permissions | stat.S_IXUSR)
+def get_exporter_option_args(options: ExporterOptions) -> list[str]:
+    args = [
+        f"--cli-backend={options.cli_backend}",
+        f"--lite-staging-mode={options.lite_staging_mode}",
+        "--class-data-sharing" if options.class_data_sharing else "--no-class-data-sharing",
+        f"--cli-jvm-profile={options.cli_jvm_profile.name}",
+        f"--lite-jvm-profile={options.lite_jvm_profile.name}",
+    ]
 
-    return structurizr_cli_dir
+    if options.flight_recordings_dir is not None:
+        args.append(f"--flight-recordings-dir={options.flight_recordings_dir.absolute()}")
+
+    if options.log_exporter_output:
+        args.append("--log-exporter-output")
+
+    return args
+
+
+def get_exporter_fingerprint(java_path: Path, options: ExporterOptions) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{java_path.resolve().as_posix()}\0".encode("utf-8"))
+
+    if (release_path := java_path.absolute().parent / _JDK_RELEASE_FILE).exists():
+        digest.update(f"{_file_hashes.get_file_hash(release_path)}\0".encode("utf-8"))
+
+    for option_arg in get_exporter_option_args(options):
+        digest.update(f"{option_arg}\0".encode("utf-8"))
+
+    source_paths = {path for pattern in _EXPORTER_SOURCE_PATTERNS for path in _DEV_TOOLS_DIR.glob(pattern)}
+
+    for path in sorted(source_paths):
+        digest.update(f"{path.relative_to(_DEV_TOOLS_DIR).as_posix()}\0{_file_hashes.get_file_hash(path)}\0".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def get_jvm_profile(config: ExporterConfig, options: ExporterOptions) -> _jvm_profiles.JvmProfile:
+    match config.exporter_release:
+        case _exporter_release.StructurizrCliRelease():
+            return options.cli_jvm_profile
+        case _exporter_release.StructurizrLiteRelease():
+            return options.lite_jvm_profile
+
+
+def _prepare_structurizr_cli_environment(
+    downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
+    release: _exporter_release.StructurizrCliRelease,
+    log: logging.Logger,
+) -> PreparedEnvironment:
+    with _logging_tools.log_action(log, "Install structurizr cli", phase=_logging_tools.TimingPhase.DOWNLOAD):
+        structurizr_archive_path = downloader.get_file(release.url)
+
+    with _logging_tools.log_action(log, "Prepare structurizr cli", phase=_logging_tools.TimingPhase.ENVIRONMENT_PREPARATION):
+        return environments.prepare_structurizr_cli(archive_path=structurizr_archive_path)
 
 
 def _prepare_structurizr_lite_environment(
     downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
     release: _exporter_release.StructurizrLiteRelease,
-    temp_dir_path: Path,
     log: logging.Logger,
-) -> Path:
-    structurizr_lite_dir = temp_dir_path / "structurizr-lite"
-    structurizr_lite_war_file = structurizr_lite_dir / "structurizr-lite.war"
+    *,
+    syntax_plugin_path: Path | None = None,
+) -> PreparedEnvironment:
+    with _logging_tools.log_action(log, "Install structurizr lite", phase=_logging_tools.TimingPhase.DOWNLOAD):
+        structurizr_lite_war_path = downloader.get_file(release.url)
+
+    with _logging_tools.log_action(log, "Prepare structurizr lite", phase=_logging_tools.TimingPhase.ENVIRONMENT_PREPARATION):
+        return environments.prepare_structurizr_lite(
+            war_path=structurizr_lite_war_path,
+            syntax_plugin_path=syntax_plugin_path,
+        )
 
-    structurizr_lite_dir.mkdir()
 
-    with _logging_tools.log_action(log, "Install structurizr lite"):
-        downloader.install_file(
-            url=release.url,
-            output_path=structurizr_lite_war_file,
-        )
+def _get_class_data_archive(
+    environments: PreparedEnvironmentCache,
+    environment: PreparedEnvironment,
+    java_path: Path,
+    options: ExporterOptions,
+    *,
+    java_agent_paths: tuple[Path, ...],
+    java_options: tuple[str, ...],
+    classpath: tuple[Path, ...] = (),
+) -> _class_data_sharing.ClassDataArchive | None:
+    if not options.class_data_sharing:
+        return None
+
+    return environments.get_class_data_archive(
+        environment,
+        java_path,
+        java_agent_paths=java_agent_paths,
+        classpath=classpath,
+        java_options=java_options,
+    )
 
-    return structurizr_lite_dir
 
+def _get_flight_recorder(
+    options: ExporterOptions,
+    java_path: Path,
+    log: logging.Logger,
+    recordings_name: str,
+) -> _flight_recording.FlightRecorder | None:
+    if options.flight_recordings_dir is None:
+        return None
 
-def _install_jweaver(downloader: CachedDownloader, temp_dir_path: Path, release: JWeaverRelease, log: logging.Logger) -> Path:
-    aspect_jweaver_path = temp_dir_path / _JWEAVER_NAME
+    return _flight_recording.FlightRecorder(log, java_path, options.flight_recordings_dir / recordings_name)
 
-    with _logging_tools.log_action(log, "Install jweaver"):
-        downloader.install_file(
-            url=release.url,
-            output_path=aspect_jweaver_path,
-        )
 
-    return aspect_jweaver_path
+def _install_jweaver(downloader: CachedDownloader, release: JWeaverRelease, log: logging.Logger) -> Path:
+    # Java agent is used right from the download cache, so its path is stable for class data archives
+    with _logging_tools.log_action(log, "Install jweaver", phase=_logging_tools.TimingPhase.DOWNLOAD):
+        return downloader.get_file(release.url)
 
 
 def _get_structurizr_cli_lite_exporter_factory(
     downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
     jweaver_release: JWeaverRelease,
     release: _exporter_release.StructurizrCliRelease,
     temp_dir_path: Path,
     log: logging.Logger,
+    options: ExporterOptions,
 ) -> ExporterFactory:
-    structurizr_cli_dir = _prepare_structurizr_cli_environment(
+    jweaver_path = _install_jweaver(
         downloader=downloader,
-        release=release,
-        temp_dir_path=temp_dir_path,
+        release=jweaver_release,
         log=log,
     )
 
-    jweaver_path = _install_jweaver(
+    environment = _prepare_structurizr_cli_environment(
         downloader=downloader,
-        temp_dir_path=temp_dir_path,
-        release=jweaver_release,
+        environments=environments,
+        release=release,
         log=log,
     )
 
+    recordings_name = f"structurizr-cli-{release.version}-lite-{jweaver_release.version}"
+
     def _create_structurizr_cli_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrCliForLiteVersion:
         return _exporters.StructurizrCliForLiteVersion(
-            structurizr_cli_dir=structurizr_cli_dir,
+            structurizr_cli_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_CLI_DIR,
+            java_path=java_path,
+            syntax_plugin_path=syntax_plugin_path,
+            jweaver_path=jweaver_path,
+            log=log,
+            java_options=options.cli_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
+            class_data_archive=_get_class_data_archive(
+                environments,
+                environment,
+                java_path,
+                options,
+                java_agent_paths=(jweaver_path,),
+                java_options=options.cli_jvm_profile.java_options,
+                classpath=(syntax_plugin_path,),
+            ),
+        )
+
+    def _create_structurizr_cli_daemon_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrCliDaemonForLiteVersion:
+        return _exporters.StructurizrCliDaemonForLiteVersion(
+            structurizr_cli_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_CLI_DIR,
             java_path=java_path,
             syntax_plugin_path=syntax_plugin_path,
             jweaver_path=jweaver_path,
+            log=log,
+            java_options=options.cli_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
         )
 
-    return _create_structurizr_cli_exporter
+    match options.cli_backend:
+        case CliExportBackend.PROCESS:
+            return _create_structurizr_cli_exporter
+        case CliExportBackend.DAEMON:
+            return _create_structurizr_cli_daemon_exporter
 
 
 def _get_structurizr_cli_standalone_exporter_factory(
     downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
     release: _exporter_release.StructurizrCliRelease,
     temp_dir_path: Path,
     log: logging.Logger,
+    options: ExporterOptions,
 ) -> ExporterFactory:
-    structurizr_cli_dir = _prepare_structurizr_cli_environment(
+    environment = _prepare_structurizr_cli_environment(
         downloader=downloader,
+        environments=environments,
         release=release,
-        temp_dir_path=temp_dir_path,
         log=log,
     )
 
+    recordings_name = f"structurizr-cli-{release.version}-standalone"
+
     def _create_structurizr_cli_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrCliForStandaloneVersion:
         return _exporters.StructurizrCliForStandaloneVersion(
-            structurizr_cli_dir=structurizr_cli_dir,
+            structurizr_cli_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_CLI_DIR,
+            java_path=java_path,
+            syntax_plugin_path=syntax_plugin_path,
+            log=log,
+            java_options=options.cli_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
+            class_data_archive=_get_class_data_archive(
+                environments,
+                environment,
+                java_path,
+                options,
+                java_agent_paths=(syntax_plugin_path,),
+                java_options=options.cli_jvm_profile.java_options,
+            ),
+        )
+
+    def _create_structurizr_cli_daemon_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrCliDaemonForStandaloneVersion:
+        return _exporters.StructurizrCliDaemonForStandaloneVersion(
+            structurizr_cli_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_CLI_DIR,
             java_path=java_path,
             syntax_plugin_path=syntax_plugin_path,
+            log=log,
+            java_options=options.cli_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
         )
 
-    return _create_structurizr_cli_exporter
+    match options.cli_backend:
+        case CliExportBackend.PROCESS:
+            return _create_structurizr_cli_exporter
+        case CliExportBackend.DAEMON:
+            return _create_structurizr_cli_daemon_exporter
 
 
 def _get_structurizr_lite_lite_exporter_factory(
     downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
     jweaver_release: JWeaverRelease,
     release: _exporter_release.StructurizrLiteRelease,
     temp_dir_path: Path,
     log: logging.Logger,
+    options: ExporterOptions,
 ) -> ExporterFactory:
-    structurizr_lite_dir = _prepare_structurizr_lite_environment(
-        downloader=downloader,
-        release=release,
-        temp_dir_path=temp_dir_path,
-        log=log,
-    )
-
     jweaver_path = _install_jweaver(
         downloader=downloader,
-        temp_dir_path=temp_dir_path,
         release=jweaver_release,
         log=log,
     )
 
+    recordings_name = f"structurizr-lite-{release.version}-lite-{jweaver_release.version}"
+
     def _create_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrLiteForLiteVersion:
+        environment = _prepare_structurizr_lite_environment(
+            downloader=downloader,
+            environments=environments,
+            release=release,
+            log=log,
+            syntax_plugin_path=syntax_plugin_path,
+        )
+
         return _exporters.StructurizrLiteForLiteVersion(
-            structurizr_lite_dir=structurizr_lite_dir,
+            structurizr_lite_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_LITE_DIR,
             java_path=java_path,
             syntax_plugin_path=syntax_plugin_path,
-            stdout_path=temp_dir_path / "stdout.txt",
-            stderr_path=temp_dir_path / "stderr.txt",
             log=log,
             jweaver_path=jweaver_path,
+            staging_mode=options.lite_staging_mode,
+            java_options=options.lite_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
+            class_data_archive=_get_class_data_archive(
+                environments,
+                environment,
+                java_path,
+                options,
+                java_agent_paths=(jweaver_path,),
+                java_options=options.lite_jvm_profile.java_options,
+            ),
         )
 
     return _create_exporter
 
 def _get_structurizr_lite_standalone_exporter_factory(
     downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
     release: _exporter_release.StructurizrLiteRelease,
     temp_dir_path: Path,
     log: logging.Logger,
+    options: ExporterOptions,
 ) -> ExporterFactory:
-    structurizr_lite_dir = _prepare_structurizr_lite_environment(
+    environment = _prepare_structurizr_lite_environment(
         downloader=downloader,
+        environments=environments,
         release=release,
-        temp_dir_path=temp_dir_path,
         log=log,
     )
 
+    recordings_name = f"structurizr-lite-{release.version}-standalone"
+
     def _create_exporter(java_path: Path, syntax_plugin_path: Path) -> _exporters.StructurizrLiteForStandaloneVersion:
         return _exporters.StructurizrLiteForStandaloneVersion(
-            structurizr_lite_dir=structurizr_lite_dir,
+            structurizr_lite_dir=environment.path,
+            work_dir=temp_dir_path / _STRUCTURIZR_LITE_DIR,
             java_path=java_path,
             syntax_plugin_path=syntax_plugin_path,
-            stdout_path=temp_dir_path / "stdout.txt",
-            stderr_path=temp_dir_path / "stderr.txt",
             log=log,
+            staging_mode=options.lite_staging_mode,
+            java_options=options.lite_jvm_profile.java_options,
+            flight_recorder=_get_flight_recorder(options, java_path, log, recordings_name),
+            log_output=options.log_exporter_output,
+            class_data_archive=_get_class_data_archive(
+                environments,
+                environment,
+                java_path,
+                options,
+                java_agent_paths=(syntax_plugin_path,),
+                java_options=options.lite_jvm_profile.java_options,
+            ),
         )
 
     return _create_exporter
 
-def get_exporter_factory(downloader: CachedDownloader, config: ExporterConfig, temp_dir_path: Path, log: logging.Logger) -> ExporterFactory:
+def get_exporter_factory(
+    downloader: CachedDownloader,
+    environments: PreparedEnvironmentCache,
+    config: ExporterConfig,
+    temp_dir_path: Path,
+    log: logging.Logger,
+    options: ExporterOptions = ExporterOptions(),
+) -> ExporterFactory:
     match config:
         case LiteVersionExporterConfig(exporter_release=_exporter_release.StructurizrCliRelease()):
             return _get_structurizr_cli_lite_exporter_factory(
                 downloader=downloader,
+                environments=environments,
                 jweaver_release=config.jweaver_release,
                 release=config.exporter_release,
                 temp_dir_path=temp_dir_path,
                 log=log,
+                options=options,
             )
         case LiteVersionExporterConfig(exporter_release=_exporter_release.StructurizrLiteRelease()):
             return _get_structurizr_lite_lite_exporter_factory(
                 downloader=downloader,
+                environments=environments,
                 jweaver_release=config.jweaver_release,
                 release=config.exporter_release,
                 temp_dir_path=temp_dir_path,
                 log=log,
+                options=options,
             )
         case StandaloneVersionExporterConfig(exporter_release=_exporter_release.StructurizrCliRelease()):
             return _get_structurizr_cli_standalone_exporter_factory(
                 downloader=downloader,
+                environments=environments,
                 release=config.exporter_release,
                 temp_dir_path=temp_dir_path,
                 log=log,
+                options=options,
             )
         case StandaloneVersionExporterConfig(exporter_release=_exporter_release.StructurizrLiteRelease()):
             return _get_structurizr_lite_standalone_exporter_factory(
                 downloader=downloader,
+                environments=environments,
                 release=config.exporter_release,
                 temp_dir_path=temp_dir_path,
                 log=log,
+                options=options,
             )
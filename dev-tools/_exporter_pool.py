@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import dataclasses
+import logging
+from pathlib import Path
+import tempfile
+from typing import Final
+
+import _exporters
+import _exporter_factory
+import _logging_tools
+from _cached_downloader import CachedDownloader
+from _prepared_environments import PreparedEnvironmentCache
+
+
+type _PoolKey = tuple[_exporter_factory.ExporterConfig, Path]
+
+
+@dataclasses.dataclass(slots=True)
+class _PooledExporter:
+    exporter: _exporters.StructurizrWorkspaceExporter
+    temp_dir: tempfile.TemporaryDirectory
+
+
+class ExporterPool:
+    # Least recently used exporter is closed when `max_size` is reached. With the default size
+    # an exporter is reused only by adjacent cells, as they are ordered in the test matrix
+    _LOG_PREFIX: Final = "ExporterPool"
+
+    def __init__(
+        self,
+        downloader: CachedDownloader,
+        environments: PreparedEnvironmentCache,
+        java_path: Path,
+        log: logging.Logger,
+        *,
+        max_size: int = 1,
+        options: _exporter_factory.ExporterOptions = _exporter_factory.ExporterOptions(),
+    ) -> None:
+        if max_size < 1:
+            raise ValueError(f"Pool size must be positive, got {max_size}")
+
+        self.__downloader = downloader
+        self.__environments = environments
+        self.__java_path = java_path
+        self.__exporter_log = log
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__max_size = max_size
+        self.__options = options
+        self.__exporters: OrderedDict[_PoolKey, _PooledExporter] = OrderedDict()
+
+    def get_exporter(self, config: _exporter_factory.ExporterConfig, syntax_plugin_path: Path) -> _exporters.StructurizrWorkspaceExporter:
+        key = (config, syntax_plugin_path)
+
+        if (pooled_exporter := self.__exporters.get(key)) is not None:
+            self.__log.debug(f"Reuse exporter for {config}")
+            self.__exporters.move_to_end(key)
+            return pooled_exporter.exporter
+
+        while len(self.__exporters) >= self.__max_size:
+            _, evicted_exporter = self.__exporters.popitem(last=False)
+            self.__close_exporter(evicted_exporter)
+
+        self.__exporters[key] = self.__create_exporter(config, syntax_plugin_path)
+        return self.__exporters[key].exporter
+
+    def discard(self, config: _exporter_factory.ExporterConfig, syntax_plugin_path: Path) -> None:
+        if (pooled_exporter := self.__exporters.pop((config, syntax_plugin_path), None)) is not None:
+            self.__close_exporter(pooled_exporter)
+
+    def close(self) -> None:
+        with _logging_tools.log_action(self.__log, "Close all exporters"):
+            while self.__exporters:
+                _, pooled_exporter = self.__exporters.popitem(last=False)
+                self.__close_exporter(pooled_exporter)
+
+    def __create_exporter(self, config: _exporter_factory.ExporterConfig, syntax_plugin_path: Path) -> _PooledExporter:
+        with _logging_tools.log_action(self.__log, f"Create exporter for {config}"):
+            temp_dir = tempfile.TemporaryDirectory()
+
+            try:
+                exporter_factory = _exporter_factory.get_exporter_factory(
+                    self.__downloader,
+                    self.__environments,
+                    config,
+                    Path(temp_dir.name),
+                    self.__exporter_log,
+                    self.__options,
+                )
+
+                exporter = exporter_factory(
+                    java_path=self.__java_path,
+                    syntax_plugin_path=syntax_plugin_path,
+                )
+            except Exception:
+                temp_dir.cleanup()
+                raise
+
+            return _PooledExporter(exporter=exporter, temp_dir=temp_dir)
+
+    def __close_exporter(self, pooled_exporter: _PooledExporter) -> None:
+        try:
+            pooled_exporter.exporter.close()
+        finally:
+            pooled_exporter.temp_dir.cleanup()
+
+    def __enter__(self) -> "ExporterPool":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
@@ -4,6 +4,8 @@ from ._interface import ExportResult
 from ._interface import ExportFailure
 from ._structurizr_cli import StructurizrCliForLiteVersion
 from ._structurizr_cli import StructurizrCliForStandaloneVersion
+from ._structurizr_cli_daemon import StructurizrCliDaemonForLiteVersion
+from ._structurizr_cli_daemon import StructurizrCliDaemonForStandaloneVersion
 from ._structurizr_lite import StructurizrLiteForLiteVersion
 from ._structurizr_lite import StructurizrLiteForStandaloneVersion
 
@@ -12,6 +14,8 @@ __all__ = [
     "ExportedWorkspace",
     "ExportFailure",
     "ExportResult",
+    "StructurizrCliDaemonForLiteVersion",
+    "StructurizrCliDaemonForStandaloneVersion",
     "StructurizrCliForLiteVersion",
     "StructurizrCliForStandaloneVersion",
     "StructurizrWorkspaceExporter",
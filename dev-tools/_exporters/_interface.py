@@ -1,20 +1,47 @@
+import dataclasses
 from dataclasses import dataclass
-from typing import Any, NewType, Protocol
+from typing import Any, Iterable, Iterator, Mapping, Protocol
 from pathlib import Path
 
+import _process_tree
 
-ExportedWorkspace = NewType("ExportedWorkspace", dict[str, Any])
+
+class ExportedWorkspace(dict[str, Any]):
+    # Resource usage is not a part of the workspace, so it doesn't take part in comparison
+    __slots__ = ("resource_usage",)
+
+    def __init__(self, workspace: Mapping[str, Any], *, resource_usage: _process_tree.ResourceUsage | None = None) -> None:
+        super().__init__(workspace)
+        self.resource_usage = resource_usage
 
 
 @dataclass(frozen=True, slots=True)
 class ExportFailure:
     error_message: str
+    resource_usage: _process_tree.ResourceUsage | None = dataclasses.field(default=None, compare=False)
 
 
 type ExportResult = ExportedWorkspace | ExportFailure
 
 
+def with_resource_usage(result: ExportResult, resource_usage: _process_tree.ResourceUsage | None) -> ExportResult:
+    match result:
+        case ExportedWorkspace():
+            return ExportedWorkspace(result, resource_usage=resource_usage)
+        case ExportFailure():
+            return dataclasses.replace(result, resource_usage=resource_usage)
+
+
 class StructurizrWorkspaceExporter(Protocol):
     def export_to_json(self, workspace_path: Path) -> ExportResult: ...
 
+    def export_many(self, workspace_paths: Iterable[Path]) -> Iterator[ExportResult]:
+        """
+        Exports workspaces one by one in the same exporter session.
+
+        :return: export results in the order of given workspace paths,
+            each result is yielded as soon as its export is finished.
+        """
+        ...
+
     def close(self) -> None: ...
@@ -1,15 +1,25 @@
 import json
+import logging
 from pathlib import Path
-import shutil
 import subprocess
 import sys
-from typing import Final, Iterable, Mapping
+import time
+from typing import ClassVar, Final, Iterable, Iterator, Sequence
 import os
 
 from ._interface import ExportedWorkspace
 from ._interface import ExportResult
 from ._interface import ExportFailure
 from ._interface import StructurizrWorkspaceExporter
+from ._interface import with_resource_usage
+import _class_data_sharing
+import _flight_recording
+import _jvm_profiles
+import _logging_tools
+import _output_capture
+import _prepared_environments
+import _process_tree
+import _workspace_diff
 
 
 class StructurizrCliProcessError(Exception):
@@ -23,117 +33,235 @@ class StructurizrCliProcessError(Exception):
         return f"Structurizr CLI command {self.command} returned non-zero exit status {self.exit_code}\nStdout:\n{self.stdout}\nStderr:\n{self.stderr}"
 
 
-def _run_export_command(
+def _get_export_arguments(workspace_path: Path, output_dir: Path) -> list[str]:
+    return [
+        "--format",
+        "json",
+        "--output",
+        str(output_dir),
+        "--workspace",
+        str(workspace_path.absolute()),
+    ]
+
+
+def _read_exported_workspace(workspace_path: Path, output_dir: Path) -> ExportedWorkspace:
+    workspace_name = workspace_path.name.removesuffix(workspace_path.suffix)
+    converted_workspace_path = output_dir / f"{workspace_name}.json"
+
+    workspace = json.loads(converted_workspace_path.read_text())
+    _workspace_diff.normalize_workspace(workspace)
+
+    return ExportedWorkspace(workspace)
+
+
+def _get_java_command(
+    java_path: Path,
     structurizr_cli_dir: Path,
+    launch: _prepared_environments.StructurizrCliLaunch,
+    main_class: str,
+    *,
+    java_options: Sequence[str] = (),
+    classpath: Sequence[Path] = (),
+) -> list[str]:
+    java_executable = "java.exe" if sys.platform == "win32" else "java"
+
+    return [
+        str((java_path / java_executable).absolute()),
+        *launch.java_options,
+        *java_options,
+        "-cp",
+        os.pathsep.join(str(path) for path in (*launch.get_classpath(structurizr_cli_dir), *classpath)),
+        main_class,
+    ]
+
+
+def _run_export_command(
+    java_command: Sequence[str],
     workspace_path: Path,
     output_dir: Path,
     *,
-    env: Mapping[str, str] | None = None,
+    output_log: logging.Logger | None = None,
 ) -> ExportResult:
-    executable_name = "structurizr.bat" if sys.platform == "win32" else "structurizr.sh"
-    executable_path = structurizr_cli_dir / executable_name
-
     command = [
-        str(executable_path),
+        *java_command,
         "export",
-        "--format",
-        "json",
-        "--output",
-        str(output_dir),
-        "--workspace",
-        str(workspace_path.absolute()),
+        *_get_export_arguments(workspace_path, output_dir),
     ]
 
-    process = subprocess.run(
+    start_time = time.perf_counter()
+
+    process = subprocess.Popen(
         command,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        env=env or os.environ,
-        encoding="utf-8",
-        errors="replace",
+        env=_jvm_profiles.get_java_environment(),
     )
+    stdout_capture = _output_capture.start(process.stdout, "stdout", log=output_log)
+    stderr_capture = _output_capture.start(process.stderr, "stderr", log=output_log)
+
+    resource_usage = _process_tree.wait_with_resource_usage(process, start_time)
+    stdout_capture.join()
+    stderr_capture.join()
 
-    try:
-        process.check_returncode()
-    except subprocess.SubprocessError:
+    stdout = stdout_capture.get_text()
+    stderr = stderr_capture.get_text()
+
+    if process.returncode != 0:
         if process.returncode == 1:
-            return ExportFailure(process.stderr)
+            return ExportFailure(stderr, resource_usage=resource_usage)
 
         raise StructurizrCliProcessError(
             command=command,
             exit_code=process.returncode,
-            stdout=process.stdout,
-            stderr=process.stderr,
+            stdout=stdout,
+            stderr=stderr,
         )
 
-    workspace_name = workspace_path.name.removesuffix(workspace_path.suffix)
-    converted_workspace_path = output_dir / f"{workspace_name}.json"
-
-    return ExportedWorkspace(json.loads(converted_workspace_path.read_text()))
+    return with_resource_usage(_read_exported_workspace(workspace_path, output_dir), resource_usage)
 
 
-
-class StructurizrCliForLiteVersion(StructurizrWorkspaceExporter):
+class _StructurizrCliBase(StructurizrWorkspaceExporter):
     _OUTPUT_DIR: Final = "output"
+    _LOG_PREFIX: ClassVar[str] = "StructurizrCli"
 
     def __init__(
         self,
         structurizr_cli_dir: Path,
+        work_dir: Path,
         java_path: Path,
-        syntax_plugin_path: Path,
-        jweaver_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
     ):
         self.__structurizr_cli_dir = structurizr_cli_dir
+        self.__work_dir = work_dir
         self.__java_path = java_path
-        self.__syntax_plugin_path = syntax_plugin_path
-        self.__jweaver_path = jweaver_path
+        self.__java_options = tuple(java_options)
+        self.__class_data_archive = class_data_archive
+        self.__flight_recorder = flight_recorder
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__log_output = log_output
+        self.__launch = _prepared_environments.get_structurizr_cli_launch(self.__structurizr_cli_dir)
 
     def export_to_json(self, workspace_path: Path) -> ExportResult:
-        output_dir = (self.__structurizr_cli_dir / self._OUTPUT_DIR).absolute()
+        return next(self.export_many([workspace_path]))
 
-        shutil.copy(
-            self.__syntax_plugin_path,
-            self.__structurizr_cli_dir / "lib" / self.__syntax_plugin_path.name,
-        )
+    def export_many(self, workspace_paths: Iterable[Path]) -> Iterator[ExportResult]:
+        output_dir = (self.__work_dir / self._OUTPUT_DIR).absolute()
+        output_dir.mkdir(parents=True, exist_ok=True)
 
-        return _run_export_command(
-            structurizr_cli_dir=self.__structurizr_cli_dir,
-            workspace_path=workspace_path,
-            output_dir=output_dir,
-            env={
-                "PATH": f"{os.environ['PATH']}:{self.__java_path.absolute()}",
-                "JAVA_TOOL_OPTIONS": f"-javaagent:{self.__jweaver_path.absolute()}",
-            },
-        )
+        # Structurizr CLI exports a single workspace per launch
+        for workspace_path in workspace_paths:
+            with (
+                _class_data_sharing.launch(self.__class_data_archive, verbose=self.__log_output) as class_data_launch,
+                _flight_recording.launch(self.__flight_recorder, workspace_path.stem) as flight_recording_options,
+            ):
+                result = _run_export_command(
+                    java_command=_get_java_command(
+                        self.__java_path,
+                        self.__structurizr_cli_dir,
+                        self.__launch,
+                        self.__launch.main_class,
+                        java_options=[
+                            f"-javaagent:{self._java_agent_path.absolute()}",
+                            *self.__java_options,
+                            *class_data_launch.java_options,
+                            *flight_recording_options,
+                        ],
+                        classpath=self._classpath,
+                    ),
+                    workspace_path=workspace_path,
+                    output_dir=output_dir,
+                    output_log=self.__log if self.__log_output else None,
+                )
+
+            self.__log.debug(f"Resource usage of '{workspace_path.name}' export: {result.resource_usage}")
+            yield result
 
     def close(self) -> None:
-        pass
+        _flight_recording.run_pending_tasks()
 
+    @property
+    def _java_agent_path(self) -> Path:
+        raise NotImplementedError
 
+    @property
+    def _classpath(self) -> tuple[Path, ...]:
+        return ()
 
-class StructurizrCliForStandaloneVersion(StructurizrWorkspaceExporter):
-    _OUTPUT_DIR: Final = "output"
+
+class StructurizrCliForLiteVersion(_StructurizrCliBase):
+    _LOG_PREFIX: Final = "StructurizrCliForLite"
 
     def __init__(
         self,
         structurizr_cli_dir: Path,
+        work_dir: Path,
         java_path: Path,
         syntax_plugin_path: Path,
+        jweaver_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
+        self.__syntax_plugin_path = syntax_plugin_path
+        self.__jweaver_path = jweaver_path
+
+        super().__init__(
+            structurizr_cli_dir=structurizr_cli_dir,
+            work_dir=work_dir,
+            java_path=java_path,
+            log=log,
+            java_options=java_options,
+            class_data_archive=class_data_archive,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
+        )
+
+    @property
+    def _java_agent_path(self) -> Path:
+        return self.__jweaver_path
+
+    @property
+    def _classpath(self) -> tuple[Path, ...]:
+        return (self.__syntax_plugin_path.absolute(),)
+
+
+class StructurizrCliForStandaloneVersion(_StructurizrCliBase):
+    _LOG_PREFIX: Final = "StructurizrCliForStandalone"
+
+    def __init__(
+        self,
+        structurizr_cli_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        syntax_plugin_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
     ):
-        self.__structurizr_cli_dir = structurizr_cli_dir
-        self.__java_path = java_path
         self.__syntax_plugin_path = syntax_plugin_path
 
-    def export_to_json(self, workspace_path: Path) -> ExportResult:
-        return _run_export_command(
-            structurizr_cli_dir=self.__structurizr_cli_dir,
-            workspace_path=workspace_path,
-            output_dir=(self.__structurizr_cli_dir / self._OUTPUT_DIR).absolute(),
-            env={
-                "PATH": f"{os.environ['PATH']}:{self.__java_path.absolute()}",
-                "JAVA_TOOL_OPTIONS": f"-javaagent:{self.__syntax_plugin_path.absolute()}",
-            },
+        super().__init__(
+            structurizr_cli_dir=structurizr_cli_dir,
+            work_dir=work_dir,
+            java_path=java_path,
+            log=log,
+            java_options=java_options,
+            class_data_archive=class_data_archive,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
         )
 
-    def close(self) -> None:
-        pass
+    @property
+    def _java_agent_path(self) -> Path:
+        return self.__syntax_plugin_path
@@ -0,0 +1,344 @@
+import base64
+import logging
+from pathlib import Path
+import re
+import socket
+import subprocess
+import time
+from typing import ClassVar, Final, Iterable, Iterator, Sequence
+
+from ._interface import ExportResult
+from ._interface import ExportFailure
+from ._interface import StructurizrWorkspaceExporter
+from ._interface import with_resource_usage
+from ._structurizr_cli import _get_export_arguments
+from ._structurizr_cli import _get_java_command
+from ._structurizr_cli import _read_exported_workspace
+import _flight_recording
+import _jvm_profiles
+import _logging_tools
+import _output_capture
+import _prepared_environments
+import _process_tree
+
+
+_JDK_RELEASE_FILE: Final = "release"
+_JAVA_VERSION_PATTERN: Final = re.compile(r'^JAVA_VERSION="(\d+)', flags=re.MULTILINE)
+# Security manager has to be allowed explicitly since JDK 18, and can't be enabled since JDK 24
+_ALLOW_SECURITY_MANAGER_JAVA_VERSIONS: Final = range(18, 24)
+_ALLOW_SECURITY_MANAGER_OPTION: Final = "-Djava.security.manager=allow"
+_FAILURE_EXIT_CODE: Final = 1
+
+
+def _get_java_feature_version(java_path: Path) -> int | None:
+    try:
+        release = (java_path.absolute().parent / _JDK_RELEASE_FILE).read_text()
+    except OSError:
+        return None
+
+    if (match := _JAVA_VERSION_PATTERN.search(release)) is None:
+        return None
+
+    return int(match.group(1))
+
+
+class StructurizrCliDaemonError(Exception):
+    def __init__(self, message: str, stdout: str, stderr: str) -> None:
+        self.message = message
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def __str__(self) -> str:
+        return f"Structurizr CLI daemon error: {self.message}\nStdout:\n{self.stdout}\nStderr:\n{self.stderr}"
+
+
+class _StructurizrCliDaemonBase(StructurizrWorkspaceExporter):
+    # Where the daemon can't trap exit of the command, it exits together with the command
+    # and is started again before the next export
+    _DAEMON_SOURCE_PATH: Final = Path(__file__).parent / "daemon" / "ExportDaemon.java"
+    _HOST: Final = "127.0.0.1"
+    _SHUTDOWN_REQUEST: Final = "SHUTDOWN"
+
+    _OUTPUT_DIR: Final = "output"
+    _PORT_FILE_NAME: Final = "daemon.port"
+
+    _LOG_PREFIX: ClassVar[str] = "StructurizrCliDaemon"
+
+    def __init__(
+        self,
+        structurizr_cli_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+        start_timeout: float = 60.0,
+    ):
+        self.__structurizr_cli_dir = structurizr_cli_dir
+        self.__work_dir = work_dir
+        self.__java_path = java_path
+        self.__java_options = tuple(java_options)
+        self.__flight_recorder = flight_recorder
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__log_output = log_output
+        self.__start_timeout = start_timeout
+
+        self.__output_dir = (self.__work_dir / self._OUTPUT_DIR).absolute()
+        self.__port_file = self.__work_dir / self._PORT_FILE_NAME
+
+        self.__process, self.__stdout_capture, self.__stderr_capture = self.__start_daemon()
+        self.__port = self.__wait_for_port()
+
+    def export_to_json(self, workspace_path: Path) -> ExportResult:
+        return next(self.export_many([workspace_path]))
+
+    def export_many(self, workspace_paths: Iterable[Path]) -> Iterator[ExportResult]:
+        for workspace_path in workspace_paths:
+            if self.__process.poll() is not None:
+                self.__restart_daemon()
+
+            with (
+                _logging_tools.log_action(self.__log, f"Export workspace '{workspace_path}'"),
+                _flight_recording.attach(self.__flight_recorder, self.__process.pid, workspace_path.stem),
+                _process_tree.ProcessResourceMeter(self.__process.pid) as resource_meter,
+            ):
+                stderr_position = self.__stderr_capture.position
+                response = self.__send_request(
+                    "\t".join(("export", *_get_export_arguments(workspace_path, self.__output_dir)))
+                )
+
+            if response is None:
+                result = self.__get_exited_command_result(workspace_path, stderr_position)
+            else:
+                status, _, payload = response.partition(" ")
+
+                match status:
+                    case "OK":
+                        result = _read_exported_workspace(workspace_path, self.__output_dir)
+                    case "ERROR":
+                        result = ExportFailure(base64.b64decode(payload).decode("utf-8", errors="replace"))
+                    case "FATAL":
+                        raise self.__create_error(base64.b64decode(payload).decode("utf-8", errors="replace"))
+                    case _:
+                        raise self.__create_error(f"Unexpected daemon response: {response}")
+
+            self.__log.debug(f"Resource usage of '{workspace_path.name}' export: {resource_meter.usage}")
+            yield with_resource_usage(result, resource_meter.usage)
+
+    def close(self) -> None:
+        with _logging_tools.log_action(self.__log, "Close"):
+            # Recordings are dumped from the running daemon
+            _flight_recording.run_pending_tasks()
+            self.__stop_daemon()
+
+    def __stop_daemon(self) -> None:
+        if self.__process.poll() is None:
+            try:
+                self.__send_request(self._SHUTDOWN_REQUEST)
+                self.__process.wait(timeout=10.0)
+            except (OSError, subprocess.TimeoutExpired):
+                self.__process.kill()
+                self.__process.wait()
+
+        self.__stdout_capture.join()
+        self.__stderr_capture.join()
+
+    def __restart_daemon(self) -> None:
+        with _logging_tools.log_action(self.__log, "Restart daemon"):
+            self.__stop_daemon()
+            self.__process, self.__stdout_capture, self.__stderr_capture = self.__start_daemon()
+            self.__port = self.__wait_for_port()
+
+    def __get_exited_command_result(self, workspace_path: Path, stderr_position: int) -> ExportResult:
+        # JVM without security manager exits together with the command, like the CLI process does
+        try:
+            exit_code = self.__process.wait(timeout=10.0)
+        except subprocess.TimeoutExpired:
+            raise self.__create_error("Daemon closed connection without response") from None
+
+        self.__stdout_capture.join()
+        self.__stderr_capture.join()
+
+        if exit_code == 0:
+            return _read_exported_workspace(workspace_path, self.__output_dir)
+
+        if exit_code == _FAILURE_EXIT_CODE:
+            return ExportFailure(self.__stderr_capture.get_text(since=stderr_position))
+
+        raise self.__create_error(f"Daemon exited with code {exit_code} during export")
+
+    def __start_daemon(self) -> tuple[subprocess.Popen, _output_capture.OutputCapture, _output_capture.OutputCapture]:
+        with _logging_tools.log_action(self.__log, "Start daemon"):
+            self.__work_dir.mkdir(parents=True, exist_ok=True)
+            self.__port_file.unlink(missing_ok=True)
+
+            if (java_agent_path := self._java_agent_path) is not None:
+                java_agent_part = [f"-javaagent:{java_agent_path.absolute()}"]
+            else:
+                java_agent_part = []
+
+            if _get_java_feature_version(self.__java_path) in _ALLOW_SECURITY_MANAGER_JAVA_VERSIONS:
+                security_manager_part = [_ALLOW_SECURITY_MANAGER_OPTION]
+            else:
+                security_manager_part = []
+
+            launch = _prepared_environments.get_structurizr_cli_launch(self.__structurizr_cli_dir)
+
+            command = [
+                *_get_java_command(
+                    self.__java_path,
+                    self.__structurizr_cli_dir,
+                    launch,
+                    str(self._DAEMON_SOURCE_PATH),
+                    java_options=[
+                        *java_agent_part,
+                        *security_manager_part,
+                        *self.__java_options,
+                        *_flight_recording.get_server_java_options(self.__flight_recorder),
+                    ],
+                    classpath=self._classpath,
+                ),
+                str(self.__port_file.absolute()),
+                launch.main_class,
+            ]
+
+            self.__log.debug(f"Command: {command}")
+
+            process = subprocess.Popen(
+                command,
+                cwd=self.__work_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=_jvm_profiles.get_java_environment(),
+            )
+
+            output_log = self.__log if self.__log_output else None
+
+            return (
+                process,
+                _output_capture.start(process.stdout, "stdout", log=output_log),
+                _output_capture.start(process.stderr, "stderr", log=output_log),
+            )
+
+    def __wait_for_port(self, delay: float = 0.1) -> int:
+        timeout = self.__start_timeout
+        start_time = time.time()
+
+        with _logging_tools.log_action(self.__log, "Wait for daemon port"):
+            while not self.__port_file.exists():
+                if self.__process.poll() is not None:
+                    raise self.__create_error(f"Daemon exited with code {self.__process.returncode}")
+
+                if time.time() - start_time >= timeout:
+                    self.__process.kill()
+                    self.__process.wait()
+                    raise self.__create_error("Daemon start timeout reached")
+
+                time.sleep(delay)
+
+            return int(self.__port_file.read_text())
+
+    def __send_request(self, request: str) -> str | None:
+        with socket.create_connection((self._HOST, self.__port)) as connection:
+            with connection.makefile("rwb") as stream:
+                stream.write(f"{request}\n".encode("utf-8"))
+                stream.flush()
+
+                try:
+                    response = stream.readline().decode("utf-8").rstrip("\n")
+                except ConnectionResetError:
+                    return None
+
+        return response or None
+
+    def __create_error(self, message: str) -> StructurizrCliDaemonError:
+        # Output of the exited daemon is read till the end, so its last lines are not missed
+        if self.__process.poll() is not None:
+            self.__stdout_capture.join()
+            self.__stderr_capture.join()
+
+        return StructurizrCliDaemonError(
+            message=message,
+            stdout=self.__stdout_capture.get_text(),
+            stderr=self.__stderr_capture.get_text(),
+        )
+
+    @property
+    def _java_agent_path(self) -> Path | None:
+        return None
+
+    @property
+    def _classpath(self) -> tuple[Path, ...]:
+        return ()
+
+
+class StructurizrCliDaemonForLiteVersion(_StructurizrCliDaemonBase):
+    _LOG_PREFIX: Final = "StructurizrCliDaemonForLite"
+
+    def __init__(
+        self,
+        structurizr_cli_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        syntax_plugin_path: Path,
+        jweaver_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
+        self.__syntax_plugin_path = syntax_plugin_path
+        self.__jweaver_path = jweaver_path
+
+        super().__init__(
+            structurizr_cli_dir=structurizr_cli_dir,
+            work_dir=work_dir,
+            java_path=java_path,
+            log=log,
+            java_options=java_options,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
+        )
+
+    @property
+    def _java_agent_path(self) -> Path:
+        return self.__jweaver_path
+
+    @property
+    def _classpath(self) -> tuple[Path, ...]:
+        return (self.__syntax_plugin_path.absolute(),)
+
+
+class StructurizrCliDaemonForStandaloneVersion(_StructurizrCliDaemonBase):
+    _LOG_PREFIX: Final = "StructurizrCliDaemonForStandalone"
+
+    def __init__(
+        self,
+        structurizr_cli_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        syntax_plugin_path: Path,
+        log: logging.Logger,
+        *,
+        java_options: Sequence[str] = (),
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
+        self.__syntax_plugin_path = syntax_plugin_path
+
+        super().__init__(
+            structurizr_cli_dir=structurizr_cli_dir,
+            work_dir=work_dir,
+            java_path=java_path,
+            log=log,
+            java_options=java_options,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
+        )
+
+    @property
+    def _java_agent_path(self) -> Path:
+        return self.__syntax_plugin_path
@@ -1,18 +1,18 @@
 import base64
 import contextlib
-import copy
 from dataclasses import dataclass
 import hashlib
 import hmac
-import io
 import json
 import logging
 import re
 import shutil
+import socket
 import subprocess
 import sys
+import threading
 import time
-from typing import Any, ClassVar, Final, Iterator
+from typing import Any, ClassVar, Final, Iterable, Iterator, Sequence
 import urllib.parse
 
 import requests
@@ -21,8 +21,15 @@ from ._interface import StructurizrWorkspaceExporter
 from ._interface import ExportResult
 from ._interface import ExportedWorkspace
 from ._interface import ExportFailure
+from ._interface import with_resource_usage
+import _class_data_sharing
+import _flight_recording
+import _jvm_profiles
 import _logging_tools
-import os
+import _output_capture
+import _prepared_environments
+import _process_tree
+import _workspace_diff
 
 from pathlib import Path
 
@@ -32,6 +39,11 @@ class _ConnectionTimeout(Exception):
         super().__init__("Connection to the structurizr lite server timeout reached")
 
 
+class _ServerExited(Exception):
+    def __init__(self, exit_code: int):
+        super().__init__(f"Structurizr lite server unexpectedly exited with code {exit_code}")
+        self.exit_code = exit_code
+
 
 class _StructurizrLiteError(Exception):
     def __init__(self, source_error: Exception, stdout: str, stderr: str) -> None:
@@ -55,63 +67,215 @@ class _AuthData:
     nonce: str
 
 
+class _StructurizrLiteApiClient:
+    _STRUCTURIZR_API_CLIENT_CALL_PATTERN: Final = re.compile(
+        r"StructurizrApiClient\((.+)\)",
+        flags=re.DOTALL,
+    )
+    _AUTH_FAILURE_STATUS_CODES: Final = frozenset((401, 403))
+
+    def __init__(self, server_address: str, log: logging.Logger) -> None:
+        self.__server_address = server_address
+        self.__log = log
+        self.__session = requests.Session()
+        self.__credentials: _Credentials | None = None
+
+    def check_health(self, timeout: float) -> None:
+        response = self.__session.get(self.__get_url("/health"), timeout=timeout)
+        response.raise_for_status()
+
+    def get_workspace(self, workspace_id: int = 1) -> dict[str, Any]:
+        response = self.__request_workspace(self.__get_credentials(), workspace_id)
+
+        if response.status_code in self._AUTH_FAILURE_STATUS_CODES:
+            self.__log.debug(f"Authentication failed with status {response.status_code}, refresh credentials")
+            self.__credentials = None
+            response = self.__request_workspace(self.__get_credentials(), workspace_id)
+
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        self.__session.close()
+
+    def __get_url(self, path: str) -> str:
+        return urllib.parse.urljoin(self.__server_address, path)
+
+    def __get_credentials(self) -> _Credentials:
+        if self.__credentials is None:
+            with _logging_tools.log_action(self.__log, "Get credentials"):
+                self.__credentials = self.__scrape_credentials()
+
+        return self.__credentials
+
+    def __scrape_credentials(self) -> _Credentials:
+        response = self.__session.get(self.__get_url("/workspace/diagrams"))
+        response.raise_for_status()
+
+        page_html_content = response.content.decode()
+        match = self._STRUCTURIZR_API_CLIENT_CALL_PATTERN.search(page_html_content)
+
+        if match is None:
+            raise RuntimeError("Unexpectedly, structurizr client's api call was not found")
+
+        match_group = match.group(1)
+        args = (line.strip().rstrip(',') for line in match_group.splitlines())
+        args = tuple(line for line in args if line.strip())
+
+        return _Credentials(
+            api_key=args[2].strip('"'),
+            api_secret=args[3].strip('"'),
+        )
+
+    def __request_workspace(self, credentials: _Credentials, workspace_id: int) -> requests.Response:
+        auth_data = self.__get_auth_data(
+            api_key=credentials.api_key,
+            api_secret=credentials.api_secret,
+            workspace_id=workspace_id,
+        )
+
+        return self.__session.get(
+            self.__get_url(f"/api/workspace/{workspace_id}"),
+            headers={
+                "X-Authorization": auth_data.auth_token,
+                "Nonce": auth_data.nonce,
+            },
+        )
+
+    @staticmethod
+    def __get_auth_data(api_key: str, api_secret: str, workspace_id: int) -> _AuthData:
+        nonce = str(int(time.time() * 1_000))
+        content_md5 = hashlib.md5(b"").hexdigest()
+
+        content_parts = ("GET", f"/api/workspace/{workspace_id}", content_md5, "", nonce)
+        content = "".join(f"{el}\n" for el in content_parts)
+
+        signature = hmac.new(
+            key=api_secret.encode("utf-8"),
+            msg=content.encode("utf-8"),
+            digestmod=hashlib.sha256,
+        ).hexdigest()
+
+        signature_encoded = base64.b64encode(signature.encode()).decode("utf-8")
+        auth_token = f"{api_key}:{signature_encoded}"
+
+        return _AuthData(
+            auth_token=auth_token,
+            nonce=nonce,
+        )
+
+
 class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
     _STRUCTURIZR_LITE_FILENAME: Final = "structurizr-lite.war"
     _CONTEXT_FOLDER_NAME: Final = "context"
     _WORKSPACE_FOLDER_NAME: Final = "workspace"
     _JAVA_EXECUTABLE: Final = "java.exe" if sys.platform == "win32" else "java"
 
-    _SERVER_ADDRESS: Final = "http://localhost:8080"
+    _SERVER_HOST: Final = "localhost"
     _WORKSPACE_DEFAULT_FILE_NAME: Final = "workspace.dsl"
 
-    _STRUCTURIZR_API_CLIENT_CALL_PATTERN: Final = re.compile(
-        r"StructurizrApiClient\((.+)\)",
-        flags=re.DOTALL,
-    )
+    _SERVER_STARTED_PATTERN: Final = re.compile(rb"Started \S+ in [\d.]+ seconds")
+    _SERVER_STOP_TIMEOUT: Final = 30.0
 
     _LOG_PREFIX: ClassVar[str] = "StructurizrLite"
 
-    def __init__(self, structurizr_lite_dir: Path, java_path: Path, stdout_path: Path, stderr_path: Path, log: logging.Logger):
+    def __init__(
+        self,
+        structurizr_lite_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        log: logging.Logger,
+        *,
+        staging_mode: _prepared_environments.FileSyncMode = _prepared_environments.FileSyncMode.COPY,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
         self.__structurizr_lite_dir = structurizr_lite_dir
         self.__java_path = java_path
+        self.__staging_mode = staging_mode
+        self.__java_options = tuple(java_options)
+        self.__class_data_archive = class_data_archive
+        self.__flight_recorder = flight_recorder
+        self.__class_data_launch_context = contextlib.ExitStack()
         self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
 
         self.__structurizr_lite_jar = self.__get_structurizr_lite_jar_path(self.__structurizr_lite_dir)
-        self.__context_dir = self.__get_context_directory(self.__structurizr_lite_dir)
+        self.__context_dir = self.__get_context_directory(work_dir)
         self.__workspace_dir = self.__get_workspace_directory(self.__context_dir)
 
-        self.__server_process, self.__stdout, self.__stderr = self.__start_server(stdout_path, stderr_path)
+        self.__server_port = self.__find_free_port()
+        self.__server_address = f"http://{self._SERVER_HOST}:{self.__server_port}"
+        self.__api_client = _StructurizrLiteApiClient(self.__server_address, self.__log)
+
+        self.__server_process, self.__stdout_capture, self.__stderr_capture = self.__start_server(log_output)
 
     def export_to_json(self, workspace_path: Path) -> ExportResult:
-        if self.__workspace_dir.exists():
-            shutil.rmtree(self.__workspace_dir)
+        return next(self.export_many([workspace_path]))
+
+    def export_many(self, workspace_paths: Iterable[Path]) -> Iterator[ExportResult]:
+        for workspace_path in workspace_paths:
+            with (
+                _flight_recording.attach(self.__flight_recorder, self.__server_process.pid, workspace_path.stem),
+                _process_tree.ProcessResourceMeter(self.__server_process.pid) as resource_meter,
+            ):
+                self.__stage_workspace(workspace_path)
+                result = self.__export_staged_workspace()
+
+            self.__log.debug(f"Resource usage of '{workspace_path.name}' export: {resource_meter.usage}")
+            yield with_resource_usage(result, resource_meter.usage)
+
+    def close(self) -> None:
+        with _logging_tools.log_action(self.__log, "Close"):
+            # Recordings are dumped from the running server
+            _flight_recording.run_pending_tasks()
+            self.__api_client.close()
+            self.__stop_server()
+            self.__stdout_capture.join()
+            self.__stderr_capture.join()
+            self.__class_data_launch_context.close()
+
+            if self.__context_dir.exists():
+                shutil.rmtree(self.__context_dir)
 
-        shutil.copytree(workspace_path.parent, self.__workspace_dir, dirs_exist_ok=True)
-        shutil.copyfile(workspace_path, self.__workspace_dir / self._WORKSPACE_DEFAULT_FILE_NAME)
+    def __stop_server(self) -> None:
+        if not self.__class_data_launch.recording:
+            self.__server_process.kill()
+            self.__server_process.wait()
+            return
+
+        # Class data archive is recorded at exit of JVM, which doesn't happen when it is killed
+        self.__server_process.terminate()
+
+        try:
+            self.__server_process.wait(timeout=self._SERVER_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.__server_process.kill()
+            self.__server_process.wait()
 
-        with _logging_tools.log_action(self.__log, "Get credentials"):
-            credentials = self.__get_credentials()
+    def __stage_workspace(self, workspace_path: Path) -> None:
+        with _logging_tools.log_action(self.__log, f"Stage workspace '{workspace_path}'"):
+            _prepared_environments.sync_tree(
+                workspace_path.parent,
+                self.__workspace_dir,
+                mode=self.__staging_mode,
+                exclude=(self._WORKSPACE_DEFAULT_FILE_NAME,),
+            )
+            _prepared_environments.install_file(workspace_path, self.__workspace_dir / self._WORKSPACE_DEFAULT_FILE_NAME)
 
+    def __export_staged_workspace(self) -> ExportResult:
         try:
             with _logging_tools.log_action(self.__log, "Get workspace"):
-                return self.__get_workspace(credentials)
+                workspace = self.__api_client.get_workspace()
+                _workspace_diff.normalize_workspace(workspace)
+                return ExportedWorkspace(workspace)
         except requests.HTTPError as e:
             if e.response.status_code == 400:
                 return ExportFailure(e.response.content.decode("utf-8"))
 
             raise e
 
-    def close(self) -> None:
-        with _logging_tools.log_action(self.__log, "Close"):
-            self.__server_process.kill()
-            self.__server_process.wait()
-
-            if self.__context_dir.exists():
-                shutil.rmtree(self.__context_dir)
-
-            self.__stdout.close()
-            self.__stderr.close()
-
     @classmethod
     def __get_structurizr_lite_jar_path(cls, structurizr_lite_dir: Path) -> Path:
         structurizr_lite_jar = structurizr_lite_dir / cls._STRUCTURIZR_LITE_FILENAME
@@ -119,8 +283,8 @@ class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
             raise FileNotFoundError(f"Structurizr Lite JAR not found at {structurizr_lite_jar}")
         return structurizr_lite_jar
 
-    def __get_context_directory(self, structurizr_lite_dir: Path) -> Path:
-        context_dir = structurizr_lite_dir / self._CONTEXT_FOLDER_NAME
+    def __get_context_directory(self, work_dir: Path) -> Path:
+        context_dir = work_dir / self._CONTEXT_FOLDER_NAME
         if context_dir.exists():
             shutil.rmtree(context_dir)
         return context_dir
@@ -130,55 +294,91 @@ class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
         workspace_dir.mkdir(parents=True)
         return workspace_dir
 
-    def __start_server(self, stdout_path: Path, stderr_path: Path) -> tuple[subprocess.Popen, io.BufferedWriter, io.BufferedWriter]:
+    @classmethod
+    def __find_free_port(cls) -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((cls._SERVER_HOST, 0))
+            return sock.getsockname()[1]
+
+    def __start_server(self, log_output: bool) -> tuple[subprocess.Popen, _output_capture.OutputCapture, _output_capture.OutputCapture]:
         with _logging_tools.log_action(self.__log, "Start Structurizr Lite servier"):
             if (java_agent_path := self._java_agent_path) is not None:
                 java_agent_part = [f"-javaagent:{java_agent_path.absolute()}"]
             else:
                 java_agent_part = []
 
+            self.__class_data_launch = self.__class_data_launch_context.enter_context(
+                _class_data_sharing.launch(self.__class_data_archive, verbose=log_output)
+            )
+
             command = [
                 str((self.__java_path / self._JAVA_EXECUTABLE).absolute()),
                 *java_agent_part,
+                *self.__java_options,
+                *self.__class_data_launch.java_options,
+                *_flight_recording.get_server_java_options(self.__flight_recorder),
                 "-jar",
                 str(self.__structurizr_lite_jar),
                 str(self.__context_dir),
             ]
 
-            env = os.environ.copy()
-            env["STRUCTURIZR_WORKSPACE_PATH"] = self._WORKSPACE_FOLDER_NAME
-
-            stdout = stdout_path.open('wb')
-            stderr = stderr_path.open('wb')
+            env = _jvm_profiles.get_java_environment({
+                "STRUCTURIZR_WORKSPACE_PATH": self._WORKSPACE_FOLDER_NAME,
+                "SERVER_PORT": str(self.__server_port),
+            })
 
             self.__log.debug(f"Command: {command}")
+            self.__log.debug(f"Server address: {self.__server_address}")
             process = subprocess.Popen(
                 command,
-                stdout=stdout,
-                stderr=stderr,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 env=env,
             )
 
+            # Server reports its start in stdout, so the health check doesn't wait for the next poll
+            started = threading.Event()
+
+            def _watch_started(line: bytes) -> None:
+                if not started.is_set() and self._SERVER_STARTED_PATTERN.search(line):
+                    started.set()
+
+            output_log = self.__log if log_output else None
+            stdout_capture = _output_capture.start(process.stdout, "stdout", log=output_log, line_handler=_watch_started)
+            stderr_capture = _output_capture.start(process.stderr, "stderr", log=output_log)
+
             try:
-                self.__wait_for_connection(timeout=30.0)
-            except _ConnectionTimeout as e:
+                self.__wait_for_connection(process, started, timeout=30.0)
+            except (_ConnectionTimeout, _ServerExited) as e:
                 process.kill()
                 process.wait()
-                stdout.close()
-                stderr.close()
+                stdout_capture.join()
+                stderr_capture.join()
+                self.__class_data_launch_context.close()
                 raise _StructurizrLiteError(
                     source_error=e,
-                    stdout=stdout_path.read_text() if stdout_path.exists() else "",
-                    stderr=stderr_path.read_text() if stderr_path.exists() else "",
+                    stdout=stdout_capture.get_text(),
+                    stderr=stderr_capture.get_text(),
                 )
 
-            return process, stdout, stderr
+            return process, stdout_capture, stderr_capture
 
-    def __wait_for_connection(self, timeout: float = 60.0, delay: float = 5.0) -> None:
+    def __wait_for_connection(
+        self,
+        process: subprocess.Popen,
+        started: threading.Event,
+        timeout: float = 60.0,
+        min_delay: float = 0.05,
+        max_delay: float = 1.0,
+    ) -> None:
         start_time = time.time()
+        delay = min_delay
 
         with _logging_tools.log_action(self.__log, "Wait for success connection to server"):
             while True:
+                if (exit_code := process.poll()) is not None:
+                    raise _ServerExited(exit_code)
+
                 try:
                     self.__log.debug("Try health check server ...")
 
@@ -186,12 +386,7 @@ class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
                     if request_timeout <= 0.0:
                         raise _ConnectionTimeout()
 
-                    response = requests.get(
-                        urllib.parse.urljoin(self._SERVER_ADDRESS, "/health"),
-                        timeout=request_timeout,
-                    )
-                    response.raise_for_status()
-
+                    self.__api_client.check_health(timeout=min(request_timeout, max_delay))
                     return
 
                 except (ConnectionError, OSError) as e:
@@ -201,77 +396,11 @@ class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
                     if elapsed_time >= timeout:
                         raise _ConnectionTimeout() from e
 
-                    time.sleep(delay)
-
-    def __get_credentials(self) -> _Credentials:
-        response = requests.get("http://localhost:8080/workspace/diagrams")
-        response.raise_for_status()
-
-        page_html_content = response.content.decode()
-        match = self._STRUCTURIZR_API_CLIENT_CALL_PATTERN.search(page_html_content)
-
-        if match is None:
-            raise RuntimeError("Unexpectedly, structurizr client's api call was not found")
-
-        match_group = match.group(1)
-        args = (line.strip().rstrip(',') for line in match_group.splitlines())
-        args = tuple(line for line in args if line.strip())
-
-        return _Credentials(
-            api_key=args[2].strip('"'),
-            api_secret=args[3].strip('"'),
-        )
-
-    def __get_workspace(self, credentials: _Credentials) -> ExportedWorkspace:
-        auth_data = self.__get_auth_data(
-            api_key=credentials.api_key,
-            api_secret=credentials.api_secret,
-            workspace_id=1,
-        )
-
-        response = requests.get(
-            "http://localhost:8080/api/workspace/1",
-            headers={
-                "X-Authorization": auth_data.auth_token,
-                "Nonce": auth_data.nonce,
-            },
-        )
-
-        response.raise_for_status()
-        return self.__normalize_workspace(response.json())
-
-
-    def __get_auth_data(self, api_key: str, api_secret: str, workspace_id: int) -> _AuthData:
-        nonce = str(int(time.time() * 1_000))
-        content_md5 = hashlib.md5(b"").hexdigest()
-
-        content_parts = ("GET", f"/api/workspace/{workspace_id}", content_md5, "", nonce)
-        content = "".join(f"{el}\n" for el in content_parts)
-
-        signature = hmac.new(
-            key=api_secret.encode("utf-8"),
-            msg=content.encode("utf-8"),
-            digestmod=hashlib.sha256,
-        ).hexdigest()
-
-        signature_encoded = base64.b64encode(signature.encode()).decode("utf-8")
-        auth_token = f"{api_key}:{signature_encoded}"
-
-        return _AuthData(
-            auth_token=auth_token,
-            nonce=nonce,
-        )
-
-    def __normalize_workspace(self, workspace: dict[str, Any]) -> dict[str, Any]:
-        normalized_workspace = copy.deepcopy(workspace)
-        normalized_workspace.pop("lastModifiedDate", None)
-        normalized_workspace["id"] = 0
-
-        views = normalized_workspace.get("views", {})
-        views_config = views.get("configuration", {})
-        views_config.pop("lastSavedView", None)
-
-        return normalized_workspace
+                    if started.is_set():
+                        time.sleep(min_delay)
+                    else:
+                        started.wait(delay)
+                        delay = min(delay * 2.0, max_delay)
 
     @property
     def _java_agent_path(self) -> Path | None:
@@ -280,60 +409,37 @@ class _StructurizrLiteExporterBase(StructurizrWorkspaceExporter):
 
 class StructurizrLiteForLiteVersion(_StructurizrLiteExporterBase):
     _LOG_PREFIX: Final = "StructurizrLiteForLite"
-    _PATCH_DIR_NAME: Final = "patch"
 
-    def __init__(self, structurizr_lite_dir: Path, java_path: Path, syntax_plugin_path: Path, stdout_path: Path, stderr_path: Path, log: logging.Logger, jweaver_path: Path):
-        self.__add_plugin_in_structurizr_lite(structurizr_lite_dir, syntax_plugin_path)
+    def __init__(
+        self,
+        structurizr_lite_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        syntax_plugin_path: Path,
+        log: logging.Logger,
+        jweaver_path: Path,
+        *,
+        staging_mode: _prepared_environments.FileSyncMode = _prepared_environments.FileSyncMode.COPY,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
+        # Syntax plugin is already in the war archive of the prepared environment
         self.__jweaver_path = jweaver_path
 
         super().__init__(
             structurizr_lite_dir=structurizr_lite_dir,
+            work_dir=work_dir,
             java_path=java_path,
-            stdout_path=stdout_path,
-            stderr_path=stderr_path,
             log=log,
+            staging_mode=staging_mode,
+            java_options=java_options,
+            class_data_archive=class_data_archive,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
         )
 
-    @classmethod
-    def __add_plugin_in_structurizr_lite(cls, structurizr_lite_dir: Path, syntax_plugin_path: Path) -> None:
-        with cls.__get_patch_dir(structurizr_lite_dir) as patch_dir:
-            dest_dir = patch_dir / "WEB-INF" / "lib" / syntax_plugin_path.name
-            dest_dir.parent.mkdir(parents=True)
-
-            shutil.copy(syntax_plugin_path, dest_dir)
-
-            subprocess.run(
-                [
-                    cls.__get_jar_executable(),
-                    "-uf0",
-                    structurizr_lite_dir / cls._STRUCTURIZR_LITE_FILENAME,
-                    "-C",
-                    patch_dir,
-                    dest_dir.relative_to(patch_dir),
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-            )
-
-    @classmethod
-    @contextlib.contextmanager
-    def __get_patch_dir(cls, structurizr_lite_dir: Path) -> Iterator[Path]:
-        patch_dir = structurizr_lite_dir / cls._PATCH_DIR_NAME
-        patch_dir.mkdir()
-
-        try:
-            yield patch_dir
-        finally:
-            shutil.rmtree(patch_dir)
-
-    @classmethod
-    def __get_jar_executable(self) -> Path:
-        jar_executable_path = shutil.which('jar')
-        if jar_executable_path is None:
-            raise RuntimeError("Cannot find utility 'jar' in current environment")
-        return Path(jar_executable_path)
-
     @property
     def _java_agent_path(self) -> Path:
         return self.__jweaver_path
@@ -342,15 +448,32 @@ class StructurizrLiteForLiteVersion(_StructurizrLiteExporterBase):
 class StructurizrLiteForStandaloneVersion(_StructurizrLiteExporterBase):
     _LOG_PREFIX: Final = "StructurizrLiteForStandalone"
 
-    def __init__(self, structurizr_lite_dir: Path, java_path: Path, syntax_plugin_path: Path, stdout_path: Path, stderr_path: Path, log: logging.Logger):
+    def __init__(
+        self,
+        structurizr_lite_dir: Path,
+        work_dir: Path,
+        java_path: Path,
+        syntax_plugin_path: Path,
+        log: logging.Logger,
+        *,
+        staging_mode: _prepared_environments.FileSyncMode = _prepared_environments.FileSyncMode.COPY,
+        java_options: Sequence[str] = (),
+        class_data_archive: _class_data_sharing.ClassDataArchive | None = None,
+        flight_recorder: _flight_recording.FlightRecorder | None = None,
+        log_output: bool = False,
+    ):
         self.__syntax_plugin_path = syntax_plugin_path
 
         super().__init__(
             structurizr_lite_dir=structurizr_lite_dir,
+            work_dir=work_dir,
             java_path=java_path,
-            stdout_path=stdout_path,
-            stderr_path=stderr_path,
             log=log,
+            staging_mode=staging_mode,
+            java_options=java_options,
+            class_data_archive=class_data_archive,
+            flight_recorder=flight_recorder,
+            log_output=log_output,
         )
 
     @property
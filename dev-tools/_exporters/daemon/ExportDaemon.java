@@ -0,0 +1,254 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.OutputStreamWriter;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.io.StringWriter;
+import java.io.Writer;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.StandardCopyOption;
+import java.security.Permission;
+import java.util.Base64;
+
+/**
+ * Long-lived exporter process, which keeps classes loaded (and woven by java agents) between
+ * exports. Runs Structurizr CLI commands received over a local socket, the same way as the
+ * CLI process does: {@code main} of the CLI application is called with the command arguments.
+ *
+ * <p>
+ * Usage: {@code java -cp <structurizr cli classpath> ExportDaemon.java <port file> <main class>}
+ *
+ * <p>
+ * Protocol: one request per connection. Request is a single line with tab-separated command
+ * line arguments. Response is a single line: {@code OK} if command has succeeded,
+ * {@code ERROR <base64 stderr>} if it has failed (CLI process would exit with code 1),
+ * or {@code FATAL <base64 stderr>} if it has exited with another code or can't be run at all.
+ *
+ * <p>
+ * {@code System.exit} of a command is trapped by a security manager (it requires
+ * {@code -Djava.security.manager=allow} since JDK 18). Where security manager is not supported
+ * (JDK 24+), the daemon exits together with the command, and the client has to restart it.
+ */
+public class ExportDaemon {
+
+    private static final String SHUTDOWN_REQUEST = "SHUTDOWN";
+    private static final int FAILURE_EXIT_CODE = 1;
+
+    public static void main(String[] args) throws Exception {
+        Path portFile = Path.of(args[0]);
+        Class<?> mainClass = Class.forName(args[1]);
+
+        // Stream is replaced before the CLI classes are loaded, so their loggers write into it too
+        CommandErrorStream commandErrors = new CommandErrorStream(System.err);
+        System.setErr(new PrintStream(commandErrors, true, StandardCharsets.UTF_8));
+
+        ExitTrap exitTrap = ExitTrap.install();
+
+        try (ServerSocket server = new ServerSocket(0, 1, InetAddress.getLoopbackAddress())) {
+            publishPort(portFile, server.getLocalPort());
+
+            while (true) {
+                try (
+                    Socket client = server.accept();
+                    BufferedReader reader = new BufferedReader(
+                        new InputStreamReader(client.getInputStream(), StandardCharsets.UTF_8)
+                    );
+                    Writer writer = new OutputStreamWriter(client.getOutputStream(), StandardCharsets.UTF_8)
+                ) {
+                    String request = reader.readLine();
+                    if (request == null) {
+                        continue;
+                    }
+
+                    if (request.equals(SHUTDOWN_REQUEST)) {
+                        writer.write("OK\n");
+                        writer.flush();
+                        return;
+                    }
+
+                    writer.write(runCommand(mainClass, request.split("\t", -1), commandErrors, exitTrap) + "\n");
+                    writer.flush();
+                }
+            }
+        }
+    }
+
+    private static void publishPort(Path portFile, int port) throws Exception {
+        Path tempPortFile = portFile.resolveSibling(portFile.getFileName() + ".tmp");
+        Files.writeString(tempPortFile, Integer.toString(port));
+        Files.move(tempPortFile, portFile, StandardCopyOption.ATOMIC_MOVE);
+    }
+
+    private static String runCommand(Class<?> mainClass, String[] args, CommandErrorStream commandErrors, ExitTrap exitTrap) {
+        Method main;
+
+        try {
+            main = mainClass.getMethod("main", String[].class);
+        } catch (Throwable e) {
+            return "FATAL " + encode(getStackTrace(e));
+        }
+
+        commandErrors.startCommand();
+
+        if (exitTrap != null) {
+            exitTrap.startCommand();
+        }
+
+        int exitCode = 0;
+        Throwable invocationError = null;
+
+        try {
+            main.invoke(null, (Object) args);
+        } catch (InvocationTargetException e) {
+            // JVM reports uncaught exception the same way, and the process exits with code 1
+            if (!(e.getCause() instanceof ExitTrappedException)) {
+                System.err.print("Exception in thread \"main\" " + getStackTrace(e.getCause()));
+                exitCode = FAILURE_EXIT_CODE;
+            }
+        } catch (Throwable e) {
+            invocationError = e;
+        } finally {
+            // Command could catch the trap exception, so the first requested exit code is used
+            if (exitTrap != null && exitTrap.finishCommand() instanceof Integer trappedExitCode) {
+                exitCode = trappedExitCode;
+            }
+        }
+
+        System.err.flush();
+        String stderr = commandErrors.finishCommand();
+
+        if (invocationError != null) {
+            return "FATAL " + encode(stderr + getStackTrace(invocationError));
+        }
+
+        return switch (exitCode) {
+            case 0 -> "OK";
+            case FAILURE_EXIT_CODE -> "ERROR " + encode(stderr);
+            default -> "FATAL " + encode(stderr + "Command exited with code " + exitCode + "\n");
+        };
+    }
+
+    private static String getStackTrace(Throwable error) {
+        StringWriter stackTrace = new StringWriter();
+        error.printStackTrace(new PrintWriter(stackTrace));
+        return stackTrace.toString();
+    }
+
+    private static String encode(String text) {
+        return Base64.getEncoder().encodeToString(text.getBytes(StandardCharsets.UTF_8));
+    }
+
+    /**
+     * Passes everything to the daemon stderr, and keeps output of the running command.
+     */
+    private static final class CommandErrorStream extends OutputStream {
+
+        private final OutputStream target;
+        private ByteArrayOutputStream command;
+
+        CommandErrorStream(OutputStream target) {
+            this.target = target;
+        }
+
+        synchronized void startCommand() {
+            command = new ByteArrayOutputStream();
+        }
+
+        synchronized String finishCommand() {
+            String text = command.toString(StandardCharsets.UTF_8);
+            command = null;
+            return text;
+        }
+
+        @Override
+        public synchronized void write(int b) throws IOException {
+            target.write(b);
+
+            if (command != null) {
+                command.write(b);
+            }
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) throws IOException {
+            target.write(b, off, len);
+
+            if (command != null) {
+                command.write(b, off, len);
+            }
+        }
+
+        @Override
+        public synchronized void flush() throws IOException {
+            target.flush();
+        }
+    }
+
+    private static final class ExitTrappedException extends SecurityException {
+
+        ExitTrappedException(int exitCode) {
+            super("System.exit(" + exitCode + ") of the command is trapped by export daemon");
+        }
+    }
+
+    /**
+     * Turns {@code System.exit} of the running command into an exception, the rest is allowed.
+     */
+    @SuppressWarnings("removal")
+    private static final class ExitTrap extends SecurityManager {
+
+        private volatile boolean trapping;
+        private volatile Integer exitCode;
+
+        static ExitTrap install() {
+            ExitTrap exitTrap = new ExitTrap();
+
+            try {
+                System.setSecurityManager(exitTrap);
+                return exitTrap;
+            } catch (UnsupportedOperationException | SecurityException e) {
+                System.err.println("Exit of commands can't be trapped, daemon exits with them: " + e);
+                return null;
+            }
+        }
+
+        void startCommand() {
+            exitCode = null;
+            trapping = true;
+        }
+
+        Integer finishCommand() {
+            trapping = false;
+            return exitCode;
+        }
+
+        @Override
+        public void checkExit(int status) {
+            if (trapping) {
+                if (exitCode == null) {
+                    exitCode = status;
+                }
+
+                throw new ExitTrappedException(status);
+            }
+        }
+
+        @Override
+        public void checkPermission(Permission permission) {
+        }
+
+        @Override
+        public void checkPermission(Permission permission, Object context) {
+        }
+    }
+}
@@ -0,0 +1,30 @@
+import hashlib
+from pathlib import Path
+from typing import Final
+
+
+_HASH_CHUNK_SIZE: Final = 1024 * 1024
+
+# Files are hashed again only after their size or modification time changes
+_hashes: Final[dict[tuple[Path, int, int], str]] = {}
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+
+    with path.open("rb") as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_file_hash(path: Path) -> str:
+    path_stat = path.stat()
+    hash_key = (path.absolute(), path_stat.st_size, path_stat.st_mtime_ns)
+
+    if (file_hash := _hashes.get(hash_key)) is None:
+        file_hash = hash_file(path)
+        _hashes[hash_key] = file_hash
+
+    return file_hash
@@ -0,0 +1,305 @@
+import collections
+import contextlib
+import dataclasses
+from datetime import datetime, timezone
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import subprocess
+import sys
+from typing import Any, Callable, Final, Iterable, Iterator
+
+import _logging_tools
+
+
+PLUGIN_PACKAGE: Final = "io.github.nifacy.c4patterns"
+
+_SETTINGS: Final = "profile"
+_RECORDING_NAME: Final = "export"
+_RECORDING_SUFFIX: Final = ".jfr"
+_SUMMARY_SUFFIX: Final = ".json"
+_REPORT_SUFFIX: Final = ".txt"
+_EXECUTION_SAMPLE_EVENT: Final = "jdk.ExecutionSample"
+_ALLOCATION_SAMPLE_EVENT: Final = "jdk.ObjectAllocationSample"
+_TOP_ENTRIES: Final = 20
+_JCMD_TIMEOUT: Final = 30.0
+
+# Exporters are recreated during a run, so recording names are numbered per process, not per recorder
+_recording_numbers: Final = itertools.count()
+# Dumps and summaries of recordings, which are not done inside exports to keep them out of measured time
+_pending_tasks: Final[list[Callable[[], None]]] = []
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class MethodCost:
+    method: str
+    value: int
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RecordingSummary:
+    recording_path: Path
+    execution_samples: int
+    allocated_bytes: int
+    plugin_execution_samples: int
+    plugin_allocated_bytes: int
+    hot_methods: tuple[MethodCost, ...]
+    allocation_sites: tuple[MethodCost, ...]
+    plugin_hot_classes: tuple[MethodCost, ...]
+    plugin_allocation_classes: tuple[MethodCost, ...]
+
+    @property
+    def plugin_execution_share(self) -> float:
+        return self.plugin_execution_samples / self.execution_samples if self.execution_samples else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "recording": str(self.recording_path),
+            "execution_samples": self.execution_samples,
+            "allocated_bytes": self.allocated_bytes,
+            "plugin_execution_samples": self.plugin_execution_samples,
+            "plugin_allocated_bytes": self.plugin_allocated_bytes,
+            "hot_methods": [dataclasses.asdict(cost) for cost in self.hot_methods],
+            "allocation_sites": [dataclasses.asdict(cost) for cost in self.allocation_sites],
+            "plugin_hot_classes": [dataclasses.asdict(cost) for cost in self.plugin_hot_classes],
+            "plugin_allocation_classes": [dataclasses.asdict(cost) for cost in self.plugin_allocation_classes],
+        }
+
+    def format_text(self) -> str:
+        lines = [
+            f"Recording: {self.recording_path}",
+            f"Execution samples: {self.execution_samples}, in '{PLUGIN_PACKAGE}': {self.plugin_execution_samples} ({self.plugin_execution_share:.1%})",
+            f"Sampled allocations: {self.allocated_bytes} bytes, in '{PLUGIN_PACKAGE}': {self.plugin_allocated_bytes} bytes",
+        ]
+
+        for title, costs in (
+            ("Plugin classes by execution samples", self.plugin_hot_classes),
+            ("Plugin classes by allocated bytes", self.plugin_allocation_classes),
+            ("Hot methods by execution samples", self.hot_methods),
+            ("Allocation sites by allocated bytes", self.allocation_sites),
+        ):
+            lines.append("")
+            lines.append(f"{title}:")
+            lines.extend(f"\t{cost.value:>12}  {cost.method}" for cost in costs)
+
+        return "\n".join(lines) + "\n"
+
+
+def _get_frame_method(frame: dict[str, Any]) -> tuple[str, str]:
+    method = frame["method"]
+    # Class names may be printed in internal form depending on JDK version
+    return method["type"]["name"].replace("/", "."), method["name"]
+
+
+def _get_stack_frames(event_values: dict[str, Any]) -> list[tuple[str, str]]:
+    stack_trace = event_values.get("stackTrace") or {}
+    return [_get_frame_method(frame) for frame in stack_trace.get("frames") or ()]
+
+
+def _get_plugin_class(frames: Iterable[tuple[str, str]]) -> str | None:
+    return next((class_name for class_name, _ in frames if class_name.startswith(f"{PLUGIN_PACKAGE}.")), None)
+
+
+def _get_top(counter: collections.Counter[str]) -> tuple[MethodCost, ...]:
+    return tuple(MethodCost(method=method, value=value) for method, value in counter.most_common(_TOP_ENTRIES))
+
+
+def summarize_events(recording_path: Path, events: Iterable[dict[str, Any]]) -> RecordingSummary:
+    hot_methods: collections.Counter[str] = collections.Counter()
+    allocation_sites: collections.Counter[str] = collections.Counter()
+    plugin_hot_classes: collections.Counter[str] = collections.Counter()
+    plugin_allocation_classes: collections.Counter[str] = collections.Counter()
+    execution_samples = allocated_bytes = 0
+
+    for event in events:
+        values = event.get("values") or {}
+        frames = _get_stack_frames(values)
+        if not frames:
+            continue
+
+        top_method = ".".join(frames[0])
+        plugin_class = _get_plugin_class(frames)
+
+        match event.get("type"):
+            case "jdk.ExecutionSample":
+                execution_samples += 1
+                hot_methods[top_method] += 1
+
+                if plugin_class is not None:
+                    plugin_hot_classes[plugin_class] += 1
+            case "jdk.ObjectAllocationSample":
+                weight = int(values.get("weight") or 0)
+                allocated_bytes += weight
+                allocation_sites[top_method] += weight
+
+                if plugin_class is not None:
+                    plugin_allocation_classes[plugin_class] += weight
+
+    return RecordingSummary(
+        recording_path=recording_path,
+        execution_samples=execution_samples,
+        allocated_bytes=allocated_bytes,
+        plugin_execution_samples=plugin_hot_classes.total(),
+        plugin_allocated_bytes=plugin_allocation_classes.total(),
+        hot_methods=_get_top(hot_methods),
+        allocation_sites=_get_top(allocation_sites),
+        plugin_hot_classes=_get_top(plugin_hot_classes),
+        plugin_allocation_classes=_get_top(plugin_allocation_classes),
+    )
+
+
+class FlightRecordingError(Exception):
+    pass
+
+
+class FlightRecorder:
+    # Dumps and summaries are pending until `run_pending_tasks`, which has to be called while
+    # long-lived JVMs are still running. Profiling must not fail exports, so errors are only logged
+    _LOG_PREFIX: Final = "FlightRecorder"
+
+    def __init__(self, log: logging.Logger, java_path: Path, output_dir: Path) -> None:
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__java_path = java_path
+        self.__output_dir = output_dir
+
+    @contextlib.contextmanager
+    def launch(self, name: str) -> Iterator[tuple[str, ...]]:
+        recording_path = self.__get_recording_path(name)
+
+        yield (
+            f"-XX:StartFlightRecording=name={_RECORDING_NAME},settings={_SETTINGS},dumponexit=true,filename={recording_path}",
+        )
+
+        _pending_tasks.append(lambda: self.__summarize(recording_path))
+
+    @property
+    def server_java_options(self) -> tuple[str, ...]:
+        return (f"-XX:StartFlightRecording=name={_RECORDING_NAME},settings={_SETTINGS}",)
+
+    @contextlib.contextmanager
+    def attach(self, pid: int, name: str) -> Iterator[None]:
+        # JVM has to be launched with `server_java_options`
+        recording_path = self.__get_recording_path(name)
+        begin_time = datetime.now(timezone.utc)
+
+        yield
+
+        end_time = datetime.now(timezone.utc)
+        _pending_tasks.append(lambda: self.__dump(pid, recording_path, begin_time, end_time))
+
+    def __dump(self, pid: int, recording_path: Path, begin_time: datetime, end_time: datetime) -> None:
+        try:
+            self.__run_jcmd(
+                pid,
+                "JFR.dump",
+                f"name={_RECORDING_NAME}",
+                f"begin={_format_instant(begin_time)}",
+                f"end={_format_instant(end_time)}",
+                f"filename={recording_path}",
+            )
+        except FlightRecordingError as e:
+            self.__log.warning(f"Failed to dump recording '{recording_path}': {e}")
+            return
+
+        self.__summarize(recording_path)
+
+    def __get_recording_path(self, name: str) -> Path:
+        self.__output_dir.mkdir(parents=True, exist_ok=True)
+        # Parallel test workers may record the same workspace into the same directory
+        return (self.__output_dir / f"{name}-{os.getpid()}-{next(_recording_numbers)}{_RECORDING_SUFFIX}").absolute()
+
+    def __get_tool_path(self, name: str) -> Path:
+        return (self.__java_path / (f"{name}.exe" if sys.platform == "win32" else name)).absolute()
+
+    def __run_jcmd(self, pid: int, *command: str) -> None:
+        try:
+            process = subprocess.run(
+                [str(self.__get_tool_path("jcmd")), str(pid), *command],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                encoding="utf-8",
+                errors="replace",
+                timeout=_JCMD_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise FlightRecordingError(str(e)) from e
+
+        if process.returncode != 0:
+            raise FlightRecordingError(f"jcmd {' '.join(command)} returned exit status {process.returncode}:\n{process.stdout}")
+
+    def __read_events(self, recording_path: Path) -> list[dict[str, Any]]:
+        try:
+            process = subprocess.run(
+                [
+                    str(self.__get_tool_path("jfr")),
+                    "print",
+                    "--json",
+                    "--events",
+                    f"{_EXECUTION_SAMPLE_EVENT},{_ALLOCATION_SAMPLE_EVENT}",
+                    str(recording_path),
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except OSError as e:
+            raise FlightRecordingError(str(e)) from e
+
+        if process.returncode != 0:
+            raise FlightRecordingError(f"jfr print returned exit status {process.returncode}:\n{process.stderr}")
+
+        return json.loads(process.stdout)["recording"]["events"]
+
+    def __summarize(self, recording_path: Path) -> None:
+        if not recording_path.exists():
+            self.__log.warning(f"JVM has not written recording '{recording_path}'")
+            return
+
+        with _logging_tools.log_action(self.__log, f"Summarize recording '{recording_path}'"):
+            try:
+                summary = summarize_events(recording_path, self.__read_events(recording_path))
+            except (FlightRecordingError, ValueError, KeyError) as e:
+                self.__log.warning(f"Failed to summarize recording '{recording_path}': {e}")
+                return
+
+            recording_path.with_suffix(_SUMMARY_SUFFIX).write_text(json.dumps(summary.to_json(), indent=2))
+            recording_path.with_suffix(_REPORT_SUFFIX).write_text(summary.format_text())
+
+        top_plugin_class = summary.plugin_hot_classes[0].method if summary.plugin_hot_classes else "-"
+        self.__log.info(
+            f"Recording '{recording_path.name}': {summary.plugin_execution_share:.1%} of execution samples "
+            f"in plugin classes, the hottest is '{top_plugin_class}'"
+        )
+
+
+def _format_instant(time: datetime) -> str:
+    return time.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def run_pending_tasks() -> None:
+    while _pending_tasks:
+        _pending_tasks.pop(0)()
+
+
+def launch(recorder: FlightRecorder | None, name: str) -> contextlib.AbstractContextManager[tuple[str, ...]]:
+    if recorder is None:
+        return contextlib.nullcontext(())
+
+    return recorder.launch(name)
+
+
+def attach(recorder: FlightRecorder | None, pid: int, name: str) -> contextlib.AbstractContextManager[None]:
+    if recorder is None:
+        return contextlib.nullcontext()
+
+    return recorder.attach(pid, name)
+
+
+def get_server_java_options(recorder: FlightRecorder | None) -> tuple[str, ...]:
+    if recorder is None:
+        return ()
+
+    return recorder.server_java_options
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import dataclasses
+from pathlib import Path
+from typing import Final, Iterable, assert_never
+
+import _change_impact
+import _exporter_factory
+import _exporter_release
+
+
+_CUR_DIR_PATH: Final = Path(__file__).parent
+DOWNLOAD_CACHE_PATH: Final = _CUR_DIR_PATH / ".cache"
+ENVIRONMENTS_CACHE_PATH: Final = DOWNLOAD_CACHE_PATH / "environments"
+EXPORT_RESULTS_CACHE_PATH: Final = DOWNLOAD_CACHE_PATH / "export-results"
+PASSED_CELLS_STORE_PATH: Final = DOWNLOAD_CACHE_PATH / "passed-cells.jsonl"
+CELL_TIMINGS_STORE_PATH: Final = DOWNLOAD_CACHE_PATH / "cell-timings.jsonl"
+DATA_DIR_PATH: Final = _CUR_DIR_PATH / "tests" / "test_syntax_plugin"
+_JWEAVER_RELEASES: Final = (
+    _exporter_factory.JWeaverRelease(
+        url="https://repo1.maven.org/maven2/org/aspectj/aspectjweaver/1.9.22/aspectjweaver-1.9.22.jar",
+        version="1.9.22",
+    ),
+    _exporter_factory.JWeaverRelease(
+        url="https://repo1.maven.org/maven2/org/aspectj/aspectjweaver/1.9.23/aspectjweaver-1.9.23.jar",
+        version="1.9.23",
+    ),
+    _exporter_factory.JWeaverRelease(
+        url="https://repo1.maven.org/maven2/org/aspectj/aspectjweaver/1.9.24/aspectjweaver-1.9.24.jar",
+        version="1.9.24",
+    ),
+    _exporter_factory.JWeaverRelease(
+        url="https://repo1.maven.org/maven2/org/aspectj/aspectjweaver/1.9.25/aspectjweaver-1.9.25.jar",
+        version="1.9.25",
+    ),
+)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PatternSyntaxPluginDistributive:
+    lite_version: Path
+    standalone_version: Path
+
+    @classmethod
+    def from_dist_directory(cls, directory: Path) -> PatternSyntaxPluginDistributive:
+        return PatternSyntaxPluginDistributive(
+            lite_version=cls.__validate_path(directory / "lite.jar"),
+            standalone_version=cls.__validate_path(directory / "standalone.jar"),
+        )
+
+    @staticmethod
+    def __validate_path(path: Path) -> Path:
+        if not path.exists():
+            raise ValueError(f"Path '{path.absolute()}' not exists")
+
+        return path
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SuccessTestResult:
+    expected_result_path: Path
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class FailedTestResult:
+    error_message: str
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TestConfiguration:
+    name: str
+    exporter_config: _exporter_factory.ExporterConfig
+    result: SuccessTestResult | FailedTestResult
+    workspace_path: Path
+
+    @property
+    def param_id(self) -> str:
+        config_params = {
+            "release": self.exporter_config.exporter_release.version,
+            "test_case": self.name,
+        }
+
+        match self.exporter_config:
+            case _exporter_factory.LiteVersionExporterConfig():
+                config_params["plugin_version"] = "lite"
+                config_params["jweaver"] = self.exporter_config.jweaver_release.version
+            case _exporter_factory.StandaloneVersionExporterConfig():
+                config_params["plugin_version"] = "standalone"
+
+        match self.exporter_config.exporter_release:
+            case _exporter_release.StructurizrCliRelease():
+                config_params["exporter_type"] = "structurizr_cli"
+            case _exporter_release.StructurizrLiteRelease():
+                config_params["exporter_type"] = "structurizr_lite"
+
+        return " ".join(f"{key}:{value}" for key, value in config_params.items())
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ReducedTestConfiguration:
+    name: str
+    result: SuccessTestResult | FailedTestResult
+    workspace_path: Path
+
+
+def _get_test_configs(
+    releases: Iterable[_exporter_release.ExporterRelease],
+    reduced_test_configs: Iterable[ReducedTestConfiguration],
+) -> list[TestConfiguration]:
+    return [
+        TestConfiguration(
+            name=reduced_test_config.name,
+            exporter_config=_exporter_factory.StandaloneVersionExporterConfig(release) if jweaver_release is None else _exporter_factory.LiteVersionExporterConfig(release, jweaver_release),
+            result=reduced_test_config.result,
+            workspace_path=reduced_test_config.workspace_path,
+        )
+        for release in releases
+        for jweaver_release in (*_JWEAVER_RELEASES, None)
+        for reduced_test_config in reduced_test_configs
+    ]
+
+
+def get_syntax_plugin_path(
+    exporter_config: _exporter_factory.ExporterConfig,
+    syntax_plugin_dist: PatternSyntaxPluginDistributive,
+) -> Path:
+    match exporter_config:
+        case _exporter_factory.LiteVersionExporterConfig():
+            return syntax_plugin_dist.lite_version
+        case _exporter_factory.StandaloneVersionExporterConfig():
+            return syntax_plugin_dist.standalone_version
+        case _:
+            raise assert_never(exporter_config)
+
+
+def get_cell_fingerprint(
+    calculator: _change_impact.FingerprintCalculator,
+    test_config: TestConfiguration,
+    syntax_plugin_dist: PatternSyntaxPluginDistributive,
+    samples_dir_path: Path,
+    data_dir_path: Path,
+) -> str:
+    expected_result_full_path = None
+    expected_error_message = None
+
+    match test_config.result:
+        case SuccessTestResult(expected_result_path=expected_result_path):
+            expected_result_full_path = data_dir_path / expected_result_path
+        case FailedTestResult(error_message=error_message):
+            expected_error_message = error_message
+
+    return calculator.get_cell_fingerprint(
+        workspace_path=samples_dir_path / test_config.workspace_path,
+        syntax_plugin_path=get_syntax_plugin_path(test_config.exporter_config, syntax_plugin_dist),
+        exporter_config=test_config.exporter_config,
+        expected_result_path=expected_result_full_path,
+        expected_error_message=expected_error_message,
+    )
+
+
+TEST_CONFIGS: Final = (
+    *_get_test_configs(
+        releases=[
+            _exporter_release.StructurizrCliRelease(
+                version="v2025.03.28",
+                url="https://github.com/structurizr/cli/releases/download/v2025.03.28/structurizr-cli.zip",
+            ),
+            _exporter_release.StructurizrCliRelease(
+                version="v2025.05.28",
+                url="https://github.com/structurizr/cli/releases/download/v2025.05.28/structurizr-cli.zip",
+            ),
+        ],
+        reduced_test_configs=[
+            ReducedTestConfiguration(
+                name="database-per-service",
+                workspace_path=Path("databasePerService.dsl"),
+                result=FailedTestResult(
+                    error_message="Database 'Payment Service' is already used by 'Order Application'",
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="layered",
+                workspace_path=Path("layered.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-cli/layered.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="reverse-proxy",
+                workspace_path=Path("reverseProxy.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-cli/reverseProxy.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="saga",
+                workspace_path=Path("saga.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-cli/saga.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="service-registry",
+                workspace_path=Path("serviceRegistry.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-cli/serviceRegistry.json"),
+                ),
+            ),
+        ]
+    ),
+    *_get_test_configs(
+        releases=[
+            _exporter_release.StructurizrLiteRelease(
+                version="v2025.03.28",
+                url="https://github.com/structurizr/lite/releases/download/v2025.03.28/structurizr-lite.war",
+            ),
+            _exporter_release.StructurizrLiteRelease(
+                version="v2025.05.28",
+                url="https://github.com/structurizr/lite/releases/download/v2025.05.28/structurizr-lite.war",
+            ),
+        ],
+        reduced_test_configs=[
+            ReducedTestConfiguration(
+                name="database-per-service",
+                workspace_path=Path("databasePerService.dsl"),
+                result=FailedTestResult(
+                    error_message="Database 'Payment Service' is already used by 'Order Application'",
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="layered",
+                workspace_path=Path("layered.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-lite/layered.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="reverse-proxy",
+                workspace_path=Path("reverseProxy.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-lite/reverseProxy.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="saga",
+                workspace_path=Path("saga.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-lite/saga.json"),
+                ),
+            ),
+            ReducedTestConfiguration(
+                name="service-registry",
+                workspace_path=Path("serviceRegistry.dsl"),
+                result=SuccessTestResult(
+                    expected_result_path=Path("results/structurizr-lite/serviceRegistry.json"),
+                ),
+            )
+        ]
+    ),
+)
@@ -0,0 +1,52 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+class JsonLinesStore[T]:
+    # A record is appended with a single write, so parallel test workers can append into the same store
+    def __init__(
+        self,
+        log: logging.Logger,
+        store_path: Path,
+        *,
+        serialize: Callable[[T], dict[str, Any]],
+        deserialize: Callable[[dict[str, Any]], T],
+    ) -> None:
+        self.__log = log
+        self.__store_path = store_path
+        self.__serialize = serialize
+        self.__deserialize = deserialize
+
+    def append(self, item: T) -> None:
+        self.__store_path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(self.__serialize(item)) + "\n"
+
+        with self.__store_path.open("a", encoding="utf-8") as file:
+            file.write(line)
+
+    def load(self) -> list[T]:
+        items: list[T] = []
+
+        if not self.__store_path.exists():
+            return items
+
+        for line in self.__store_path.read_text(encoding="utf-8").splitlines():
+            try:
+                items.append(self.__deserialize(json.loads(line)))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.__log.debug(f"Skip malformed record: {line!r}")
+
+        return items
+
+    def rewrite(self, items: Iterable[T]) -> None:
+        self.__store_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_store_path = self.__store_path.with_name(f"{self.__store_path.name}.{os.getpid()}.tmp")
+
+        with temp_store_path.open("w", encoding="utf-8") as file:
+            for item in items:
+                file.write(json.dumps(self.__serialize(item)) + "\n")
+
+        os.replace(temp_store_path, self.__store_path)
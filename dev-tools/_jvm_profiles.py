@@ -0,0 +1,88 @@
+import dataclasses
+import enum
+import os
+from typing import Final, Mapping
+
+
+# Java launcher reads options from these variables too, so they would override options of exporter JVMs
+_JAVA_OPTIONS_VARIABLES: Final = ("JAVA_TOOL_OPTIONS", "JDK_JAVA_OPTIONS", "_JAVA_OPTIONS")
+
+
+class GarbageCollector(enum.StrEnum):
+    SERIAL = "SerialGC"
+    PARALLEL = "ParallelGC"
+    G1 = "G1GC"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class JvmProfile:
+    name: str
+    initial_heap: str | None = None
+    max_heap: str | None = None
+    garbage_collector: GarbageCollector | None = None
+    tiered_stop_at_level: int | None = None
+    extra_options: tuple[str, ...] = ()
+
+    @property
+    def java_options(self) -> tuple[str, ...]:
+        options: list[str] = []
+
+        if self.initial_heap is not None:
+            options.append(f"-Xms{self.initial_heap}")
+        if self.max_heap is not None:
+            options.append(f"-Xmx{self.max_heap}")
+        if self.garbage_collector is not None:
+            options.append(f"-XX:+Use{self.garbage_collector}")
+        if self.tiered_stop_at_level is not None:
+            options.append(f"-XX:TieredStopAtLevel={self.tiered_stop_at_level}")
+
+        return (*options, *self.extra_options)
+
+
+DEFAULT_PROFILE: Final = JvmProfile(name="default")
+
+JVM_PROFILES: Final = {
+    profile.name: profile
+    for profile in (
+        DEFAULT_PROFILE,
+        # Export runs for seconds: C1 compiled code and a single-threaded collector are enough
+        JvmProfile(
+            name="short-lived",
+            garbage_collector=GarbageCollector.SERIAL,
+            tiered_stop_at_level=1,
+        ),
+        JvmProfile(
+            name="small-heap",
+            initial_heap="64m",
+            max_heap="512m",
+            garbage_collector=GarbageCollector.SERIAL,
+        ),
+        # Long-lived servers and daemons serve many exports, so they benefit from full JIT and a preallocated heap
+        JvmProfile(
+            name="server",
+            initial_heap="512m",
+            max_heap="2g",
+            garbage_collector=GarbageCollector.G1,
+        ),
+        JvmProfile(
+            name="throughput",
+            initial_heap="512m",
+            max_heap="2g",
+            garbage_collector=GarbageCollector.PARALLEL,
+        ),
+    )
+}
+
+
+def get_profile(name: str) -> JvmProfile:
+    try:
+        return JVM_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown JVM profile '{name}', expected one of: {', '.join(JVM_PROFILES)}") from None
+
+
+def get_java_environment(variables: Mapping[str, str] | None = None) -> dict[str, str]:
+    environment = {name: value for name, value in os.environ.items() if name not in _JAVA_OPTIONS_VARIABLES}
+    environment.update(variables or {})
+
+    return environment
@@ -1,5 +1,9 @@
 import contextlib
+import contextvars
+import dataclasses
+import enum
 import logging
+import time
 from typing import Iterator, Mapping, Any, MutableMapping
 
 
@@ -26,14 +30,75 @@ def with_prefix(logger: logging.Logger, prefix: str) -> logging.Logger:
     )
 
 
+class TimingPhase(enum.StrEnum):
+    DOWNLOAD = "download"
+    ENVIRONMENT_PREPARATION = "environment_preparation"
+    STARTUP = "startup"
+    EXPORT = "export"
+    COMPARISON = "comparison"
+
+
+@dataclasses.dataclass(slots=True)
+class _PhaseFrame:
+    phase: TimingPhase
+    nested_duration: float = 0.0
+
+
+@dataclasses.dataclass(slots=True)
+class _PhaseRecorder:
+    durations: dict[TimingPhase, float]
+    frames: list[_PhaseFrame]
+
+
+_phase_recorder: contextvars.ContextVar[_PhaseRecorder | None] = contextvars.ContextVar("_phase_recorder", default=None)
+
+
 @contextlib.contextmanager
-def log_action(log: logging.Logger, action: str) -> Iterator[None]:
-    log.debug(f"{action}: started")
+def record_phases() -> Iterator[dict[TimingPhase, float]]:
+    # Time of nested phases is accounted only to the innermost one
+    recorder = _PhaseRecorder(durations={}, frames=[])
+    token = _phase_recorder.set(recorder)
 
     try:
+        yield recorder.durations
+    finally:
+        _phase_recorder.reset(token)
+
+
+@contextlib.contextmanager
+def _track_phase(phase: TimingPhase | None) -> Iterator[None]:
+    recorder = _phase_recorder.get()
+
+    if phase is None or recorder is None:
         yield
+        return
+
+    frame = _PhaseFrame(phase)
+    recorder.frames.append(frame)
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start_time
+        recorder.frames.pop()
+
+        recorder.durations[phase] = recorder.durations.get(phase, 0.0) + duration - frame.nested_duration
+
+        if recorder.frames:
+            recorder.frames[-1].nested_duration += duration
+
+
+@contextlib.contextmanager
+def log_action(log: logging.Logger, action: str, *, phase: TimingPhase | None = None) -> Iterator[None]:
+    log.debug(f"{action}: started")
+    start_time = time.perf_counter()
+
+    try:
+        with _track_phase(phase):
+            yield
     except Exception as e:
-        log.debug(f"{action}: failed: {e}")
+        log.debug(f"{action}: failed in {time.perf_counter() - start_time:.3f}s: {e}")
         raise
     else:
-        log.debug(f"{action}: completed")
+        log.debug(f"{action}: completed in {time.perf_counter() - start_time:.3f}s")
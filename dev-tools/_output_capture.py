@@ -0,0 +1,114 @@
+import collections
+import logging
+import threading
+from typing import IO, Callable, Final
+
+import _logging_tools
+
+
+DEFAULT_TAIL_SIZE: Final = 64 * 1024
+# Lines are read in chunks of limited size, so a process writing without line breaks doesn't grow memory
+_MAX_LINE_SIZE: Final = 8 * 1024
+
+
+class OutputTail:
+    def __init__(self, size: int = DEFAULT_TAIL_SIZE) -> None:
+        self.__size = size
+        # Written data is kept in chunks, so dropping the oldest output doesn't move the rest of it
+        self.__chunks: collections.deque[bytes] = collections.deque()
+        self.__buffered_bytes = 0
+        self.__dropped_bytes = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self.__dropped_bytes
+
+    @property
+    def position(self) -> int:
+        with self.__lock:
+            return self.__dropped_bytes + self.__buffered_bytes
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+
+        with self.__lock:
+            self.__chunks.append(bytes(data))
+            self.__buffered_bytes += len(data)
+            overflow = self.__buffered_bytes - self.__size
+
+            while overflow > 0:
+                oldest_chunk = self.__chunks[0]
+                dropped_size = min(len(oldest_chunk), overflow)
+
+                if dropped_size == len(oldest_chunk):
+                    self.__chunks.popleft()
+                else:
+                    self.__chunks[0] = oldest_chunk[dropped_size:]
+
+                self.__buffered_bytes -= dropped_size
+                self.__dropped_bytes += dropped_size
+                overflow -= dropped_size
+
+    def get_text(self, since: int = 0) -> str:
+        with self.__lock:
+            text = b"".join(self.__chunks)[max(since - self.__dropped_bytes, 0):].decode("utf-8", errors="replace")
+
+            if (dropped_bytes := self.__dropped_bytes - since) > 0:
+                return f"[... {dropped_bytes} bytes of output are dropped ...]\n{text}"
+
+            return text
+
+
+class OutputCapture(threading.Thread):
+    def __init__(
+        self,
+        stream: IO[bytes],
+        *,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+        log: logging.Logger | None = None,
+        line_handler: Callable[[bytes], None] | None = None,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.__stream = stream
+        self.__tail = OutputTail(tail_size)
+        self.__log = log
+        self.__line_handler = line_handler
+
+    @property
+    def position(self) -> int:
+        return self.__tail.position
+
+    def get_text(self, since: int = 0) -> str:
+        return self.__tail.get_text(since)
+
+    def run(self) -> None:
+        try:
+            for line in iter(lambda: self.__stream.readline(_MAX_LINE_SIZE), b""):
+                self.__tail.write(line)
+
+                if self.__line_handler is not None:
+                    self.__line_handler(line)
+
+                if self.__log is not None:
+                    self.__log.info(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        finally:
+            self.__stream.close()
+
+
+def start(
+    stream: IO[bytes],
+    name: str,
+    *,
+    log: logging.Logger | None = None,
+    line_handler: Callable[[bytes], None] | None = None,
+) -> OutputCapture:
+    capture = OutputCapture(
+        stream,
+        log=_logging_tools.with_prefix(log, name) if log is not None else None,
+        line_handler=line_handler,
+    )
+    capture.start()
+
+    return capture
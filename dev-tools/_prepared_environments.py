@@ -0,0 +1,382 @@
+import dataclasses
+import enum
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import shlex
+import shutil
+import stat
+import sys
+from typing import Callable, Final, Iterable
+import zipfile
+import zlib
+
+import _class_data_sharing
+import _file_hashes
+import _logging_tools
+
+
+_KEY_HASH_LENGTH: Final = 16
+_STRUCTURIZR_CLI_SHELL_FILE: Final = "structurizr.sh"
+_STRUCTURIZR_CLI_LIB_DIR: Final = "lib"
+_STRUCTURIZR_CLI_LAUNCH_FILE: Final = "structurizr-cli-launch.json"
+_STRUCTURIZR_CLI_MAIN_CLASS: Final = "com.structurizr.cli.StructurizrCliApplication"
+_JAVA_CLASSPATH_OPTIONS: Final = frozenset(("-cp", "-classpath", "--class-path"))
+_SCRIPT_DIR_VARIABLE_PATTERN: Final = re.compile(r"^\$\{?\w+\}?/")
+_STRUCTURIZR_LITE_WAR_FILE: Final = "structurizr-lite.war"
+_WAR_LIBRARIES_DIR: Final = "WEB-INF/lib"
+_CLASS_DATA_DIR: Final = "class-data"
+_CLASS_DATA_ARCHIVE_SUFFIX: Final = ".jsa"
+_JDK_RELEASE_FILE: Final = "release"
+
+
+def _link_or_copy_file(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def clone_tree(src: Path, dst: Path) -> None:
+    # Cloned files share content with the source, so they must be replaced instead of modified in place
+    shutil.copytree(src, dst, copy_function=_link_or_copy_file)
+
+
+def install_file(src: Path, dst: Path) -> None:
+    if dst.exists():
+        if dst.stat().st_size == src.stat().st_size and _file_hashes.hash_file(dst) == _file_hashes.hash_file(src):
+            return
+
+        dst.unlink()
+
+    shutil.copy(src, dst)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class StructurizrCliLaunch:
+    # Classpath entries are relative to the Structurizr CLI directory
+    java_options: tuple[str, ...]
+    classpath: tuple[str, ...]
+    main_class: str
+
+    def get_classpath(self, structurizr_cli_dir: Path) -> list[Path]:
+        return [(structurizr_cli_dir / entry).absolute() for entry in self.classpath]
+
+
+def _expand_classpath_entry(structurizr_cli_dir: Path, entry: str) -> list[str]:
+    entry = _SCRIPT_DIR_VARIABLE_PATTERN.sub("", entry)
+
+    if Path(entry).name != "*":
+        return [entry]
+
+    # Java doesn't define order of wildcard entries, so it is fixed to keep launches reproducible
+    entry_dir = Path(entry).parent
+    return sorted(
+        (entry_dir / path.name).as_posix()
+        for path in (structurizr_cli_dir / entry_dir).iterdir()
+        if path.suffix.lower() == ".jar"
+    )
+
+
+def _parse_structurizr_cli_launch(structurizr_cli_dir: Path) -> StructurizrCliLaunch | None:
+    script = (structurizr_cli_dir / _STRUCTURIZR_CLI_SHELL_FILE).read_text(errors="replace")
+
+    for line in script.splitlines():
+        try:
+            tokens = shlex.split(line, comments=True)
+        except ValueError:
+            continue
+
+        java_index = next((index for index, token in enumerate(tokens) if Path(token).name == "java"), None)
+        if java_index is None:
+            continue
+
+        java_options: list[str] = []
+        classpath: str | None = None
+        arguments = iter(tokens[java_index + 1:])
+
+        for argument in arguments:
+            if argument in _JAVA_CLASSPATH_OPTIONS:
+                classpath = next(arguments, None)
+            elif "$" in argument:
+                # Options from environment variables (e.g. $JAVA_OPTS) are not part of the launch
+                continue
+            elif argument.startswith("-"):
+                java_options.append(argument)
+            elif classpath is not None:
+                return StructurizrCliLaunch(
+                    java_options=tuple(java_options),
+                    classpath=tuple(
+                        expanded_entry
+                        for entry in classpath.split(":")
+                        for expanded_entry in _expand_classpath_entry(structurizr_cli_dir, entry)
+                    ),
+                    main_class=argument,
+                )
+            else:
+                break
+
+    return None
+
+
+def get_structurizr_cli_launch(structurizr_cli_dir: Path) -> StructurizrCliLaunch:
+    launch_path = structurizr_cli_dir / _STRUCTURIZR_CLI_LAUNCH_FILE
+
+    if launch_path.exists():
+        launch_data = json.loads(launch_path.read_text())
+        return StructurizrCliLaunch(
+            java_options=tuple(launch_data["java_options"]),
+            classpath=tuple(launch_data["classpath"]),
+            main_class=launch_data["main_class"],
+        )
+
+    if (launch := _parse_structurizr_cli_launch(structurizr_cli_dir)) is not None:
+        return launch
+
+    # Layout of Structurizr CLI distributions which launch their main class with 'lib/*' classpath
+    return StructurizrCliLaunch(
+        java_options=(),
+        classpath=tuple(_expand_classpath_entry(structurizr_cli_dir, f"{_STRUCTURIZR_CLI_LIB_DIR}/*")),
+        main_class=_STRUCTURIZR_CLI_MAIN_CLASS,
+    )
+
+
+class FileSyncMode(enum.StrEnum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    SYMLINK = "symlink"
+
+
+def _is_file_synced(src: os.DirEntry, dst: os.DirEntry, mode: FileSyncMode) -> bool:
+    match mode:
+        case FileSyncMode.COPY:
+            if dst.is_symlink():
+                return False
+
+            src_stat, dst_stat = src.stat(), dst.stat()
+            return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+        case FileSyncMode.HARDLINK:
+            return not dst.is_symlink() and dst.inode() == src.inode() and dst.stat().st_dev == src.stat().st_dev
+        case FileSyncMode.SYMLINK:
+            return dst.is_symlink() and os.readlink(dst.path) == os.path.abspath(src.path)
+
+
+def _sync_file(src: str, dst: str, mode: FileSyncMode) -> None:
+    match mode:
+        case FileSyncMode.COPY:
+            shutil.copy2(src, dst)
+        case FileSyncMode.HARDLINK:
+            _link_or_copy_file(src, dst)
+        case FileSyncMode.SYMLINK:
+            os.symlink(os.path.abspath(src), dst)
+
+
+def _remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def sync_tree(src: Path, dst: Path, *, mode: FileSyncMode = FileSyncMode.COPY, exclude: Iterable[str] = ()) -> None:
+    # Only changed files are touched: copies are compared by size and modification time, links
+    # by their target. Linked files share content with the source
+    _sync_directory(str(src), str(dst), mode, frozenset(exclude))
+
+
+def _sync_directory(src: str, dst: str, mode: FileSyncMode, exclude: frozenset[str]) -> None:
+    os.makedirs(dst, exist_ok=True)
+
+    with os.scandir(dst) as dst_entries:
+        existing_entries = {entry.name: entry for entry in dst_entries if entry.name not in exclude}
+
+    with os.scandir(src) as src_entries:
+        for src_entry in src_entries:
+            if src_entry.name in exclude:
+                continue
+
+            dst_path = os.path.join(dst, src_entry.name)
+            dst_entry = existing_entries.pop(src_entry.name, None)
+
+            if src_entry.is_dir():
+                if dst_entry is not None and (dst_entry.is_symlink() or not dst_entry.is_dir()):
+                    _remove_path(dst_path)
+
+                _sync_directory(src_entry.path, dst_path, mode, frozenset())
+                continue
+
+            if dst_entry is not None:
+                if not dst_entry.is_dir(follow_symlinks=False) and _is_file_synced(src_entry, dst_entry, mode):
+                    continue
+
+                _remove_path(dst_path)
+
+            _sync_file(src_entry.path, dst_path, mode)
+
+    for name in existing_entries:
+        _remove_path(os.path.join(dst, name))
+
+
+def _detach_file(path: Path) -> None:
+    if path.stat().st_nlink > 1:
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        shutil.copy2(path, temp_path)
+        os.replace(temp_path, path)
+
+
+def _remove_archive_entry(archive_path: Path, entry_name: str) -> None:
+    temp_path = archive_path.with_name(f"{archive_path.name}.{os.getpid()}.tmp")
+
+    with zipfile.ZipFile(archive_path) as src, zipfile.ZipFile(temp_path, "w") as dst:
+        dst.comment = src.comment
+
+        for info in src.infolist():
+            if info.filename != entry_name:
+                dst.writestr(info, src.read(info), compress_type=info.compress_type)
+
+    os.replace(temp_path, archive_path)
+
+
+def add_war_library(war_path: Path, library_path: Path) -> None:
+    # Library is appended as a new entry, so the rest of the archive is not rewritten
+    entry_name = f"{_WAR_LIBRARIES_DIR}/{library_path.name}"
+    library_content = library_path.read_bytes()
+
+    with zipfile.ZipFile(war_path) as war:
+        existing_entry = war.NameToInfo.get(entry_name)
+
+    if existing_entry is not None:
+        if existing_entry.file_size == len(library_content) and existing_entry.CRC == zlib.crc32(library_content):
+            return
+
+        _remove_archive_entry(war_path, entry_name)
+
+    _detach_file(war_path)
+
+    # Spring Boot loads nested jars in place, so they have to be stored without compression
+    with zipfile.ZipFile(war_path, "a") as war:
+        war.writestr(entry_name, library_content, compress_type=zipfile.ZIP_STORED)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PreparedEnvironment:
+    key: str
+    path: Path
+
+
+class PreparedEnvironmentCache:
+    # Exporters launch JVMs right from the cached trees, so launch paths are stable for class data
+    # archives. Exporters must not modify the trees
+    _LOG_PREFIX: Final = "PreparedEnvironmentCache"
+
+    def __init__(self, log: logging.Logger, cache_path: Path) -> None:
+        self.__base_log = log
+        self.__log = _logging_tools.with_prefix(log, self._LOG_PREFIX)
+        self.__cache_path = cache_path
+
+        self.__cache_path.mkdir(parents=True, exist_ok=True)
+
+    def prepare_structurizr_cli(self, archive_path: Path) -> PreparedEnvironment:
+        def _build(tree_dir: Path) -> None:
+            with zipfile.ZipFile(archive_path) as archive:
+                archive.extractall(tree_dir)
+
+            if sys.platform != "win32":
+                script_path = tree_dir / _STRUCTURIZR_CLI_SHELL_FILE
+                current_permissions = script_path.stat().st_mode
+                script_path.chmod(current_permissions | stat.S_IXUSR)
+
+            launch = get_structurizr_cli_launch(tree_dir)
+            (tree_dir / _STRUCTURIZR_CLI_LAUNCH_FILE).write_text(
+                json.dumps(
+                    {
+                        "java_options": list(launch.java_options),
+                        "classpath": list(launch.classpath),
+                        "main_class": launch.main_class,
+                    },
+                    indent=2,
+                )
+            )
+
+        key = self.__get_key("structurizr-cli", archive_path)
+        return PreparedEnvironment(key, self.__get_or_build(key, _build))
+
+    def prepare_structurizr_lite(self, war_path: Path, *, syntax_plugin_path: Path | None = None) -> PreparedEnvironment:
+        def _build(tree_dir: Path) -> None:
+            tree_dir.mkdir()
+            shutil.copy(war_path, tree_dir / _STRUCTURIZR_LITE_WAR_FILE)
+
+            if syntax_plugin_path is not None:
+                add_war_library(tree_dir / _STRUCTURIZR_LITE_WAR_FILE, syntax_plugin_path)
+
+        key = self.__get_key("structurizr-lite", war_path, syntax_plugin_path)
+        return PreparedEnvironment(key, self.__get_or_build(key, _build))
+
+    def get_class_data_archive(
+        self,
+        environment: PreparedEnvironment,
+        java_path: Path,
+        *,
+        java_agent_paths: Iterable[Path] = (),
+        classpath: Iterable[Path] = (),
+        java_options: Iterable[str] = (),
+    ) -> _class_data_sharing.ClassDataArchive:
+        # Archive is valid only for the JDK build which has recorded it
+        jdk_release_path = java_path.absolute().parent / _JDK_RELEASE_FILE
+        jdk_key = _file_hashes.get_file_hash(jdk_release_path)[:_KEY_HASH_LENGTH] if jdk_release_path.exists() else None
+
+        # JVM rejects the archive if paths or modification times of the launched jars differ
+        launch_parts = (
+            str(java_path.absolute()),
+            str(environment.path.absolute()),
+            *(f"{path.absolute()}@{path.stat().st_mtime_ns}" for path in (*java_agent_paths, *classpath)),
+            *java_options,
+        )
+
+        key = "-".join(
+            part
+            for part in (
+                environment.key,
+                jdk_key,
+                hashlib.sha256("\0".join(launch_parts).encode("utf-8")).hexdigest()[:_KEY_HASH_LENGTH],
+                *(_file_hashes.get_file_hash(path)[:_KEY_HASH_LENGTH] for path in (*java_agent_paths, *classpath)),
+            )
+            if part is not None
+        )
+
+        return _class_data_sharing.ClassDataArchive(
+            self.__base_log,
+            self.__cache_path / _CLASS_DATA_DIR / f"{key}{_CLASS_DATA_ARCHIVE_SUFFIX}",
+        )
+
+    def __get_key(self, name: str, *paths: Path | None) -> str:
+        hashes = (_file_hashes.get_file_hash(path)[:_KEY_HASH_LENGTH] for path in paths if path is not None)
+        return "-".join((name, *hashes))
+
+    def __get_or_build(self, key: str, build: Callable[[Path], None]) -> Path:
+        tree_dir = self.__cache_path / key
+
+        if tree_dir.exists():
+            self.__log.debug(f"Use prepared environment '{key}'")
+            return tree_dir
+
+        with _logging_tools.log_action(self.__log, f"Prepare environment '{key}'"):
+            temp_tree_dir = self.__cache_path / f"{key}.{os.getpid()}.tmp"
+            if temp_tree_dir.exists():
+                shutil.rmtree(temp_tree_dir)
+
+            try:
+                build(temp_tree_dir)
+                os.replace(temp_tree_dir, tree_dir)
+            except OSError:
+                # Parallel test worker could have published the same environment first
+                if not tree_dir.exists():
+                    raise
+            finally:
+                if temp_tree_dir.exists():
+                    shutil.rmtree(temp_tree_dir)
+
+        return tree_dir
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+from pathlib import Path
+import subprocess
+import sys
+import time
+from typing import Final
+
+
+_PROC_PATH: Final = Path("/proc")
+_RUSAGE_BLOCK_SIZE: Final = 512
+# Value of '/proc/<pid>/clear_refs' which resets peak resident memory of the process
+_CLEAR_PEAK_RSS: Final = "5"
+
+
+def read_status_kb(pid: int, field: str) -> int | None:
+    try:
+        for line in (_PROC_PATH / str(pid) / "status").read_text().splitlines():
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return None
+
+
+def read_cpu_times(pid: int) -> tuple[float, float] | None:
+    try:
+        stat = (_PROC_PATH / str(pid) / "stat").read_text()
+        # Process name is in parentheses and may contain spaces, so fields are counted after it
+        fields = stat[stat.rindex(")") + 2:].split()
+        clock_ticks = os.sysconf("SC_CLK_TCK")
+        return int(fields[11]) / clock_ticks, int(fields[12]) / clock_ticks
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_io_counter(pid: int, field: str) -> int | None:
+    try:
+        for line in (_PROC_PATH / str(pid) / "io").read_text().splitlines():
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return None
+
+
+def reset_peak_rss(pid: int) -> bool:
+    try:
+        (_PROC_PATH / str(pid) / "clear_refs").write_text(_CLEAR_PEAK_RSS)
+    except OSError:
+        return False
+
+    return True
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ResourceUsage:
+    # Values which can't be measured on the platform are None
+    wall_time: float
+    user_time: float | None
+    system_time: float | None
+    peak_rss_kb: int | None
+    written_bytes: int | None
+
+    def __str__(self) -> str:
+        parts = [f"wall {self.wall_time:.3f}s"]
+
+        if self.user_time is not None and self.system_time is not None:
+            parts.append(f"user {self.user_time:.3f}s")
+            parts.append(f"system {self.system_time:.3f}s")
+        if self.peak_rss_kb is not None:
+            parts.append(f"peak RSS {self.peak_rss_kb / 1024:.1f} MB")
+        if self.written_bytes is not None:
+            parts.append(f"written {self.written_bytes / (1024 * 1024):.2f} MB")
+
+        return ", ".join(parts)
+
+
+def wait_with_resource_usage(process: subprocess.Popen, start_time: float) -> ResourceUsage:
+    # `start_time` is `time.perf_counter()` value taken before the process start
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return ResourceUsage(
+            wall_time=time.perf_counter() - start_time,
+            user_time=None,
+            system_time=None,
+            peak_rss_kb=None,
+            written_bytes=None,
+        )
+
+    written_bytes = None
+
+    if hasattr(os, "waitid"):
+        # Exited process keeps its I/O counters until it is reaped
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        written_bytes = read_io_counter(process.pid, "write_bytes")
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start_time
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    return ResourceUsage(
+        wall_time=wall_time,
+        user_time=rusage.ru_utime,
+        system_time=rusage.ru_stime,
+        # Peak resident memory is reported in bytes on macOS and in kilobytes elsewhere
+        peak_rss_kb=rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss,
+        written_bytes=written_bytes if written_bytes is not None else rusage.ru_oublock * _RUSAGE_BLOCK_SIZE,
+    )
+
+
+class ProcessResourceMeter:
+    # Peak resident memory is reset at enter, where the kernel doesn't allow it the peak covers the whole process run
+    def __init__(self, pid: int) -> None:
+        self.__pid = pid
+        self.__start_time = 0.0
+        self.__start_cpu_times: tuple[float, float] | None = None
+        self.__start_written_bytes: int | None = None
+        self.__usage: ResourceUsage | None = None
+
+    @property
+    def usage(self) -> ResourceUsage | None:
+        return self.__usage
+
+    def __enter__(self) -> ProcessResourceMeter:
+        reset_peak_rss(self.__pid)
+        self.__start_cpu_times = read_cpu_times(self.__pid)
+        self.__start_written_bytes = read_io_counter(self.__pid, "write_bytes")
+        self.__start_time = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        wall_time = time.perf_counter() - self.__start_time
+        cpu_times = read_cpu_times(self.__pid)
+        written_bytes = read_io_counter(self.__pid, "write_bytes")
+
+        if cpu_times is not None and self.__start_cpu_times is not None:
+            user_time, system_time = (end - start for end, start in zip(cpu_times, self.__start_cpu_times))
+        else:
+            user_time = system_time = None
+
+        self.__usage = ResourceUsage(
+            wall_time=wall_time,
+            user_time=user_time,
+            system_time=system_time,
+            peak_rss_kb=read_status_kb(self.__pid, "VmHWM"),
+            written_bytes=(
+                written_bytes - self.__start_written_bytes
+                if written_bytes is not None and self.__start_written_bytes is not None
+                else None
+            ),
+        )
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+from pathlib import Path
+import signal
+import subprocess
+import sys
+import time
+from typing import Final, Iterable, Sequence
+
+import _logging_tools
+import _output_capture
+
+
+_POLL_INTERVAL: Final = 0.2
+_STOP_TIMEOUT: Final = 10.0
+_MEMINFO_PATH: Final = Path("/proc/meminfo")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ResourceDemand:
+    memory_mb: int
+    cpus: float
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ResourceLimits:
+    memory_mb: int
+    cpus: float
+
+    @classmethod
+    def detect(cls) -> ResourceLimits:
+        return ResourceLimits(
+            memory_mb=_detect_available_memory_mb(),
+            cpus=float(os.cpu_count() or 1),
+        )
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TestBatch:
+    name: str
+    node_ids: tuple[str, ...]
+    demand: ResourceDemand
+    estimated_cost: float
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Shard:
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.index <= self.count:
+            raise ValueError(f"Shard index must be in range [1, {self.count}], got {self.index}")
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        index, separator, count = value.partition("/")
+
+        if not separator:
+            raise ValueError(f"Expected shard in format 'i/n', got '{value}'")
+
+        return Shard(index=int(index), count=int(count))
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+@dataclasses.dataclass(slots=True)
+class _RunningBatch:
+    batch: TestBatch
+    process: subprocess.Popen
+    output_capture: _output_capture.OutputCapture
+
+
+def _detect_available_memory_mb() -> int:
+    if _MEMINFO_PATH.exists():
+        for line in _MEMINFO_PATH.read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) // 1024
+
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return sys.maxsize
+
+
+def _fits(demand: ResourceDemand, running: Iterable[_RunningBatch], limits: ResourceLimits) -> bool:
+    used_memory_mb = sum(item.batch.demand.memory_mb for item in running)
+    used_cpus = sum(item.batch.demand.cpus for item in running)
+
+    return (
+        used_memory_mb + demand.memory_mb <= limits.memory_mb
+        and used_cpus + demand.cpus <= limits.cpus
+    )
+
+
+def _start_batch(batch: TestBatch, pytest_args: Sequence[str], cwd: Path, log: logging.Logger) -> _RunningBatch:
+    command = [sys.executable, "-m", "pytest", *batch.node_ids, *pytest_args]
+
+    log.info(f"Start batch '{batch.name}' ({len(batch.node_ids)} cells)")
+    log.debug(f"Command of batch '{batch.name}': {command}")
+
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+    # Output is streamed live in debug log only, the public log gets a summary of every batch
+    batch_log = _logging_tools.with_prefix(log, batch.name)
+    output_capture = _output_capture.start(
+        process.stdout,
+        batch.name,
+        line_handler=lambda line: batch_log.debug(line.decode("utf-8", errors="replace").rstrip("\r\n")),
+    )
+
+    return _RunningBatch(batch=batch, process=process, output_capture=output_capture)
+
+
+def _log_finished_batch(item: _RunningBatch, log: logging.Logger) -> None:
+    item.output_capture.join()
+    output = item.output_capture.get_text()
+    # Last line of pytest output is its summary, e.g. '=== 3 passed in 1.20s ==='
+    summary = next((line.strip("= ") for line in reversed(output.splitlines()) if line.strip()), "no output")
+
+    if item.process.returncode == 0:
+        log.info(f"Batch '{item.batch.name}' passed: {summary}")
+    else:
+        log.info(f"Batch '{item.batch.name}' failed with exit code {item.process.returncode}: {summary}\n{output}")
+
+
+def _stop_batches(running: Iterable[_RunningBatch], log: logging.Logger) -> None:
+    for item in running:
+        log.debug(f"Stop batch '{item.batch.name}'")
+
+        # Interrupted pytest runs fixture teardown, so the exporter JVMs of the worker are stopped too
+        if sys.platform == "win32":
+            item.process.terminate()
+        else:
+            item.process.send_signal(signal.SIGINT)
+
+    for item in running:
+        try:
+            item.process.wait(timeout=_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            item.process.kill()
+            item.process.wait()
+
+
+def select_shard(batches: Iterable[TestBatch], shard: Shard) -> list[TestBatch]:
+    # The most expensive batch goes to the cheapest shard first, ties are broken by name
+    # and shard index, so every CI node computes the same split
+    shard_batches: list[list[TestBatch]] = [[] for _ in range(shard.count)]
+    shard_costs = [0.0] * shard.count
+
+    for batch in sorted(batches, key=lambda batch: (-batch.estimated_cost, batch.name)):
+        cheapest_shard = min(range(shard.count), key=lambda index: (shard_costs[index], index))
+        shard_batches[cheapest_shard].append(batch)
+        shard_costs[cheapest_shard] += batch.estimated_cost
+
+    return shard_batches[shard.index - 1]
+
+
+def run_batches(
+    batches: Iterable[TestBatch],
+    pytest_args: Sequence[str],
+    *,
+    jobs: int,
+    limits: ResourceLimits,
+    cwd: Path,
+    log: logging.Logger,
+) -> int:
+    # A batch which doesn't fit the limits is still started when nothing else is running,
+    # so a single heavy batch can't block the whole run
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be positive, got {jobs}")
+
+    pending = sorted(batches, key=lambda batch: batch.estimated_cost, reverse=True)
+    running: list[_RunningBatch] = []
+    exit_code = 0
+
+    log.debug(f"Resource limits: {limits}")
+
+    with _logging_tools.log_action(log, f"Run {len(pending)} batches in {jobs} jobs"):
+        try:
+            while pending or running:
+                for batch in list(pending):
+                    if len(running) >= jobs:
+                        break
+
+                    if running and not _fits(batch.demand, running, limits):
+                        continue
+
+                    pending.remove(batch)
+                    running.append(_start_batch(batch, pytest_args, cwd, log))
+
+                for item in list(running):
+                    if item.process.poll() is None:
+                        continue
+
+                    running.remove(item)
+                    _log_finished_batch(item, log)
+
+                    if item.process.returncode != 0 and exit_code == 0:
+                        exit_code = item.process.returncode
+
+                time.sleep(_POLL_INTERVAL)
+        except BaseException:
+            # Workers are not left running (and holding exporter JVMs) after interruption
+            _stop_batches(running, log)
+            raise
+
+    return exit_code
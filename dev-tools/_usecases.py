@@ -1,9 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from datetime import datetime
 import itertools
+import json
 import logging
 from pathlib import Path
+import statistics
 import sys
-from typing import Final, Iterator
+import tempfile
+from typing import Final, Iterable, Iterator, Mapping
 
 import github
 import marko
@@ -11,14 +15,31 @@ import pytest
 
 import _parser.markdown
 
+import _change_impact
+import _cell_timings
+import _benchmark
+import _cached_downloader
 import _change_log_parser
 import _change_log
+import _exporter_factory
+import _exporter_release
 import _github
+import _integration_matrix
 import _logging_tools
+import _prepared_environments
+import _test_scheduler
+import _workspace_generator
 
 
 _CUR_DIR_PATH: Final = Path(__file__).parent
 _SYNTAX_PLUGIN_TEST_FILE_PATH: Final = _CUR_DIR_PATH / "tests" / "test_syntax_plugin.py"
+_SYNTAX_PLUGIN_TEST_FUNCTION: Final = "test_syntax_plugin"
+_SAMPLES_PLUGINS_DIR: Final = "plugins"
+
+_STRUCTURIZR_CLI_CELL_DEMAND: Final = _test_scheduler.ResourceDemand(memory_mb=768, cpus=1.0)
+_STRUCTURIZR_LITE_CELL_DEMAND: Final = _test_scheduler.ResourceDemand(memory_mb=1_536, cpus=2.0)
+_STRUCTURIZR_CLI_CELL_COST: Final = 1.0
+_STRUCTURIZR_LITE_CELL_COST: Final = 4.0
 
 
 @dataclass
@@ -45,6 +66,46 @@ class TestSyntaxPluginArgs:
     syntax_plugin_dist_path: Path
     java_path: Path
     samples_dir: Path
+    jobs: int
+    exporter_pool_size: int
+    exporter_options: _exporter_factory.ExporterOptions
+    use_result_cache: bool
+    affected_only: bool
+    shard: _test_scheduler.Shard | None
+
+
+@dataclass
+class TimingsReportArgs:
+    runs: int
+    slowest: int
+    regression_threshold: float
+    regression_min_difference: float
+
+
+@dataclass
+class WeavingReportArgs:
+    benchmark_report: Path
+
+
+@dataclass
+class BenchmarkArgs:
+    syntax_plugin_dist_path: Path
+    java_path: Path
+    samples_dir: Path
+    iterations: int
+    cold_iterations: int
+    warmup_iterations: int
+    exporter_options: _exporter_factory.ExporterOptions
+    exporter_types: tuple[str, ...]
+    plugin_variants: tuple[str, ...]
+    releases: tuple[str, ...]
+    workspaces: tuple[Path, ...]
+    generated_services: tuple[int, ...]
+    services_per_system: int
+    output: Path | None
+    baseline: Path | None
+    save_baseline: Path | None
+    regression_thresholds: _benchmark.RegressionThresholds
 
 
 class ValidationIssueError(Exception):
@@ -55,6 +116,14 @@ class ValidationIssueError(Exception):
         )
 
 
+class BenchmarkRegressionError(Exception):
+    def __init__(self, regressions: list[_benchmark.BenchmarkRegression]) -> None:
+        self.regressions = regressions
+        super().__init__(
+            f"Benchmark regressed against baseline: [\n\t{',\n\t'.join(str(regression) for regression in regressions)}\n]"
+        )
+
+
 class IssueNotFoundError(Exception):
     def __init__(self, issue_id: int) -> None:
         super().__init__(
@@ -221,15 +290,426 @@ def validate_issue_added(args: ValidateIssueAddedArgs, log: logging.Logger) -> N
     log.info(f"Linked issue states are valid")
 
 
+def _get_test_node_id(test_config: _integration_matrix.TestConfiguration) -> str:
+    return f"{_SYNTAX_PLUGIN_TEST_FILE_PATH}::{_SYNTAX_PLUGIN_TEST_FUNCTION}[{test_config.param_id}]"
+
+
+def _get_default_cell_cost(exporter_release: _exporter_release.ExporterRelease) -> tuple[_test_scheduler.ResourceDemand, float]:
+    match exporter_release:
+        case _exporter_release.StructurizrCliRelease():
+            return _STRUCTURIZR_CLI_CELL_DEMAND, _STRUCTURIZR_CLI_CELL_COST
+        case _exporter_release.StructurizrLiteRelease():
+            return _STRUCTURIZR_LITE_CELL_DEMAND, _STRUCTURIZR_LITE_CELL_COST
+
+
+def _get_test_batches(
+    test_configs: Iterable[_integration_matrix.TestConfiguration],
+    cell_durations: Mapping[str, float],
+) -> list[_test_scheduler.TestBatch]:
+    # Cells without history are estimated by the mean duration of their exporter type
+    grouped_configs: dict[object, list[_integration_matrix.TestConfiguration]] = {}
+    type_durations: dict[type, list[float]] = {}
+
+    for test_config in test_configs:
+        grouped_configs.setdefault(test_config.exporter_config, []).append(test_config)
+
+    for test_config in _integration_matrix.TEST_CONFIGS:
+        if (duration := cell_durations.get(test_config.param_id)) is not None:
+            type_durations.setdefault(type(test_config.exporter_config.exporter_release), []).append(duration)
+
+    batches: list[_test_scheduler.TestBatch] = []
+
+    for exporter_config, configs in grouped_configs.items():
+        demand, cell_cost = _get_default_cell_cost(exporter_config.exporter_release)
+
+        if known_durations := type_durations.get(type(exporter_config.exporter_release)):
+            cell_cost = statistics.mean(known_durations)
+
+        batches.append(
+            _test_scheduler.TestBatch(
+                name=str(exporter_config),
+                node_ids=tuple(_get_test_node_id(config) for config in configs),
+                demand=demand,
+                estimated_cost=sum(cell_durations.get(config.param_id, cell_cost) for config in configs),
+            )
+        )
+
+    return batches
+
+
+def _select_affected_test_configs(
+    test_configs: Iterable[_integration_matrix.TestConfiguration],
+    args: TestSyntaxPluginArgs,
+    log: logging.Logger,
+) -> list[_integration_matrix.TestConfiguration]:
+    passed_cells_store = _change_impact.PassedCellsStore(log, _integration_matrix.PASSED_CELLS_STORE_PATH)
+    passed_cells_store.compact()
+    passed_fingerprints = passed_cells_store.load()
+
+    syntax_plugin_dist = _integration_matrix.PatternSyntaxPluginDistributive.from_dist_directory(args.syntax_plugin_dist_path)
+    calculator = _change_impact.FingerprintCalculator(
+        _exporter_factory.get_exporter_fingerprint(args.java_path, args.exporter_options)
+    )
+    affected_configs: list[_integration_matrix.TestConfiguration] = []
+
+    for test_config in test_configs:
+        fingerprint = _integration_matrix.get_cell_fingerprint(
+            calculator,
+            test_config,
+            syntax_plugin_dist,
+            args.samples_dir,
+            _integration_matrix.DATA_DIR_PATH,
+        )
+
+        if passed_fingerprints.get(test_config.param_id) != fingerprint:
+            log.debug(f"Cell '{test_config.param_id}' is affected")
+            affected_configs.append(test_config)
+
+    return affected_configs
+
+
 def test_syntax_plugin(args: TestSyntaxPluginArgs, log: logging.Logger) -> None:
-    sys.exit(pytest.main([
-        str(_SYNTAX_PLUGIN_TEST_FILE_PATH),
+    pytest_args = [
         f'--plugin-dist={args.syntax_plugin_dist_path.absolute()}',
         f'--java-path={args.java_path.absolute()}',
         f'--samples-dir={args.samples_dir.absolute()}',
+        *_exporter_factory.get_exporter_option_args(args.exporter_options),
+        f'--exporter-pool-size={args.exporter_pool_size}',
+        f'--run-id={_cell_timings.new_run_id()}',
         '--verbose',
         '--log-cli-level=DEBUG',
-    ]))
+    ]
+
+    if args.use_result_cache:
+        pytest_args.append('--use-result-cache')
+
+    test_configs = list(_integration_matrix.TEST_CONFIGS)
+    test_node_ids = [str(_SYNTAX_PLUGIN_TEST_FILE_PATH)]
+
+    if args.affected_only:
+        with _logging_tools.log_action(log, "Select affected test cells"):
+            test_configs = _select_affected_test_configs(test_configs, args, log)
+            test_node_ids = [_get_test_node_id(test_config) for test_config in test_configs]
+
+        if not test_configs:
+            log.info("No test cells are affected by changes")
+            sys.exit(0)
+
+        log.info(f"{len(test_configs)} of {len(_integration_matrix.TEST_CONFIGS)} test cells are affected by changes")
+
+    cell_durations = _cell_timings.CellTimingsStore(log, _integration_matrix.CELL_TIMINGS_STORE_PATH).load_durations()
+    test_batches = _get_test_batches(test_configs, cell_durations)
+
+    if args.shard is not None:
+        test_batches = _test_scheduler.select_shard(test_batches, args.shard)
+        test_node_ids = [node_id for batch in test_batches for node_id in batch.node_ids]
+
+        if not test_node_ids:
+            log.info(f"No test cells in shard {args.shard}")
+            sys.exit(0)
+
+        log.info(
+            f"Shard {args.shard}: {len(test_node_ids)} test cells, "
+            f"estimated cost {sum(batch.estimated_cost for batch in test_batches):.1f}"
+        )
+
+    if args.jobs == 1:
+        sys.exit(pytest.main([*test_node_ids, *pytest_args]))
+
+    sys.exit(
+        _test_scheduler.run_batches(
+            test_batches,
+            pytest_args,
+            jobs=args.jobs,
+            limits=_test_scheduler.ResourceLimits.detect(),
+            cwd=_CUR_DIR_PATH,
+            log=log,
+        )
+    )
+
+
+def _generate_benchmark_workspaces(
+    args: BenchmarkArgs,
+    output_dir: Path,
+    log: logging.Logger,
+) -> dict[Path, _workspace_generator.WorkspaceStats]:
+    if not args.generated_services:
+        return {}
+
+    # Generated workspaces call patterns from the plugins of the samples directory
+    plugins_path = args.samples_dir / _SAMPLES_PLUGINS_DIR
+    if plugins_path.is_dir():
+        _prepared_environments.clone_tree(plugins_path, output_dir / _SAMPLES_PLUGINS_DIR)
+
+    generated_workspaces: dict[Path, _workspace_generator.WorkspaceStats] = {}
+
+    for services in args.generated_services:
+        shape = _workspace_generator.WorkspaceShape(services, args.services_per_system)
+        workspace = _workspace_generator.generate_workspace(shape)
+
+        workspace_path = output_dir / shape.name
+        workspace_path.write_text(workspace.dsl, encoding="utf-8")
+        generated_workspaces[workspace_path] = workspace.stats
+
+        log.info(
+            f"Generated '{shape.name}': {workspace.stats.elements} elements, "
+            f"{workspace.stats.pattern_calls} pattern calls, {workspace.stats.size_bytes} bytes"
+        )
+
+    return generated_workspaces
+
+
+def _get_benchmark_cases(args: BenchmarkArgs, generated_workspace_paths: Iterable[Path]) -> list[_benchmark.BenchmarkCase]:
+    syntax_plugin_dist = _integration_matrix.PatternSyntaxPluginDistributive.from_dist_directory(args.syntax_plugin_dist_path)
+    test_configs = _integration_matrix.TEST_CONFIGS
+
+    exporter_configs = list(dict.fromkeys(test_config.exporter_config for test_config in test_configs))
+    workspace_paths = [
+        *(args.workspaces or dict.fromkeys(test_config.workspace_path for test_config in test_configs)),
+        *generated_workspace_paths,
+    ]
+
+    cases: list[_benchmark.BenchmarkCase] = []
+
+    for exporter_config in exporter_configs:
+        description = _benchmark.describe_exporter_config(exporter_config)
+
+        if args.exporter_types and description["exporter_type"] not in args.exporter_types:
+            continue
+        if args.plugin_variants and description["plugin_variant"] not in args.plugin_variants:
+            continue
+        if args.releases and description["release"] not in args.releases:
+            continue
+
+        for workspace_path in workspace_paths:
+            cases.append(
+                _benchmark.BenchmarkCase(
+                    exporter_config=exporter_config,
+                    syntax_plugin_path=_integration_matrix.get_syntax_plugin_path(exporter_config, syntax_plugin_dist),
+                    workspace_path=args.samples_dir / workspace_path,
+                )
+            )
+
+    return cases
+
+
+def benchmark_exporters(args: BenchmarkArgs, log: logging.Logger) -> None:
+    # Recorded runs are slower, so they are not comparable with the baseline
+    if args.exporter_options.flight_recordings_dir is not None and (args.baseline or args.save_baseline) is not None:
+        raise ValueError("Benchmark with flight recordings can't be compared with the baseline or saved as one")
+
+    settings = _benchmark.BenchmarkSettings(
+        iterations=args.iterations,
+        cold_iterations=args.cold_iterations,
+        warmup_iterations=args.warmup_iterations,
+        options=args.exporter_options,
+    )
+
+    with tempfile.TemporaryDirectory() as generated_dir:
+        generated_workspaces = _generate_benchmark_workspaces(args, Path(generated_dir), log)
+
+        cases = _get_benchmark_cases(args, generated_workspaces)
+        if not cases:
+            raise ValueError("No benchmark cases match the given filters")
+
+        benchmark = _benchmark.ExporterBenchmark(
+            downloader=_cached_downloader.CachedDownloader(log, _integration_matrix.DOWNLOAD_CACHE_PATH),
+            environments=_prepared_environments.PreparedEnvironmentCache(log, _integration_matrix.ENVIRONMENTS_CACHE_PATH),
+            java_path=args.java_path,
+            log=log,
+            settings=settings,
+        )
+
+        with _logging_tools.log_action(log, f"Run {len(cases)} benchmark cases"):
+            results = benchmark.run(cases)
+
+    report = json.dumps(
+        {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "settings": {
+                "iterations": settings.iterations,
+                "cold_iterations": settings.cold_iterations,
+                "warmup_iterations": settings.warmup_iterations,
+                "cli_backend": str(settings.options.cli_backend),
+                "lite_staging_mode": str(settings.options.lite_staging_mode),
+                "class_data_sharing": settings.options.class_data_sharing,
+                "jvm_profiles": {
+                    profile.name: list(profile.java_options)
+                    for profile in (settings.options.cli_jvm_profile, settings.options.lite_jvm_profile)
+                },
+                "flight_recordings_dir": str(settings.options.flight_recordings_dir) if settings.options.flight_recordings_dir else None,
+            },
+            "generated_workspaces": {
+                path.name: asdict(stats) for path, stats in generated_workspaces.items()
+            },
+            "results": [result.to_json() for result in results],
+        },
+        indent=2,
+    )
+
+    _log_scaling(results, {path.name: stats for path, stats in generated_workspaces.items()}, log)
+
+    if args.output is None:
+        log.info(report)
+    else:
+        args.output.write_text(report + "\n", encoding="utf-8")
+        log.info(f"Benchmark results are saved to '{args.output}'")
+
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(report + "\n", encoding="utf-8")
+        log.info(f"Benchmark baseline is saved to '{args.save_baseline}'")
+        return
+
+    if args.baseline is None:
+        return
+
+    _check_benchmark_baseline(results, args.baseline, args.regression_thresholds, log)
+
+
+def _load_benchmark_results(report_path: Path) -> list[_benchmark.BenchmarkResult]:
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    return [_benchmark.BenchmarkResult.from_json(result) for result in report["results"]]
+
+
+def _format_latency(stats: _benchmark.LatencyStats | None) -> str:
+    return f"{stats.p50:.3f}s" if stats is not None else "-"
+
+
+def _format_memory(memory_mb: float | None) -> str:
+    return f"{memory_mb:.0f}MB" if memory_mb is not None else "-"
+
+
+def _format_difference(difference: float | None, baseline: float | None, unit: str) -> str:
+    if difference is None or baseline is None:
+        return "-"
+
+    relative = f" ({difference / baseline:+.0%})" if baseline else ""
+    return f"{difference:+.3f}{unit}{relative}" if unit == "s" else f"{difference:+.0f}{unit}{relative}"
+
+
+def report_weaving_overhead(args: WeavingReportArgs, log: logging.Logger) -> None:
+    overheads = _benchmark.find_weaving_overheads(_load_benchmark_results(args.benchmark_report))
+
+    if not overheads:
+        log.info("No pairs of lite and standalone plugin results in the benchmark report")
+        return
+
+    for (exporter_type, release, jvm_profile, workspace), workspace_overheads in itertools.groupby(
+        overheads,
+        key=lambda overhead: (overhead.exporter_type, overhead.release, overhead.jvm_profile, overhead.workspace),
+    ):
+        workspace_overheads = list(workspace_overheads)
+        standalone = workspace_overheads[0].standalone
+
+        log.info(f"{exporter_type} {release} (JVM profile '{jvm_profile}'), '{workspace}':")
+        log.info(
+            f"\t- standalone: cold p50 {_format_latency(standalone.cold)}, "
+            f"warm p50 {_format_latency(standalone.warm)}, peak memory {_format_memory(standalone.peak_memory_mb)}"
+            + (" (export failed)" if standalone.export_failed else "")
+        )
+
+        for overhead in workspace_overheads:
+            log.info(
+                f"\t- jweaver {overhead.jweaver}: "
+                f"cold {_format_difference(overhead.cold_latency, standalone.cold and standalone.cold.p50, 's')}, "
+                f"warm {_format_difference(overhead.warm_latency, standalone.warm and standalone.warm.p50, 's')}, "
+                f"memory {_format_difference(overhead.peak_memory_mb, standalone.peak_memory_mb, 'MB')}"
+                + (" (export failed)" if overhead.woven.export_failed else "")
+            )
+
+    cheapest_jweavers = _benchmark.find_cheapest_jweavers(overheads)
+
+    log.info("Cheapest plugin variants:")
+    for (exporter_type, release, jvm_profile), candidate in sorted(cheapest_jweavers.items()):
+        log.info(
+            f"\t- {exporter_type} {release} (JVM profile '{jvm_profile}'): "
+            + (f"jweaver {candidate.jweaver}" if candidate.jweaver is not None else "standalone")
+            + f", total p50 {candidate.latency:.3f}s, peak memory {_format_memory(candidate.peak_memory_mb)}"
+        )
+
+
+def _log_scaling(
+    results: list[_benchmark.BenchmarkResult],
+    generated_workspaces: Mapping[str, _workspace_generator.WorkspaceStats],
+    log: logging.Logger,
+) -> None:
+    for result in sorted(results, key=lambda result: result.key):
+        if (stats := generated_workspaces.get(result.workspace)) is None:
+            continue
+
+        log.info(
+            f"{result.key}: {stats.elements} elements, {stats.pattern_calls} pattern calls -> "
+            f"warm p50 {_format_latency(result.warm)}, cold p50 {_format_latency(result.cold)}, "
+            f"peak memory {_format_memory(result.peak_memory_mb)}"
+            + (" (export failed)" if result.export_failed else "")
+        )
+
+
+def _check_benchmark_baseline(
+    results: list[_benchmark.BenchmarkResult],
+    baseline_path: Path,
+    thresholds: _benchmark.RegressionThresholds,
+    log: logging.Logger,
+) -> None:
+    baseline_results = _load_benchmark_results(baseline_path)
+
+    baseline_keys = {result.key for result in baseline_results}
+    for result in results:
+        if result.key not in baseline_keys:
+            log.info(f"Case '{result.key}' is not in the baseline, skip it")
+
+    regressions = _benchmark.compare_with_baseline(results, baseline_results, thresholds)
+    if regressions:
+        raise BenchmarkRegressionError(regressions)
+
+    log.info(f"No regressions against baseline '{baseline_path}'")
+
+
+def _format_phases(phases: Mapping[str, float]) -> str:
+    return ", ".join(f"{phase}={duration:.2f}s" for phase, duration in sorted(phases.items())) or "-"
+
+
+def report_cell_timings(args: TimingsReportArgs, log: logging.Logger) -> None:
+    store = _cell_timings.CellTimingsStore(log, _integration_matrix.CELL_TIMINGS_STORE_PATH)
+
+    with _logging_tools.log_action(log, "Load cell timings"):
+        runs = _cell_timings.group_by_run(store.load())
+
+    if not runs:
+        log.info("No cell timings recorded yet")
+        return
+
+    log.info(f"Last {min(args.runs, len(runs))} of {len(runs)} runs:")
+    for run_id, run_timings in list(runs.items())[-args.runs:]:
+        summary = _cell_timings.summarize_run(run_id, run_timings)
+        log.info(
+            f"\t- {summary.run_id} ({datetime.fromtimestamp(summary.started_at):%Y-%m-%d %H:%M}): "
+            f"{summary.cells_count} cells, {summary.failed_count} failed, wall time {summary.duration:.2f}s "
+            f"[{_format_phases(summary.phases)}]"
+        )
+
+    last_run_id, last_run_timings = list(runs.items())[-1]
+
+    log.info(f"Slowest cells of run {last_run_id}:")
+    for timing in _cell_timings.find_slowest_cells(last_run_timings, args.slowest):
+        log.info(f"\t- {timing.duration:.2f}s {timing.cell_id} [{_format_phases(timing.phases)}]")
+
+    regressions = _cell_timings.find_regressions(
+        runs,
+        threshold=args.regression_threshold,
+        min_difference=args.regression_min_difference,
+    )
+
+    if not regressions:
+        log.info(f"No regressions in run {last_run_id}")
+        return
+
+    log.info(f"Regressions in run {last_run_id}:")
+    for regression in regressions:
+        log.info(
+            f"\t- {regression.cell_id}: {regression.baseline_duration:.2f}s -> {regression.duration:.2f}s "
+            f"(x{regression.slowdown:.2f})"
+        )
 
 
 __all__ = [
@@ -237,10 +717,17 @@ __all__ = [
     "validate_issues",
     "validate_issue_added",
     "test_syntax_plugin",
+    "report_cell_timings",
+    "benchmark_exporters",
+    "report_weaving_overhead",
     "ValidateStructureArgs",
     "ValidateIssuesArgs",
     "ValidateIssueAddedArgs",
     "TestSyntaxPluginArgs",
+    "TimingsReportArgs",
+    "WeavingReportArgs",
+    "BenchmarkArgs",
+    "BenchmarkRegressionError",
     "ValidationIssueError",
     "IssueNotFoundError",
 ]
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import json.decoder
+import json.scanner
+from pathlib import Path
+import re
+from typing import IO, Any, Final, Iterator
+
+
+type JsonPath = tuple[str | int, ...]
+
+_DEFAULT_DIFFERENCES_LIMIT: Final = 10
+_READ_CHUNK_SIZE: Final = 64 * 1024
+_IDENTIFIER_PATTERN: Final = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_WHITESPACE_PATTERN: Final = re.compile(r"[ \t\n\r]*")
+_SCALAR_PATTERN: Final = re.compile(r'[^ \t\n\r{}\[\],:"]*')
+_LITERALS: Final = {"true": True, "false": False, "null": None}
+_PUNCTUATION: Final = frozenset("{}[],:")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class IgnoreRule:
+    path: tuple[str, ...]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ReplaceRule:
+    path: tuple[str, ...]
+    value: Any
+
+
+type NormalizationRule = IgnoreRule | ReplaceRule
+
+
+WORKSPACE_NORMALIZATION_RULES: Final[tuple[NormalizationRule, ...]] = (
+    IgnoreRule(("lastModifiedDate",)),
+    ReplaceRule(("id",), 0),
+    IgnoreRule(("views", "configuration", "lastSavedView")),
+)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Difference:
+    path: str
+    description: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.description}"
+
+
+class _LimitReached(Exception):
+    pass
+
+
+def format_path(path: JsonPath) -> str:
+    parts = ["$"]
+
+    for item in path:
+        if isinstance(item, int):
+            parts.append(f"[{item}]")
+        elif _IDENTIFIER_PATTERN.fullmatch(item):
+            parts.append(f".{item}")
+        else:
+            parts.append(f"[{json.dumps(item)}]")
+
+    return "".join(parts)
+
+
+def normalize_workspace(workspace: dict[str, Any], rules: tuple[NormalizationRule, ...] = WORKSPACE_NORMALIZATION_RULES) -> None:
+    for rule in rules:
+        *parent_path, key = rule.path
+        parent = workspace
+
+        for item in parent_path:
+            parent = parent.get(item)
+            if not isinstance(parent, dict):
+                break
+        else:
+            match rule:
+                case IgnoreRule():
+                    parent.pop(key, None)
+                case ReplaceRule(value=value):
+                    if key in parent:
+                        parent[key] = value
+
+
+def _describe(value: Any) -> str:
+    match value:
+        case dict():
+            return "object"
+        case list():
+            return "array"
+        case _:
+            return json.dumps(value)
+
+
+class _DifferenceCollector:
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError(f"Differences limit must be positive, got {limit}")
+
+        self.__limit = limit
+        self.differences: list[Difference] = []
+
+    def add(self, path: JsonPath, description: str) -> None:
+        self.differences.append(Difference(format_path(path), description))
+
+        if len(self.differences) >= self.__limit:
+            raise _LimitReached()
+
+    def add_mismatch(self, path: JsonPath, actual: Any, expected: Any) -> None:
+        self.add(path, f"expected {_describe(expected)}, got {_describe(actual)}")
+
+    def add_missing(self, path: JsonPath) -> None:
+        self.add(path, "missing in exported workspace")
+
+    def add_unexpected(self, path: JsonPath) -> None:
+        self.add(path, "unexpected in exported workspace")
+
+
+def _compare_values(actual: Any, expected: Any, path: JsonPath, collector: _DifferenceCollector) -> None:
+    # Equal subtrees are compared natively, so only differing ones are walked
+    if type(actual) is type(expected) and actual == expected:
+        return
+
+    match actual, expected:
+        case dict(), dict():
+            for key, expected_value in expected.items():
+                if key in actual:
+                    _compare_values(actual[key], expected_value, (*path, key), collector)
+                else:
+                    collector.add_missing((*path, key))
+
+            for key in actual.keys() - expected.keys():
+                collector.add_unexpected((*path, key))
+
+        case list(), list():
+            for index, (actual_item, expected_item) in enumerate(zip(actual, expected)):
+                _compare_values(actual_item, expected_item, (*path, index), collector)
+
+            for index in range(len(actual), len(expected)):
+                collector.add_missing((*path, index))
+
+            for index in range(len(expected), len(actual)):
+                collector.add_unexpected((*path, index))
+
+        case _:
+            if actual != expected:
+                collector.add_mismatch(path, actual, expected)
+
+
+def find_differences(actual: Any, expected: Any, *, limit: int = _DEFAULT_DIFFERENCES_LIMIT) -> list[Difference]:
+    collector = _DifferenceCollector(limit)
+
+    try:
+        _compare_values(actual, expected, (), collector)
+    except _LimitReached:
+        pass
+
+    return collector.differences
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _Punctuation:
+    char: str
+
+
+_END: Final = object()
+
+
+class _JsonTokenizer:
+    def __init__(self, file: IO[str], chunk_size: int = _READ_CHUNK_SIZE) -> None:
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__buffer = ""
+        self.__position = 0
+        self.__eof = False
+
+    def __iter__(self) -> Iterator[object]:
+        while (token := self.__next_token()) is not _END:
+            yield token
+
+    def __read_more(self) -> bool:
+        if self.__eof:
+            return False
+
+        chunk = self.__file.read(self.__chunk_size)
+        if not chunk:
+            self.__eof = True
+            return False
+
+        self.__buffer = self.__buffer[self.__position:] + chunk
+        self.__position = 0
+        return True
+
+    def __next_token(self) -> object:
+        while True:
+            self.__position = _WHITESPACE_PATTERN.match(self.__buffer, self.__position).end()
+
+            if self.__position < len(self.__buffer):
+                break
+
+            if not self.__read_more():
+                return _END
+
+        char = self.__buffer[self.__position]
+
+        if char in _PUNCTUATION:
+            self.__position += 1
+            return _Punctuation(char)
+
+        if char == '"':
+            return self.__read_string()
+
+        return self.__read_scalar()
+
+    def __read_string(self) -> str:
+        while True:
+            try:
+                value, end = json.decoder.scanstring(self.__buffer, self.__position + 1)
+            except json.JSONDecodeError:
+                if self.__read_more():
+                    continue
+                raise
+
+            self.__position = end
+            return value
+
+    def __read_scalar(self) -> Any:
+        # Token could be cut by the end of the chunk, so it is parsed only when followed by a delimiter
+        while (match := _SCALAR_PATTERN.match(self.__buffer, self.__position)).end() == len(self.__buffer):
+            if not self.__read_more():
+                break
+
+        token = match.group()
+
+        if token in _LITERALS:
+            self.__position = match.end()
+            return _LITERALS[token]
+
+        number = json.scanner.NUMBER_RE.fullmatch(token)
+        if number is None:
+            raise json.JSONDecodeError("Expecting value", self.__buffer, self.__position)
+
+        self.__position = match.end()
+        integer, fraction, exponent = number.groups()
+
+        if fraction or exponent:
+            return float(integer + (fraction or "") + (exponent or ""))
+
+        return int(integer)
+
+
+class _StreamComparator:
+    def __init__(self, tokens: Iterator[object], collector: _DifferenceCollector) -> None:
+        self.__tokens = tokens
+        self.__collector = collector
+        self.__pushed_back: object = _END
+
+    def compare(self, actual: Any, path: JsonPath) -> None:
+        token = self.__next()
+
+        match token:
+            case _Punctuation(char="{"):
+                self.__compare_object(actual, path)
+            case _Punctuation(char="["):
+                self.__compare_array(actual, path)
+            case _Punctuation():
+                raise ValueError(f"Unexpected '{token.char}' at {format_path(path)}")
+            case _:
+                if actual != token:
+                    self.__collector.add_mismatch(path, actual, token)
+
+    def __compare_object(self, actual: Any, path: JsonPath) -> None:
+        if not isinstance(actual, dict):
+            self.__collector.add_mismatch(path, actual, {})
+            self.__skip_container()
+            return
+
+        seen_keys = set()
+
+        for key in self.__iterate_container("}"):
+            if not isinstance(key, str):
+                raise ValueError(f"Expected object key at {format_path(path)}")
+
+            self.__expect(":")
+            seen_keys.add(key)
+
+            if key in actual:
+                self.compare(actual[key], (*path, key))
+            else:
+                self.__collector.add_missing((*path, key))
+                self.__skip_value()
+
+        for key in actual.keys() - seen_keys:
+            self.__collector.add_unexpected((*path, key))
+
+    def __compare_array(self, actual: Any, path: JsonPath) -> None:
+        if not isinstance(actual, list):
+            self.__collector.add_mismatch(path, actual, [])
+            self.__skip_container()
+            return
+
+        index = 0
+
+        for token in self.__iterate_container("]"):
+            self.__push_back(token)
+
+            if index < len(actual):
+                self.compare(actual[index], (*path, index))
+            else:
+                self.__collector.add_missing((*path, index))
+                self.__skip_value()
+
+            index += 1
+
+        for extra_index in range(index, len(actual)):
+            self.__collector.add_unexpected((*path, extra_index))
+
+    def __iterate_container(self, closing_char: str) -> Iterator[object]:
+        token = self.__next()
+
+        if token == _Punctuation(closing_char):
+            return
+
+        while True:
+            yield token
+
+            token = self.__next()
+            if token == _Punctuation(closing_char):
+                return
+
+            if token != _Punctuation(","):
+                raise ValueError(f"Expected ',' or '{closing_char}', got {token!r}")
+
+            token = self.__next()
+
+    def __skip_value(self) -> None:
+        match self.__next():
+            case _Punctuation(char="{" | "["):
+                self.__skip_container()
+            case _Punctuation(char=char):
+                raise ValueError(f"Unexpected '{char}'")
+            case _:
+                pass
+
+    def __skip_container(self) -> None:
+        depth = 1
+
+        while depth:
+            match self.__next():
+                case _Punctuation(char="{" | "["):
+                    depth += 1
+                case _Punctuation(char="}" | "]"):
+                    depth -= 1
+
+    def __expect(self, char: str) -> None:
+        token = self.__next()
+        if token != _Punctuation(char):
+            raise ValueError(f"Expected '{char}', got {token!r}")
+
+    def __push_back(self, token: object) -> None:
+        self.__pushed_back = token
+
+    def __next(self) -> object:
+        if (token := self.__pushed_back) is not _END:
+            self.__pushed_back = _END
+            return token
+
+        try:
+            return next(self.__tokens)
+        except StopIteration:
+            raise ValueError("Unexpected end of JSON document") from None
+
+
+def find_file_differences(
+    actual: Any,
+    expected_path: Path,
+    *,
+    limit: int = _DEFAULT_DIFFERENCES_LIMIT,
+    chunk_size: int = _READ_CHUNK_SIZE,
+) -> list[Difference]:
+    collector = _DifferenceCollector(limit)
+
+    with expected_path.open(encoding="utf-8") as file:
+        try:
+            _StreamComparator(iter(_JsonTokenizer(file, chunk_size)), collector).compare(actual, ())
+        except _LimitReached:
+            pass
+
+    return collector.differences
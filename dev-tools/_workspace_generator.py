@@ -0,0 +1,217 @@
+import dataclasses
+from typing import Final
+
+
+_INDENT: Final = "    "
+_DEFAULT_SERVICES_PER_SYSTEM: Final = 20
+# Saga always creates the view with the same key, so the workspace may contain only one call
+_MAX_SAGA_ITEMS: Final = 10
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class WorkspaceShape:
+    services: int
+    services_per_system: int = _DEFAULT_SERVICES_PER_SYSTEM
+
+    def __post_init__(self) -> None:
+        if self.services < 1:
+            raise ValueError(f"Expected at least one service, got {self.services}")
+        if self.services_per_system < 1:
+            raise ValueError(f"Expected at least one service per system, got {self.services_per_system}")
+
+    @property
+    def name(self) -> str:
+        return f"generated-{self.services}.dsl"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class WorkspaceStats:
+    software_systems: int
+    elements: int
+    relationships: int
+    pattern_calls: int
+    size_bytes: int
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GeneratedWorkspace:
+    dsl: str
+    stats: WorkspaceStats
+
+
+class _DslWriter:
+    def __init__(self) -> None:
+        self.__lines: list[str] = []
+        self.__depth = 0
+
+        self.elements = 0
+        self.relationships = 0
+        self.pattern_calls = 0
+
+    def line(self, text: str = "") -> None:
+        self.__lines.append(f"{_INDENT * self.__depth}{text}" if text else "")
+
+    def open(self, header: str) -> None:
+        self.line(f"{header} {{")
+        self.__depth += 1
+
+    def close(self) -> None:
+        self.__depth -= 1
+        self.line("}")
+
+    def element(self, identifier: str, declaration: str) -> None:
+        self.line(f"{identifier} = {declaration}")
+        self.elements += 1
+
+    def relationship(self, source: str, destination: str, description: str) -> None:
+        self.line(f'{source} -> {destination} "{description}"')
+        self.relationships += 1
+
+    def pattern(self, name: str, arguments: list[tuple[str, str]]) -> None:
+        self.open(f"$pattern {name}")
+        width = max(len(key) for key, _ in arguments)
+
+        for key, value in arguments:
+            self.line(f"{key.ljust(width)}  {value}")
+
+        self.close()
+        self.pattern_calls += 1
+
+    def build(self) -> str:
+        return "\n".join(self.__lines) + "\n"
+
+
+def _get_system_sizes(shape: WorkspaceShape) -> list[int]:
+    full_systems, rest_services = divmod(shape.services, shape.services_per_system)
+    return [shape.services_per_system] * full_systems + ([rest_services] if rest_services else [])
+
+
+def _write_system(writer: _DslWriter, system_index: int, services_count: int, with_saga: bool) -> None:
+    prefix = f"s{system_index}"
+    frontend, registry, orchestrator = f"{prefix}_web", f"{prefix}_registry", f"{prefix}_orchestrator"
+    services = [f"{prefix}_svc{index}" for index in range(services_count)]
+    databases = [f"{prefix}_db{index}" for index in range(services_count)]
+
+    writer.open(f'{prefix} = softwareSystem "System {system_index}"')
+    writer.elements += 1
+
+    writer.element(frontend, 'container "Web Application"')
+    writer.element(registry, 'container "Service Registry"')
+    writer.element(orchestrator, 'container "Saga Orchestrator"')
+
+    for index, (service, database) in enumerate(zip(services, databases)):
+        writer.element(service, f'container "Service {index}"')
+        writer.element(database, f'container "Database {index}"')
+
+    writer.line()
+    writer.relationship("user", frontend, "Uses")
+
+    for index, service in enumerate(services):
+        writer.relationship(frontend, service, f"Calls service {index}")
+
+        if index + 1 < len(services):
+            writer.relationship(service, services[index + 1], f"Requests service {index + 1}")
+
+    for service, database in zip(services, databases):
+        writer.line()
+        writer.pattern(
+            "DatabasePerService",
+            [("service", service), ("database", database), ("dataDescription", f'"{service} data"')],
+        )
+
+    writer.line()
+    writer.pattern(
+        "ServiceRegistry",
+        [
+            ("registry", registry),
+            ("connectedServices", ",".join(services)),
+            *(
+                argument
+                for index in range(len(services) - 1)
+                for argument in (
+                    (f"query.{index}.source", services[index]),
+                    (f"query.{index}.destination", services[index + 1]),
+                )
+            ),
+        ],
+    )
+
+    writer.line()
+    writer.pattern("ReverseProxy", [("target", frontend)])
+
+    if with_saga:
+        writer.line()
+        writer.pattern(
+            "Saga",
+            [
+                ("orchestrator", orchestrator),
+                *(
+                    argument
+                    for index, service in enumerate(services[:_MAX_SAGA_ITEMS])
+                    for argument in (
+                        (f"item.{index}.service", service),
+                        (f"item.{index}.command", f'"Step {index}"'),
+                        (f"item.{index}.onError", f'"Compensate step {index}"'),
+                    )
+                ),
+            ],
+        )
+
+    # Layers are validated against relationships existing at the call, so it goes last
+    writer.line()
+    writer.pattern(
+        "Layered",
+        [
+            ("layer.0.name", '"Frontend Layer"'),
+            ("layer.0.elements", frontend),
+            ("layer.1.name", '"Service Layer"'),
+            ("layer.1.elements", ",".join(services)),
+            ("layer.2.name", '"Database Layer"'),
+            ("layer.2.elements", ",".join(databases)),
+        ],
+    )
+
+    writer.close()
+
+
+def generate_workspace(shape: WorkspaceShape) -> GeneratedWorkspace:
+    # Workspace calls every pattern of the example plugins, the output is deterministic for the same shape
+    system_sizes = _get_system_sizes(shape)
+    writer = _DslWriter()
+
+    writer.open(f'workspace "Generated workspace with {shape.services} services"')
+    writer.open("model")
+    writer.element("user", 'person "User"')
+
+    for system_index, services_count in enumerate(system_sizes):
+        writer.line()
+        _write_system(writer, system_index, services_count, with_saga=system_index == 0)
+
+    writer.close()
+    writer.line()
+    writer.open("views")
+
+    for system_index in range(len(system_sizes)):
+        if system_index > 0:
+            writer.line()
+
+        writer.open(f"container s{system_index}")
+        writer.line("include *")
+        writer.line("autoLayout")
+        writer.close()
+
+    writer.close()
+    writer.close()
+
+    dsl = writer.build()
+
+    return GeneratedWorkspace(
+        dsl=dsl,
+        stats=WorkspaceStats(
+            software_systems=len(system_sizes),
+            elements=writer.elements,
+            relationships=writer.relationships,
+            pattern_calls=writer.pattern_calls,
+            size_bytes=len(dsl.encode("utf-8")),
+        ),
+    )
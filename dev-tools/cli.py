@@ -7,7 +7,10 @@ import sys
 import os
 from typing import Final, Union
 
+import _benchmark
+import _exporter_factory
 import _github
+import _test_scheduler
 import _usecases
 
 type _CommandArgs = Union[
@@ -15,6 +18,9 @@ type _CommandArgs = Union[
     _usecases.ValidateIssuesArgs,
     _usecases.ValidateIssueAddedArgs,
     _usecases.TestSyntaxPluginArgs,
+    _usecases.TimingsReportArgs,
+    _usecases.WeavingReportArgs,
+    _usecases.BenchmarkArgs,
 ]
 
 
@@ -37,6 +43,27 @@ class _LoggerNameFormatter(logging.Formatter):
         return f"{ct} [{record.levelname}] [{record.name}] {record.getMessage()}"
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Expected positive number, got {value}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"Expected non-negative number, got {value}")
+    return number
+
+
+def _shard(value: str) -> _test_scheduler.Shard:
+    try:
+        return _test_scheduler.Shard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
 def _init_validate_structure_parser(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "file",
@@ -127,6 +154,222 @@ def _init_integration_tests_parser(parser: argparse.ArgumentParser) -> None:
         help="Path to a directory with Structurizr workspace test samples",
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=1,
+        help="Number of worker processes used to run test cells in parallel",
+    )
+
+    parser.add_argument(
+        "--exporter-pool-size",
+        type=_positive_int,
+        default=1,
+        help="Number of prepared exporters kept alive by a test worker. Cells reuse exporters of the same configuration, "
+        "a larger pool keeps them for cells which don't run one after another at the cost of memory",
+    )
+
+    _exporter_factory.add_exporter_options(parser.add_argument)
+
+    parser.add_argument(
+        "--use-result-cache",
+        action="store_true",
+        default=False,
+        help="Replay cached export results of cells whose inputs have not changed instead of running exporters",
+    )
+
+    parser.add_argument(
+        "--affected-only",
+        action="store_true",
+        default=False,
+        help="Run only test cells whose inputs have changed since their last passed run. Passed runs are "
+        "recorded in the local '.cache' directory, so all cells are run where it is empty (e.g. on fresh CI runners)",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=_shard,
+        default=None,
+        help="Run only i-th of n parts of the test matrix ('i/n'), parts are balanced by historical cell durations",
+    )
+
+
+def _init_timings_report_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--runs",
+        type=_positive_int,
+        default=10,
+        help="Number of the last runs shown in the trend",
+    )
+
+    parser.add_argument(
+        "--slowest",
+        type=_positive_int,
+        default=10,
+        help="Number of the slowest cells of the last run to show",
+    )
+
+    parser.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown of a cell against its previous runs which is reported as regression",
+    )
+
+    parser.add_argument(
+        "--regression-min-difference",
+        type=float,
+        default=0.5,
+        help="Minimal slowdown in seconds which is reported as regression",
+    )
+
+
+def _init_weaving_report_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "benchmark_report",
+        type=Path,
+        help="Path to JSON file with results of 'bench' command run with lite and standalone plugin variants",
+    )
+
+
+def _init_bench_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--plugin-dist",
+        type=Path,
+        required=True,
+        help="Distributive directory with JAR archives of lite and standalone pattern-syntax-plugin versions",
+    )
+
+    parser.add_argument(
+        "--java-path",
+        type=Path,
+        required=True,
+        help="Path to java binary directory",
+    )
+
+    parser.add_argument(
+        "--samples-dir",
+        type=Path,
+        required=True,
+        help="Path to a directory with Structurizr workspace samples",
+    )
+
+    parser.add_argument(
+        "--workspace",
+        type=Path,
+        action="append",
+        default=[],
+        help="Workspace path relative to the samples directory, can be repeated (default: integration test samples)",
+    )
+
+    parser.add_argument(
+        "--generated-services",
+        type=_positive_int,
+        action="append",
+        default=[],
+        help=(
+            "Also benchmark a generated workspace with given number of services and pattern calls, "
+            "in addition to the selected or default workspaces, can be repeated to measure scaling"
+        ),
+    )
+
+    parser.add_argument(
+        "--services-per-system",
+        type=_positive_int,
+        default=20,
+        help="Number of services in every software system of generated workspaces",
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=_positive_int,
+        default=10,
+        help="Number of measured warm exports per workspace",
+    )
+
+    parser.add_argument(
+        "--cold-iterations",
+        type=_non_negative_int,
+        default=3,
+        help="Number of measured exports with a freshly created exporter per workspace",
+    )
+
+    parser.add_argument(
+        "--warmup-iterations",
+        type=_non_negative_int,
+        default=1,
+        help="Number of not measured exports before warm ones",
+    )
+
+    parser.add_argument(
+        "--exporter-type",
+        choices=("structurizr_cli", "structurizr_lite"),
+        action="append",
+        default=[],
+        help="Benchmark only given exporter types, can be repeated",
+    )
+
+    parser.add_argument(
+        "--plugin-variant",
+        choices=("lite", "standalone"),
+        action="append",
+        default=[],
+        help="Benchmark only given plugin variants, can be repeated",
+    )
+
+    parser.add_argument(
+        "--release",
+        action="append",
+        default=[],
+        help="Benchmark only given exporter release versions, can be repeated",
+    )
+
+    _exporter_factory.add_exporter_options(parser.add_argument)
+
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Path to JSON file with results (default: print to stdout)",
+    )
+
+    baseline_group = parser.add_mutually_exclusive_group()
+
+    baseline_group.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Path to JSON file with baseline results, the command fails if results regressed against it",
+    )
+
+    baseline_group.add_argument(
+        "--save-baseline",
+        type=Path,
+        default=None,
+        help="Path to JSON file to save the results into as a new baseline, instead of comparing with one",
+    )
+
+    parser.add_argument(
+        "--latency-threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative growth of median cold and warm latency (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative growth of peak memory of exporter processes (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--noise-factor",
+        type=float,
+        default=3.0,
+        help="Latency growth within this number of scaled median absolute deviations is treated as noise (default: %(default)s)",
+    )
+
 
 def _init_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Dev Tools CLI")
@@ -151,6 +394,24 @@ def _init_parser() -> argparse.ArgumentParser:
     )
     _init_integration_tests_parser(integration_test_parser)
 
+    timings_report_parser = subparsers.add_parser(
+        "timings-report",
+        help="Show timings of integration test cells recorded by previous runs",
+    )
+    _init_timings_report_parser(timings_report_parser)
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Measure cold and warm export latency of exporters",
+    )
+    _init_bench_parser(bench_parser)
+
+    weaving_report_parser = subparsers.add_parser(
+        "weaving-report",
+        help="Compare startup, export time and memory of the lite plugin per jweaver version with the standalone plugin",
+    )
+    _init_weaving_report_parser(weaving_report_parser)
+
     return parser
 
 
@@ -189,6 +450,47 @@ def _extract_command_args(args: argparse.Namespace) -> _CommandArgs:
                 syntax_plugin_dist_path=args.plugin_dist,
                 java_path=args.java_path,
                 samples_dir=args.samples_dir,
+                jobs=args.jobs,
+                exporter_pool_size=args.exporter_pool_size,
+                exporter_options=_exporter_factory.get_exporter_options(vars(args)),
+                use_result_cache=args.use_result_cache,
+                affected_only=args.affected_only,
+                shard=args.shard,
+            )
+        case "timings-report":
+            return _usecases.TimingsReportArgs(
+                runs=args.runs,
+                slowest=args.slowest,
+                regression_threshold=args.regression_threshold,
+                regression_min_difference=args.regression_min_difference,
+            )
+        case "weaving-report":
+            return _usecases.WeavingReportArgs(
+                benchmark_report=args.benchmark_report,
+            )
+        case "bench":
+            return _usecases.BenchmarkArgs(
+                syntax_plugin_dist_path=args.plugin_dist,
+                java_path=args.java_path,
+                samples_dir=args.samples_dir,
+                iterations=args.iterations,
+                cold_iterations=args.cold_iterations,
+                warmup_iterations=args.warmup_iterations,
+                exporter_options=_exporter_factory.get_exporter_options(vars(args)),
+                exporter_types=tuple(args.exporter_type),
+                plugin_variants=tuple(args.plugin_variant),
+                releases=tuple(args.release),
+                workspaces=tuple(args.workspace),
+                generated_services=tuple(args.generated_services),
+                services_per_system=args.services_per_system,
+                output=args.output,
+                baseline=args.baseline,
+                save_baseline=args.save_baseline,
+                regression_thresholds=_benchmark.RegressionThresholds(
+                    latency=args.latency_threshold,
+                    memory=args.memory_threshold,
+                    noise_factor=args.noise_factor,
+                ),
             )
         case _:
             raise ValueError(f"Unknown command: {args.command}")
@@ -251,6 +553,12 @@ def main(log: logging.Logger, args: _ParsedArgs) -> None:
             _usecases.validate_issue_added(args.command_args, log)
         case _usecases.TestSyntaxPluginArgs():
             _usecases.test_syntax_plugin(args.command_args, log)
+        case _usecases.TimingsReportArgs():
+            _usecases.report_cell_timings(args.command_args, log)
+        case _usecases.WeavingReportArgs():
+            _usecases.report_weaving_overhead(args.command_args, log)
+        case _usecases.BenchmarkArgs():
+            _usecases.benchmark_exporters(args.command_args, log)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,18 @@
+import logging
 from pathlib import Path
-from typing import Any
-from .helpers import PatternSyntaxPluginDistributive
+from typing import Any, Final, Generator
 
 import pytest
 
+import _cell_timings
+import _exporter_factory
+import _integration_matrix
+import _logging_tools
+
+
+_DEFAULT_RUN_ID: Final = _cell_timings.new_run_id()
+_PHASE_DURATIONS_KEY: Final = pytest.StashKey[dict[_logging_tools.TimingPhase, float]]()
+
 
 class _ExistingPath(Path):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -17,36 +26,100 @@ def pytest_addoption(parser: pytest.Parser):
     parser.addoption(
         "--plugin-dist",
         type=_ExistingPath,
-        required=True,
         help="Distributive directory with JAR archives of lite and standalone pattern-syntax-plugin versions",
     )
 
     parser.addoption(
         "--java-path",
         type=_ExistingPath,
-        required=True,
         help="Path to java binary directory",
     )
 
     parser.addoption(
         "--samples-dir",
         type=_ExistingPath,
-        required=True,
         help="Path to a directory with Structurizr workspace test samples",
     )
 
+    _exporter_factory.add_exporter_options(parser.addoption)
 
-@pytest.fixture
-def syntax_plugin_dist(request: pytest.FixtureRequest) -> PatternSyntaxPluginDistributive:
-    plugin_dist_dir = request.config.getoption('--plugin-dist')
-    return PatternSyntaxPluginDistributive.from_dist_directory(plugin_dist_dir)
+    parser.addoption(
+        "--exporter-pool-size",
+        type=int,
+        default=1,
+        help="Number of prepared exporters kept alive by a test worker. Cells reuse exporters of the same configuration, "
+        "a larger pool keeps them for cells which don't run one after another at the cost of memory",
+    )
+
+    parser.addoption(
+        "--use-result-cache",
+        action="store_true",
+        default=False,
+        help="Replay cached export results of cells whose inputs have not changed instead of running exporters",
+    )
+
+    parser.addoption(
+        "--run-id",
+        default=None,
+        help="Identifier of the test run in the cell timings history, parallel workers of the same run share it",
+    )
+
+
+def _get_test_config(item: pytest.Item) -> _integration_matrix.TestConfiguration | None:
+    callspec = getattr(item, "callspec", None)
+    test_config = callspec.params.get("test_config") if callspec is not None else None
+
+    return test_config if isinstance(test_config, _integration_matrix.TestConfiguration) else None
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, None, None]:
+    with _logging_tools.record_phases() as phase_durations:
+        item.stash[_PHASE_DURATIONS_KEY] = phase_durations
+        return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo[None]) -> Generator[None, pytest.TestReport, pytest.TestReport]:
+    report = yield
+
+    if report.when == "call" and (test_config := _get_test_config(item)) is not None:
+        _cell_timings.CellTimingsStore(logging.getLogger(), _integration_matrix.CELL_TIMINGS_STORE_PATH).record(
+            test_config.param_id,
+            report.duration,
+            run_id=item.config.getoption("--run-id") or _DEFAULT_RUN_ID,
+            outcome=report.outcome,
+            phases=item.stash.get(_PHASE_DURATIONS_KEY, {}),
+        )
+
+    return report
+
+
+def _get_path_option(config: pytest.Config, name: str) -> Path:
+    # Path options are required by the integration tests only, so unit tests run without them.
+    # Derived paths must not keep the existence check of the option type
+    if (value := config.getoption(name)) is None:
+        raise pytest.UsageError(f"Option '{name}' is required by the integration tests")
+
+    return Path(value)
 
 
 @pytest.fixture
+def syntax_plugin_dist(request: pytest.FixtureRequest) -> _integration_matrix.PatternSyntaxPluginDistributive:
+    plugin_dist_dir = _get_path_option(request.config, "--plugin-dist")
+    return _integration_matrix.PatternSyntaxPluginDistributive.from_dist_directory(plugin_dist_dir)
+
+
+@pytest.fixture(scope="session")
 def java_path(request: pytest.FixtureRequest) -> Path:
-    return request.config.getoption('--java-path')
+    return _get_path_option(request.config, "--java-path")
 
 
 @pytest.fixture
 def samples_dir_path(request: pytest.FixtureRequest) -> Path:
-    return request.config.getoption("--samples-dir")
+    return _get_path_option(request.config, "--samples-dir")
+
+
+@pytest.fixture(scope="session")
+def exporter_options(request: pytest.FixtureRequest) -> _exporter_factory.ExporterOptions:
+    return _exporter_factory.get_exporter_options(vars(request.config.option))
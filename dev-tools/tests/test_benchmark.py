@@ -0,0 +1,50 @@
+import _benchmark
+
+
+def _result(plugin_variant: str, jweaver: str | None, workspace: str, latency: float, memory: float) -> _benchmark.BenchmarkResult:
+    stats = _benchmark.LatencyStats.from_samples([latency])
+
+    return _benchmark.BenchmarkResult(
+        exporter_type="structurizr_cli",
+        release="2024.03.03",
+        plugin_variant=plugin_variant,
+        jweaver=jweaver,
+        workspace=workspace,
+        jvm_profile="default",
+        export_failed=False,
+        cold=stats,
+        warm=stats,
+        throughput=None,
+        peak_memory_mb=memory,
+    )
+
+
+def test_find_cheapest_jweavers_considers_standalone() -> None:
+    results = [
+        _result("standalone", None, "a", 1.0, 200),
+        _result("standalone", None, "b", 1.0, 250),
+        _result("lite", "1.9.22", "a", 1.5, 300),
+        _result("lite", "1.9.22", "b", 1.5, 320),
+    ]
+
+    cheapest = _benchmark.find_cheapest_jweavers(_benchmark.find_weaving_overheads(results))
+
+    assert cheapest == {
+        ("structurizr_cli", "2024.03.03", "default"): _benchmark.PluginCandidate(jweaver=None, latency=4.0, peak_memory_mb=250),
+    }
+
+
+def test_find_cheapest_jweavers_skips_variants_missing_workspaces() -> None:
+    results = [
+        _result("standalone", None, "a", 2.0, 200),
+        _result("standalone", None, "b", 2.0, 200),
+        _result("lite", "1.9.22", "a", 1.0, 300),
+        _result("lite", "1.9.22", "b", 1.5, 310),
+        _result("lite", "1.9.7", "a", 0.5, 280),
+    ]
+
+    cheapest = _benchmark.find_cheapest_jweavers(_benchmark.find_weaving_overheads(results))
+
+    assert cheapest == {
+        ("structurizr_cli", "2024.03.03", "default"): _benchmark.PluginCandidate(jweaver="1.9.22", latency=5.0, peak_memory_mb=310),
+    }
@@ -0,0 +1,24 @@
+import _cell_timings
+
+
+def _timing(cell_id: str, duration: float, timestamp: float) -> _cell_timings.CellTiming:
+    return _cell_timings.CellTiming(
+        run_id="run",
+        cell_id=cell_id,
+        outcome="passed",
+        duration=duration,
+        phases={"export": duration},
+        timestamp=timestamp,
+    )
+
+
+def test_summarize_run_reports_wall_time_of_overlapping_cells() -> None:
+    summary = _cell_timings.summarize_run("run", [_timing("a", 10.0, 110.0), _timing("b", 8.0, 112.0)])
+
+    assert summary.started_at == 100.0
+    assert summary.duration == 12.0
+    assert summary.phases == {"export": 18.0}
+
+
+def test_new_run_id_is_unique() -> None:
+    assert _cell_timings.new_run_id() != _cell_timings.new_run_id()
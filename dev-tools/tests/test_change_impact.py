@@ -0,0 +1,57 @@
+from pathlib import Path
+import _change_impact
+
+
+def _write(path: Path, content: str = "") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path.absolute()
+
+
+def test_trace_workspace_dependencies_follows_nested_includes(tmp_path: Path) -> None:
+    workspace_path = _write(tmp_path / "workspace.dsl", "workspace {\n    !include model/model.dsl\n}\n")
+    model_path = _write(tmp_path / "model" / "model.dsl", '!include "../shared styles.dsl"\n')
+    styles_path = _write(tmp_path / "shared styles.dsl", "!include model/model.dsl\n")
+    _write(tmp_path / "unused.dsl")
+
+    assert _change_impact.trace_workspace_dependencies(workspace_path) == sorted([workspace_path, model_path, styles_path])
+
+
+def test_trace_workspace_dependencies_follows_directory_includes(tmp_path: Path) -> None:
+    workspace_path = _write(tmp_path / "workspace.dsl", "!include parts\n")
+    people_path = _write(tmp_path / "parts" / "people.dsl", "!include ../extra.dsl\n")
+    systems_path = _write(tmp_path / "parts" / "nested" / "systems.dsl")
+    extra_path = _write(tmp_path / "extra.dsl")
+
+    assert _change_impact.trace_workspace_dependencies(workspace_path) == sorted(
+        [workspace_path, people_path, systems_path, extra_path]
+    )
+
+
+def test_trace_workspace_dependencies_adds_documentation_without_parsing_it(tmp_path: Path) -> None:
+    workspace_path = _write(tmp_path / "workspace.dsl", "!docs docs\n!adrs decisions\n!script scripts/build.groovy\n")
+    docs_path = _write(tmp_path / "docs" / "index.md", "!include ../not-a-dependency.dsl\n")
+    decision_path = _write(tmp_path / "decisions" / "0001-record.md")
+    script_path = _write(tmp_path / "scripts" / "build.groovy")
+    _write(tmp_path / "not-a-dependency.dsl")
+
+    assert _change_impact.trace_workspace_dependencies(workspace_path) == sorted(
+        [workspace_path, docs_path, decision_path, script_path]
+    )
+
+
+def test_trace_workspace_dependencies_skips_urls_and_missing_files(tmp_path: Path) -> None:
+    workspace_path = _write(
+        tmp_path / "workspace.dsl",
+        "!include https://example.com/model.dsl\n!include missing.dsl\n!docs missing-docs\n",
+    )
+
+    assert _change_impact.trace_workspace_dependencies(workspace_path) == [workspace_path]
+
+
+def test_trace_workspace_dependencies_adds_plugin_jars(tmp_path: Path) -> None:
+    workspace_path = _write(tmp_path / "workspace.dsl")
+    plugin_path = _write(tmp_path / "plugins" / "plugin.jar")
+    _write(tmp_path / "plugins" / "readme.txt")
+
+    assert _change_impact.trace_workspace_dependencies(workspace_path) == sorted([workspace_path, plugin_path])
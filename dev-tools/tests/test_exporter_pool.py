@@ -0,0 +1,82 @@
+import logging
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+import pytest
+import _exporter_factory
+import _exporter_pool
+import _exporter_release
+import _exporters
+
+
+class _FakeExporter:
+    def __init__(self, name: str, closed_names: list[str]) -> None:
+        self.name = name
+        self.__closed_names = closed_names
+
+    def export_to_json(self, workspace_path: Path) -> _exporters.ExportResult:
+        return _exporters.ExportedWorkspace({})
+
+    def export_many(self, workspace_paths: Iterable[Path]) -> Iterator[_exporters.ExportResult]:
+        return (self.export_to_json(workspace_path) for workspace_path in workspace_paths)
+
+    def close(self) -> None:
+        self.__closed_names.append(self.name)
+
+
+def _config(version: str) -> _exporter_factory.ExporterConfig:
+    return _exporter_factory.StandaloneVersionExporterConfig(_exporter_release.StructurizrCliRelease(version=version, url=""))
+
+
+@pytest.fixture
+def closed_names(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    closed_names: list[str] = []
+
+    def get_exporter_factory(downloader: Any, environments: Any, config: _exporter_factory.ExporterConfig, *_: Any) -> Any:
+        return lambda java_path, syntax_plugin_path: _FakeExporter(config.exporter_release.version, closed_names)
+
+    monkeypatch.setattr(_exporter_factory, "get_exporter_factory", get_exporter_factory)
+    return closed_names
+
+
+def _create_pool(max_size: int) -> _exporter_pool.ExporterPool:
+    return _exporter_pool.ExporterPool(None, None, Path("java"), logging.getLogger(), max_size=max_size)  # type: ignore[arg-type]
+
+
+def test_exporter_pool_reuses_exporter_of_the_same_config(closed_names: list[str]) -> None:
+    with _create_pool(max_size=1) as pool:
+        exporter = pool.get_exporter(_config("a"), Path("plugin.jar"))
+
+        assert pool.get_exporter(_config("a"), Path("plugin.jar")) is exporter
+        assert pool.get_exporter(_config("a"), Path("other-plugin.jar")) is not exporter
+
+    assert closed_names == ["a", "a"]
+
+
+def test_exporter_pool_evicts_least_recently_used_exporter(closed_names: list[str]) -> None:
+    with _create_pool(max_size=2) as pool:
+        exporter_a = pool.get_exporter(_config("a"), Path("plugin.jar"))
+        pool.get_exporter(_config("b"), Path("plugin.jar"))
+        pool.get_exporter(_config("a"), Path("plugin.jar"))
+        pool.get_exporter(_config("c"), Path("plugin.jar"))
+
+        assert closed_names == ["b"]
+        assert pool.get_exporter(_config("a"), Path("plugin.jar")) is exporter_a
+
+    assert closed_names == ["b", "c", "a"]
+
+
+def test_exporter_pool_discard_closes_exporter(closed_names: list[str]) -> None:
+    with _create_pool(max_size=2) as pool:
+        exporter = pool.get_exporter(_config("a"), Path("plugin.jar"))
+        pool.discard(_config("a"), Path("plugin.jar"))
+        pool.discard(_config("b"), Path("plugin.jar"))
+
+        assert closed_names == ["a"]
+        assert pool.get_exporter(_config("a"), Path("plugin.jar")) is not exporter
+
+    assert closed_names == ["a", "a"]
+
+
+def test_exporter_pool_rejects_non_positive_size() -> None:
+    with pytest.raises(ValueError):
+        _create_pool(max_size=0)
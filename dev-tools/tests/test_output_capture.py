@@ -0,0 +1,61 @@
+import pytest
+import _output_capture
+
+
+def test_output_tail_keeps_everything_within_size() -> None:
+    tail = _output_capture.OutputTail(size=10)
+    tail.write(b"0123")
+    tail.write(b"")
+    tail.write(b"456789")
+
+    assert tail.get_text() == "0123456789"
+    assert tail.position == 10
+    assert tail.dropped_bytes == 0
+
+
+def test_output_tail_drops_oldest_bytes_on_wraparound() -> None:
+    tail = _output_capture.OutputTail(size=10)
+
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        tail.write(chunk)
+
+    assert tail.get_text() == "[... 6 bytes of output are dropped ...]\n6789abcdef"
+    assert tail.position == 16
+    assert tail.dropped_bytes == 6
+
+
+def test_output_tail_keeps_end_of_write_larger_than_size() -> None:
+    tail = _output_capture.OutputTail(size=4)
+    tail.write(b"ab")
+    tail.write(b"0123456789")
+
+    assert tail.get_text() == "[... 8 bytes of output are dropped ...]\n6789"
+    assert tail.position == 12
+
+
+@pytest.mark.parametrize(
+    "since, expected_text",
+    [
+        (0, "[... 6 bytes of output are dropped ...]\n6789abcdef"),
+        (4, "[... 2 bytes of output are dropped ...]\n6789abcdef"),
+        (6, "6789abcdef"),
+        (12, "cdef"),
+        (16, ""),
+    ],
+)
+def test_output_tail_returns_text_since_position(since: int, expected_text: str) -> None:
+    tail = _output_capture.OutputTail(size=10)
+
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        tail.write(chunk)
+
+    assert tail.get_text(since=since) == expected_text
+
+
+def test_output_tail_position_marks_later_output() -> None:
+    tail = _output_capture.OutputTail(size=8)
+    tail.write(b"first\n")
+    position = tail.position
+    tail.write(b"second\n")
+
+    assert tail.get_text(since=position) == "second\n"
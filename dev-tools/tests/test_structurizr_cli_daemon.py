@@ -0,0 +1,104 @@
+import logging
+from pathlib import Path
+import sys
+from typing import Iterator
+import pytest
+import _exporters
+from _exporters._structurizr_cli_daemon import StructurizrCliDaemonError
+
+
+# Fake daemon exits together with the command, like the daemon on JDK 24+ which can't trap it
+_FAKE_JAVA = """
+import json, os, socket, sys
+
+args = sys.argv[1:]
+daemon_index = next(index for index, arg in enumerate(args) if arg.endswith("ExportDaemon.java"))
+port_file = args[daemon_index + 1]
+
+server = socket.socket()
+server.bind(("127.0.0.1", 0))
+server.listen(1)
+
+with open(port_file + ".tmp", "w") as file:
+    file.write(str(server.getsockname()[1]))
+os.replace(port_file + ".tmp", port_file)
+
+while True:
+    connection, _ = server.accept()
+    stream = connection.makefile("rwb")
+    request = stream.readline().decode().rstrip("\\n").split("\\t")
+
+    if request == ["SHUTDOWN"]:
+        stream.write(b"OK\\n")
+        stream.flush()
+        sys.exit(0)
+
+    workspace_path = request[request.index("--workspace") + 1]
+    output_dir = request[request.index("--output") + 1]
+    exit_code = int(os.path.basename(workspace_path).split(".")[0].removeprefix("exit"))
+
+    if exit_code == 0:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "exit0.json"), "w") as file:
+            json.dump({"name": "exported"}, file)
+    else:
+        print(f"Command failed with code {exit_code}", file=sys.stderr, flush=True)
+
+    os._exit(exit_code)
+"""
+
+
+@pytest.fixture
+def exporter(tmp_path: Path) -> Iterator[_exporters.StructurizrCliDaemonForStandaloneVersion]:
+    java_dir = tmp_path / "jdk" / "bin"
+    java_dir.mkdir(parents=True)
+    java_path = java_dir / "java"
+    java_path.write_text(f"#!{sys.executable}\n{_FAKE_JAVA}")
+    java_path.chmod(0o755)
+
+    structurizr_cli_dir = tmp_path / "structurizr-cli"
+    (structurizr_cli_dir / "lib").mkdir(parents=True)
+    (structurizr_cli_dir / "lib" / "structurizr-cli.jar").write_bytes(b"")
+    (structurizr_cli_dir / "structurizr.sh").write_text('java -cp "$DIR/lib/*" com.structurizr.cli.StructurizrCliApplication "$@"\n')
+
+    exporter = _exporters.StructurizrCliDaemonForStandaloneVersion(
+        structurizr_cli_dir,
+        tmp_path / "work",
+        java_dir,
+        tmp_path / "plugin.jar",
+        logging.getLogger(),
+    )
+
+    yield exporter
+    exporter.close()
+
+
+def _create_workspace(tmp_path: Path, exit_code: int) -> Path:
+    workspace_path = tmp_path / f"exit{exit_code}.dsl"
+    workspace_path.write_text("workspace {}")
+    return workspace_path
+
+
+def test_exit_of_command_with_code_0_is_exported_workspace(tmp_path: Path, exporter: _exporters.StructurizrCliDaemonForStandaloneVersion) -> None:
+    result = exporter.export_to_json(_create_workspace(tmp_path, 0))
+
+    assert result == {"name": "exported"}
+
+
+def test_exit_of_command_with_code_1_is_export_failure(tmp_path: Path, exporter: _exporters.StructurizrCliDaemonForStandaloneVersion) -> None:
+    result = exporter.export_to_json(_create_workspace(tmp_path, 1))
+
+    assert isinstance(result, _exporters.ExportFailure)
+    assert result.error_message == "Command failed with code 1\n"
+
+
+def test_exit_of_command_with_other_code_is_daemon_error(tmp_path: Path, exporter: _exporters.StructurizrCliDaemonForStandaloneVersion) -> None:
+    with pytest.raises(StructurizrCliDaemonError, match="exited with code 3"):
+        exporter.export_to_json(_create_workspace(tmp_path, 3))
+
+
+def test_daemon_is_restarted_after_exit_of_command(tmp_path: Path, exporter: _exporters.StructurizrCliDaemonForStandaloneVersion) -> None:
+    results = list(exporter.export_many([_create_workspace(tmp_path, 1), _create_workspace(tmp_path, 0)]))
+
+    assert isinstance(results[0], _exporters.ExportFailure)
+    assert results[1] == {"name": "exported"}
@@ -0,0 +1,52 @@
+import random
+import pytest
+import _test_scheduler
+
+
+def _batch(name: str, estimated_cost: float) -> _test_scheduler.TestBatch:
+    return _test_scheduler.TestBatch(
+        name=name,
+        node_ids=(f"test_syntax_plugin.py::test_syntax_plugin[{name}]",),
+        demand=_test_scheduler.ResourceDemand(memory_mb=768, cpus=1.0),
+        estimated_cost=estimated_cost,
+    )
+
+
+def _get_shard_names(batches: list[_test_scheduler.TestBatch], count: int) -> list[list[str]]:
+    return [
+        [batch.name for batch in _test_scheduler.select_shard(batches, _test_scheduler.Shard(index, count))]
+        for index in range(1, count + 1)
+    ]
+
+
+def test_shard_parse() -> None:
+    assert _test_scheduler.Shard.parse("2/3") == _test_scheduler.Shard(index=2, count=3)
+
+
+@pytest.mark.parametrize("value", ["0/2", "3/2", "a/b", "1", "1/", "/2"])
+def test_shard_parse_rejects_invalid_value(value: str) -> None:
+    with pytest.raises(ValueError):
+        _test_scheduler.Shard.parse(value)
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 12])
+def test_select_shard_gives_every_batch_to_exactly_one_shard(count: int) -> None:
+    batches = [_batch(f"batch-{index}", float(index % 4)) for index in range(10)]
+
+    shard_names = [name for names in _get_shard_names(batches, count) for name in names]
+
+    assert sorted(shard_names) == sorted(batch.name for batch in batches)
+
+
+def test_select_shard_balances_cost() -> None:
+    batches = [_batch("a", 8.0), _batch("b", 7.0), _batch("c", 6.0), _batch("d", 5.0), _batch("e", 4.0)]
+
+    # The most expensive batch goes to the currently cheapest shard, equal shards are taken in order
+    assert _get_shard_names(batches, 2) == [["a", "d", "e"], ["b", "c"]]
+
+
+def test_select_shard_breaks_ties_by_name_regardless_of_order() -> None:
+    batches = [_batch(name, 1.0) for name in "abcdef"]
+    shuffled_batches = random.Random(0).sample(batches, len(batches))
+
+    assert _get_shard_names(shuffled_batches, 3) == _get_shard_names(batches, 3) == [["a", "d"], ["b", "e"], ["c", "f"]]
@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+from typing import Any
+import pytest
+import _workspace_diff
+
+
+_DOCUMENT = {
+    "name": "Workspace \"sample\" \\ é 😀",
+    "numbers": [0, -1, 12345678901234567890, 1.5, -0.25, 2e10, 1E+2, 3.0e-7, -0.0],
+    "literals": [True, False, None],
+    "nested": {"empty": {}, "list": [], "items": [{"id": 1}, {"id": 2.75}]},
+}
+
+
+@pytest.mark.parametrize(
+    "dump_options",
+    [{}, {"indent": 2}, {"separators": (",", ":"), "ensure_ascii": False}],
+    ids=["default", "indented", "compact"],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+@pytest.mark.parametrize(
+    "actual",
+    [
+        _DOCUMENT,
+        {**_DOCUMENT, "numbers": [0, -1, 12345678901234567890, 1.5, -0.25, 2e10, 1E+2, 3.0e-7, 0.5]},
+        {**_DOCUMENT, "literals": [True, False, 0]},
+        {**_DOCUMENT, "nested": {"empty": {}, "list": [], "items": [{"id": 1}]}},
+        {**_DOCUMENT, "name": "Workspace"},
+    ],
+    ids=["equal", "changed-float", "changed-literal", "removed-item", "changed-string"],
+)
+def test_find_file_differences_agrees_with_equality(
+    tmp_path: Path,
+    dump_options: dict[str, Any],
+    chunk_size: int,
+    actual: Any,
+) -> None:
+    expected_path = tmp_path / "expected.json"
+    expected_path.write_text(json.dumps(_DOCUMENT, **dump_options), encoding="utf-8")
+
+    differences = _workspace_diff.find_file_differences(actual, expected_path, chunk_size=chunk_size)
+
+    assert (not differences) == (actual == _DOCUMENT)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 64])
+@pytest.mark.parametrize("content", ["[1.5, tru]", "[1., 2]", "[nulls]", "{\"a\": 1"])
+def test_find_file_differences_rejects_malformed_json(tmp_path: Path, chunk_size: int, content: str) -> None:
+    expected_path = tmp_path / "expected.json"
+    expected_path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        _workspace_diff.find_file_differences([1.5, True], expected_path, chunk_size=chunk_size)
+
+
+_EXPECTED_WORKSPACE = {
+    "name": "Expected",
+    "model": {"people": [{"id": 1, "tags": "Person"}, {"id": 2}], "softwareSystems": []},
+    "views": {"systemContextViews": []},
+    "custom key": 1,
+}
+
+_ACTUAL_WORKSPACE = {
+    "name": "Actual",
+    "model": {"people": [{"id": 1}, {"id": 2}, {"id": 3}], "softwareSystems": []},
+    "views": [],
+    "custom key": 2,
+    "extra": True,
+}
+
+_EXPECTED_DIFFERENCES = [
+    '$.name: expected "Expected", got "Actual"',
+    "$.model.people[0].tags: missing in exported workspace",
+    "$.model.people[2]: unexpected in exported workspace",
+    "$.views: expected object, got array",
+    '$["custom key"]: expected 1, got 2',
+    "$.extra: unexpected in exported workspace",
+]
+
+
+def _find_differences_in_file(tmp_path: Path, actual: Any, expected: Any, limit: int) -> list[_workspace_diff.Difference]:
+    expected_path = tmp_path / "expected.json"
+    expected_path.write_text(json.dumps(expected), encoding="utf-8")
+
+    return _workspace_diff.find_file_differences(actual, expected_path, limit=limit, chunk_size=3)
+
+
+def _find_differences_in_memory(tmp_path: Path, actual: Any, expected: Any, limit: int) -> list[_workspace_diff.Difference]:
+    return _workspace_diff.find_differences(actual, expected, limit=limit)
+
+
+@pytest.mark.parametrize("find_differences", [_find_differences_in_memory, _find_differences_in_file], ids=["memory", "file"])
+@pytest.mark.parametrize("limit", [1, 3, 6, 100])
+def test_find_differences_reports_paths_up_to_limit(tmp_path: Path, find_differences: Any, limit: int) -> None:
+    differences = find_differences(tmp_path, _ACTUAL_WORKSPACE, _EXPECTED_WORKSPACE, limit)
+
+    assert [str(difference) for difference in differences] == _EXPECTED_DIFFERENCES[:limit]
+
+
+def test_find_file_differences_stops_reading_at_limit(tmp_path: Path) -> None:
+    expected_path = tmp_path / "expected.json"
+    # The rest of the document is malformed, so it fails if it is read
+    expected_path.write_text('{"name": "Expected", "model": {"people": [tru', encoding="utf-8")
+
+    differences = _workspace_diff.find_file_differences({"name": "Actual"}, expected_path, limit=1, chunk_size=1)
+
+    assert [str(difference) for difference in differences] == ['$.name: expected "Expected", got "Actual"']
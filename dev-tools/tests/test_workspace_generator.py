@@ -0,0 +1,33 @@
+import pytest
+import _workspace_generator
+
+
+def test_generate_workspace_counts_generated_items() -> None:
+    workspace = _workspace_generator.generate_workspace(
+        _workspace_generator.WorkspaceShape(services=45, services_per_system=20),
+    )
+
+    # Systems of 20, 20 and 5 services, every one with a frontend, a registry, an orchestrator,
+    # and a database per service. Only the first system calls the saga pattern
+    assert workspace.stats == _workspace_generator.WorkspaceStats(
+        software_systems=3,
+        elements=1 + 3 * 4 + 2 * 45,
+        relationships=2 * 45,
+        pattern_calls=45 + 3 * 3 + 1,
+        size_bytes=len(workspace.dsl.encode("utf-8")),
+    )
+    assert workspace.dsl.count("$pattern ") == workspace.stats.pattern_calls
+    assert workspace.dsl.count(" -> ") == workspace.stats.relationships
+    assert workspace.dsl.count("{") == workspace.dsl.count("}")
+
+
+def test_generate_workspace_is_deterministic() -> None:
+    shape = _workspace_generator.WorkspaceShape(services=7, services_per_system=3)
+
+    assert _workspace_generator.generate_workspace(shape) == _workspace_generator.generate_workspace(shape)
+
+
+@pytest.mark.parametrize("services, services_per_system", [(0, 20), (5, 0)])
+def test_workspace_shape_rejects_empty_systems(services: int, services_per_system: int) -> None:
+    with pytest.raises(ValueError):
+        _workspace_generator.WorkspaceShape(services=services, services_per_system=services_per_system)